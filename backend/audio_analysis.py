@@ -0,0 +1,114 @@
+import numpy as np
+from dataclasses import dataclass, asdict
+
+# 16-bit little-endian PCM, matching pyaudio.paInt16 on every platform we ship
+PCM16 = np.dtype("<i2")
+
+
+def pcm16_view(data):
+    """
+    Returns a zero-copy int16 view over a PCM byte buffer.
+    A trailing odd byte (partial sample) is ignored rather than raising.
+    """
+    if isinstance(data, np.ndarray):
+        return data
+    count = len(data) // 2
+    return np.frombuffer(data, dtype=PCM16, count=count)
+
+
+@dataclass
+class AudioLevels:
+    """Per-chunk level measurements used for VAD decisions."""
+    rms: int
+    peak: int
+    zero_crossing_rate: float
+    noise_floor: float
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class AudioAnalyzer:
+    """
+    Vectorized level analysis for microphone chunks.
+    Replaces the struct.unpack + Python generator RMS that ran per sample on the event loop.
+    Keeps a smoothed noise floor across calls, so use one instance per input stream.
+    """
+    def __init__(self, floor_attack=0.5, floor_release=0.01, initial_noise_floor=None):
+        # Floor drops quickly towards quieter chunks and creeps up slowly under sustained sound,
+        # so speech does not drag the floor up but a noisier room eventually does.
+        self.floor_attack = floor_attack
+        self.floor_release = floor_release
+        self.noise_floor = initial_noise_floor
+
+    def analyze(self, data):
+        """Computes RMS, peak, zero-crossing rate and the updated noise floor for a chunk."""
+        samples = pcm16_view(data)
+        count = samples.shape[0]
+        if count == 0:
+            return AudioLevels(rms=0, peak=0, zero_crossing_rate=0.0, noise_floor=self.noise_floor or 0.0)
+
+        # int64 accumulation avoids the int16 overflow np.dot would hit, without materialising a float copy
+        sum_squares = int(np.einsum("i,i->", samples, samples, dtype=np.int64))
+        rms = int(np.sqrt(sum_squares / count))
+
+        # abs() of -32768 overflows int16, so compare the extremes as Python ints
+        peak = max(int(samples.max()), -int(samples.min()))
+
+        if count > 1:
+            signs = np.signbit(samples)
+            crossings = np.count_nonzero(signs[1:] != signs[:-1])
+            zcr = crossings / (count - 1)
+        else:
+            zcr = 0.0
+
+        self._update_noise_floor(rms)
+        return AudioLevels(rms=rms, peak=peak, zero_crossing_rate=zcr, noise_floor=self.noise_floor)
+
+    def _update_noise_floor(self, rms):
+        if self.noise_floor is None:
+            self.noise_floor = float(rms)
+            return
+        alpha = self.floor_attack if rms < self.noise_floor else self.floor_release
+        self.noise_floor += alpha * (rms - self.noise_floor)
+
+    def reset(self):
+        self.noise_floor = None
+
+
+def envelope_bins(data, bins=64):
+    """
+    Downsamples a PCM chunk to `bins` peak-amplitude values scaled to 0-255 (uint8).
+    Used by the audio visualization stream instead of sending raw PCM to the frontend.
+    """
+    samples = pcm16_view(data)
+    out = np.zeros(bins, dtype=np.uint8)
+    usable = (len(samples) // bins) * bins
+    if usable == 0:
+        return out
+    frames = samples[:usable].reshape(bins, -1)
+    peaks = np.maximum(frames.max(axis=1).astype(np.int32), -frames.min(axis=1).astype(np.int32))
+    np.minimum(peaks * 255 // 32768, 255, out=peaks)
+    out[:] = peaks
+    return out
+
+
+def spectrum_bins(data, bins=64, fft_size=1024, floor_db=-90.0):
+    """
+    Magnitude spectrum of the most recent `fft_size` samples, grouped into `bins` bands
+    and mapped from [floor_db, 0] dBFS to 0-255 (uint8).
+    """
+    samples = pcm16_view(data)[-fft_size:]
+    out = np.zeros(bins, dtype=np.uint8)
+    if len(samples) < 2:
+        return out
+    window = np.hanning(len(samples))
+    spectrum = np.abs(np.fft.rfft(samples * window)) / (np.sum(window) * 32768 / 2)
+    usable = (len(spectrum) // bins) * bins
+    if usable == 0:
+        return out
+    bands = spectrum[:usable].reshape(bins, -1).max(axis=1)
+    db = 20 * np.log10(np.maximum(bands, 1e-12))
+    scaled = (db - floor_db) / -floor_db * 255
+    out[:] = np.clip(scaled, 0, 255)
+    return out
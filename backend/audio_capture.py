@@ -0,0 +1,110 @@
+import asyncio
+from collections import deque
+
+# Mirrors pyaudio.paContinue / pyaudio.paInputOverflow so this module imports without PortAudio
+PA_CONTINUE = 0
+PA_INPUT_OVERFLOW = 0x2
+
+
+class MicrophoneCapture:
+    """
+    Callback-driven microphone capture.
+    PortAudio delivers each chunk on its own audio thread, which appends it to a bounded ring
+    and wakes the asyncio side with loop.call_soon_threadsafe. Replaces one asyncio.to_thread
+    round-trip per chunk, so capture no longer queues behind other users of the default executor.
+    """
+    def __init__(self, chunk_size=1024, max_frames=32, frame_processor=None):
+        self.chunk_size = chunk_size
+        # Optional per-chunk hook run on the audio thread (e.g. WakeWordStage.feed)
+        self.frame_processor = frame_processor
+        # deque append/popleft are atomic, so the audio thread and the loop never take a lock
+        self._frames = deque(maxlen=max_frames)
+        self._loop = None
+        self._ready = None
+        self._wakeup_pending = False
+        self.stream = None
+
+        # Counters are only written from the audio thread
+        self.frames_captured = 0
+        self.dropped_frames = 0
+        self.overflows = 0
+
+    async def start(self, p, format, channels, rate, input_device_index=None):
+        """Opens `p` (a pyaudio.PyAudio) in callback mode. Raises OSError like p.open does."""
+        self._loop = asyncio.get_running_loop()
+        self._ready = asyncio.Event()
+        self.stream = await asyncio.to_thread(
+            p.open,
+            format=format,
+            channels=channels,
+            rate=rate,
+            input=True,
+            input_device_index=input_device_index,
+            frames_per_buffer=self.chunk_size,
+            stream_callback=self._on_audio,
+        )
+        return self.stream
+
+    def _on_audio(self, in_data, frame_count, time_info, status):
+        """PortAudio callback (audio thread). Must not block."""
+        if status & PA_INPUT_OVERFLOW:
+            self.overflows += 1
+        if len(self._frames) == self._frames.maxlen:
+            # Consumer fell behind; the deque drops the oldest frame on append
+            self.dropped_frames += 1
+        self._frames.append(in_data)
+        self.frames_captured += 1
+
+        if self.frame_processor:
+            try:
+                self.frame_processor(in_data)
+            except Exception as e:
+                print(f"[MicrophoneCapture] Frame processor error: {e}")
+
+        # Coalesce wakeups: at most one pending callback on the loop at a time
+        if not self._wakeup_pending:
+            self._wakeup_pending = True
+            try:
+                self._loop.call_soon_threadsafe(self._wakeup)
+            except RuntimeError:
+                # Event loop already closed during shutdown
+                pass
+        return (None, PA_CONTINUE)
+
+    def _wakeup(self):
+        self._wakeup_pending = False
+        self._ready.set()
+
+    async def read(self):
+        """Returns the next captured chunk, waiting without touching the thread pool."""
+        while True:
+            try:
+                return self._frames.popleft()
+            except IndexError:
+                pass
+            self._ready.clear()
+            # A frame may have landed between popleft() and clear()
+            if self._frames:
+                continue
+            await self._ready.wait()
+
+    def clear(self):
+        """Discards buffered frames (e.g. while paused)."""
+        self._frames.clear()
+
+    def get_stats(self):
+        return {
+            "frames_captured": self.frames_captured,
+            "dropped_frames": self.dropped_frames,
+            "overflows": self.overflows,
+            "queued_frames": len(self._frames),
+        }
+
+    def close(self):
+        if self.stream:
+            try:
+                self.stream.stop_stream()
+                self.stream.close()
+            except Exception:
+                pass
+            self.stream = None
@@ -0,0 +1,246 @@
+import difflib
+import threading
+import time
+from dataclasses import dataclass, asdict
+from typing import Optional
+
+# Browser device labels (navigator.mediaDevices) carry these prefixes; PortAudio names don't
+LABEL_PREFIXES = ("default - ", "communications - ")
+
+
+@dataclass
+class AudioDevice:
+    """A PortAudio device as seen at enumeration time."""
+    index: int
+    name: str
+    host_api: int
+    max_input_channels: int
+    max_output_channels: int
+    default_sample_rate: float
+
+    def supports(self, kind):
+        channels = self.max_input_channels if kind == 'input' else self.max_output_channels
+        return channels > 0
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def _normalize(name):
+    name = (name or "").strip().lower()
+    for prefix in LABEL_PREFIXES:
+        if name.startswith(prefix):
+            name = name[len(prefix):]
+    return name
+
+
+def _default_pyaudio_factory():
+    import pyaudio
+    return pyaudio.PyAudio()
+
+
+class AudioDeviceRegistry:
+    """
+    Process-wide cache of PortAudio devices.
+    Creating a PyAudio instance initializes PortAudio, which takes hundreds of milliseconds on
+    machines with many devices, so devices are enumerated once and only re-enumerated on
+    refresh(), after notify_hotplug(), or when a name lookup misses (rate-limited).
+
+    PortAudio initialization is reference-counted and the device list is only read by the first
+    Pa_Initialize, so a new PyAudio created while another one is open sees the old devices.
+    Streams therefore open on the registry's shared instance (acquire()/release()): with nothing
+    acquired a refresh enumerates from a fresh instance, otherwise it reads the open instance and
+    reports last_refresh_complete = False if devices changed since it was opened. Holders can
+    compare hotplug_seq to reopen their streams, which lets the next refresh see the change.
+    """
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, pyaudio_factory=None, miss_refresh_interval=5.0, fuzzy_cutoff=0.8):
+        self._pyaudio_factory = pyaudio_factory or _default_pyaudio_factory
+        self.miss_refresh_interval = miss_refresh_interval
+        # High enough that "Speakers (X)" never fuzzy-matches "Microphone (X)"
+        self.fuzzy_cutoff = fuzzy_cutoff
+        self._lock = threading.RLock()
+        self._devices = None
+        self._by_name = {}
+        self._defaults = {"input": None, "output": None}
+        self._stale = True
+        self._last_refresh = 0.0
+        self.refresh_count = 0
+        self.last_refresh_complete = True
+        # Shared PyAudio instance and the hot-plug notification it was opened after
+        self._pa = None
+        self._pa_seq = 0
+        self._holders = 0
+        self.hotplug_seq = 0
+
+    @classmethod
+    def get(cls):
+        """Returns the shared registry for this process."""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    # --- Enumeration ---
+
+    def acquire(self):
+        """Returns the shared PyAudio instance, opening it on first use. Pair every call with release()."""
+        with self._lock:
+            if self._pa is None:
+                self._pa = self._pyaudio_factory()
+                self._pa_seq = self.hotplug_seq
+            self._holders += 1
+            return self._pa
+
+    def release(self):
+        """Drops one acquire(); the last release terminates PortAudio so it can re-enumerate."""
+        with self._lock:
+            if self._holders == 0:
+                return
+            self._holders -= 1
+            if self._holders == 0:
+                pa, self._pa = self._pa, None
+                try:
+                    if pa is not None:
+                        pa.terminate()
+                except Exception as e:
+                    print(f"[AudioDevices] PyAudio terminate failed: {e}")
+                if not self.last_refresh_complete:
+                    self._stale = True
+
+    def refresh(self):
+        """
+        Re-enumerates devices: with a short-lived PyAudio instance when none is acquired, otherwise
+        from the shared one (see the class docstring for when that list can be out of date).
+        """
+        with self._lock:
+            devices = []
+            defaults = {"input": None, "output": None}
+            shared = self._pa
+            owned = shared is None
+            p = self._pyaudio_factory() if shared is None else shared
+            try:
+                for i in range(p.get_device_count()):
+                    try:
+                        info = p.get_device_info_by_index(i)
+                    except Exception:
+                        continue
+                    devices.append(AudioDevice(
+                        index=int(info.get('index', i)),
+                        name=info.get('name', ''),
+                        host_api=int(info.get('hostApi', 0)),
+                        max_input_channels=int(info.get('maxInputChannels', 0)),
+                        max_output_channels=int(info.get('maxOutputChannels', 0)),
+                        default_sample_rate=float(info.get('defaultSampleRate', 0) or 0),
+                    ))
+                for kind, getter in (("input", p.get_default_input_device_info), ("output", p.get_default_output_device_info)):
+                    try:
+                        defaults[kind] = int(getter()['index'])
+                    except Exception:
+                        pass
+            finally:
+                if owned:
+                    p.terminate()
+
+            self._devices = devices
+            self._by_name = {}
+            for dev in devices:
+                # First (lowest index) device wins, matching the old linear scan
+                self._by_name.setdefault(_normalize(dev.name), []).append(dev)
+            self._defaults = defaults
+            self._stale = False
+            self._last_refresh = time.monotonic()
+            self.refresh_count += 1
+            self.last_refresh_complete = owned or self._pa_seq == self.hotplug_seq
+            if self.last_refresh_complete:
+                print(f"[AudioDevices] Enumerated {len(devices)} devices")
+            else:
+                print(f"[AudioDevices] Enumerated {len(devices)} devices from an open PortAudio instance; "
+                      f"device changes show up once its {self._holders} holder(s) reopen their streams")
+            return devices
+
+    def notify_hotplug(self):
+        """Devices changed: marks the cache stale and bumps hotplug_seq so open streams can be reopened."""
+        with self._lock:
+            self._stale = True
+            self.hotplug_seq += 1
+
+    def _mark_stale(self):
+        with self._lock:
+            self._stale = True
+
+    def _ensure(self):
+        with self._lock:
+            if self._devices is None or self._stale:
+                self.refresh()
+            return self._devices
+
+    # --- Lookups ---
+
+    def devices(self, kind=None):
+        devices = self._ensure()
+        if kind is None:
+            return list(devices)
+        return [d for d in devices if d.supports(kind)]
+
+    def get_device(self, index) -> Optional[AudioDevice]:
+        for dev in self._ensure():
+            if dev.index == index:
+                return dev
+        return None
+
+    def default_device(self, kind='input') -> Optional[AudioDevice]:
+        self._ensure()
+        index = self._defaults.get(kind)
+        return self.get_device(index) if index is not None else None
+
+    def find(self, name, kind='input') -> Optional[AudioDevice]:
+        """
+        Resolves a device name (PortAudio name or browser label) to a device.
+        Tries exact, then substring (either direction, covers MME's 31-char truncation), then fuzzy.
+        """
+        if not name:
+            return None
+        match = self._match(name, kind)
+        if match is None and time.monotonic() - self._last_refresh > self.miss_refresh_interval:
+            # Unknown name: possibly a device plugged in since the last enumeration. Only re-read the
+            # list; a miss is not a hot-plug signal, so holders don't reopen their streams for it
+            self._mark_stale()
+            match = self._match(name, kind)
+        return match
+
+    def _match(self, name, kind):
+        target = _normalize(name)
+        candidates = self.devices(kind)
+        if not target or not candidates:
+            return None
+
+        for dev in self._by_name.get(target, []):
+            if dev.supports(kind):
+                return dev
+
+        for dev in candidates:
+            dev_name = _normalize(dev.name)
+            if dev_name and (target in dev_name or dev_name in target):
+                return dev
+
+        names = [_normalize(d.name) for d in candidates]
+        close = difflib.get_close_matches(target, names, n=1, cutoff=self.fuzzy_cutoff)
+        if close:
+            return candidates[names.index(close[0])]
+        return None
+
+    def resolve_index(self, name, kind='input'):
+        """Convenience wrapper returning just the PortAudio index (or None)."""
+        dev = self.find(name, kind)
+        if dev:
+            print(f"[AudioDevices] '{name}' ({kind}) -> Index {dev.index}: {dev.name}")
+        else:
+            print(f"[AudioDevices] No {kind} device matches '{name}'. Falling back.")
+        return dev.index if dev else None
+
+    def list_devices(self, kind='input', host_api=0):
+        """(index, name) pairs for one host API, as returned by get_input_devices/get_output_devices."""
+        return [(d.index, d.name) for d in self.devices(kind) if host_api is None or d.host_api == host_api]
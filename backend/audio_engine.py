@@ -1,29 +1,32 @@
 import multiprocessing
-import queue
 import pyaudio
 import time
 import os
-import numpy as np
 
-# Signal to stop the process
-STOP_SIGNAL = None
-RESET_SIGNAL = "RESET"
+from audio_ring import AudioRingBuffer
+from audio_output import OutputConverter
 
 class AudioEngine(multiprocessing.Process):
     """
     Dedicated process for Zero-Latency Audio Playback.
-    Uses a Jitter Buffer strategy to ensure smooth playback across process boundaries.
+    Reads PCM from a shared-memory ring; the ring itself acts as the jitter buffer.
     """
-    def __init__(self, audio_queue, output_device_index=None, status_queue=None):
+    def __init__(self, audio_ring, output_device_index=None, status_queue=None, device_info=None):
         super().__init__()
-        self.audio_queue = audio_queue
+        self.audio_ring = audio_ring
         self.output_device_index = output_device_index
+        # AudioDevice from the parent's AudioDeviceRegistry; saves re-querying PortAudio here
+        self.device_info = device_info
         self.status_queue = status_queue 
-        self.buffer_threshold = 2 # Reduced threshold for faster response
+        self.prebuffer_ms = 80 # Buffered audio required before playback starts
+        self.prebuffer_wait = 0.05 # Start anyway if no more audio arrives within this window (short replies)
+        self.underrun_gap = 0.5 # A refill sooner than this after running dry counts as an underrun
+        self.frames_per_buffer = 1024
         
         # Audio Config (Gemini Defaults)
         self.channels = 1
-        self.rate = 24000 
+        self.rate = 24000 # Rate of the PCM in the ring
+        self.device_rate = self.rate # Rate the stream was opened at (device native when possible)
         self.format = pyaudio.paInt16
         
     def _set_priority(self):
@@ -45,9 +48,17 @@ class AudioEngine(multiprocessing.Process):
         try:
             self.p = pyaudio.PyAudio()
             
-            # Device Inspection
+            # Device Inspection (skipped when the parent already resolved the device)
             try:
-                if self.output_device_index is not None:
+                if self.device_info is not None and self.device_info.max_output_channels > 0:
+                    device_info = {
+                        "name": self.device_info.name,
+                        "maxOutputChannels": self.device_info.max_output_channels,
+                        "defaultSampleRate": self.device_info.default_sample_rate,
+                    }
+                    if self.output_device_index is None:
+                        self.output_device_index = self.device_info.index
+                elif self.output_device_index is not None:
                     device_info = self.p.get_device_info_by_index(self.output_device_index)
                     if device_info.get('maxOutputChannels', 0) == 0:
                         self.output_device_index = None
@@ -58,80 +69,109 @@ class AudioEngine(multiprocessing.Process):
                 device_info = {"name": "Unknown", "maxOutputChannels": 2}
             
             max_channels = int(device_info.get('maxOutputChannels', 2))
+            native_rate = int(device_info.get('defaultSampleRate', 0) or 0)
+            
+            # Prefer the device's native rate so neither PortAudio nor the host API resamples;
+            # fall back to the model rate if the device refuses it
+            potential_rates = [native_rate, self.rate] if native_rate > 0 and native_rate != self.rate else [self.rate]
             
             # Multi-channel robustness
             self.stream = None
             potential_channels = sorted(list(set([1, 2, max_channels])))
-            for channel_count in potential_channels:
-                if channel_count <= 0: continue
-                try:
-                    self.stream = self.p.open(
-                        format=self.format,
-                        channels=channel_count,
-                        rate=self.rate,
-                        output=True,
-                        output_device_index=self.output_device_index,
-                        frames_per_buffer=1024
-                    )
-                    self.channels = channel_count
+            for rate in potential_rates:
+                for channel_count in potential_channels:
+                    if channel_count <= 0: continue
+                    try:
+                        self.stream = self.p.open(
+                            format=self.format,
+                            channels=channel_count,
+                            rate=rate,
+                            output=True,
+                            output_device_index=self.output_device_index,
+                            frames_per_buffer=self.frames_per_buffer * rate // self.rate
+                        )
+                        self.channels = channel_count
+                        self.device_rate = rate
+                        break
+                    except: continue
+                if self.stream:
                     break
-                except: continue
             
             if not self.stream:
                 raise Exception("Failed to open audio stream.")
             
-            print(f"[AudioEngine] Process Ready (PID: {os.getpid()}) on device {self.output_device_index}")
+            converter = OutputConverter(self.rate, self.device_rate, self.channels, max_chunk=self.frames_per_buffer)
             
-            jitter_buffer = []
-            is_playing = False
+            print(f"[AudioEngine] Process Ready (PID: {os.getpid()}) on device {self.output_device_index} ({self.channels}ch @ {self.device_rate} Hz)")
             
-            while True:
-                try:
-                    # TIGHT TIMEOUT (5ms) to prevent audible gaps
-                    chunk = self.audio_queue.get(timeout=0.005)
-                except queue.Empty:
-                    if is_playing and not jitter_buffer:
-                        # Natural pause or underrun
-                        # print("[AudioEngine] Jitter buffer underrun detected.")
-                        pass
-                    continue
+            ring = self.audio_ring
+            prebuffer_bytes = int(self.rate * 2 * self.prebuffer_ms / 1000)
+            write_bytes = self.frames_per_buffer * 2
+            is_playing = False
+            drained_at = None
 
-                if chunk is STOP_SIGNAL:
+            while not ring.stop_requested:
+                ring.beat()
+                # Block until the producer signals data/control; no polling while idle.
+                # The short timeout only applies while a partial prebuffer is waiting to be flushed.
+                signalled = ring.wait(timeout=self.prebuffer_wait if ring.fill_level() else 1.0)
+
+                if ring.stop_requested:
                     break
-                    
-                if chunk == RESET_SIGNAL:
-                    jitter_buffer = []
+
+                if ring.consume_reset():
                     is_playing = False
+                    drained_at = None
+                    converter.reset()
                     # Stop current stream output for instant silence
                     try:
                         self.stream.stop_stream()
                         self.stream.start_stream()
                     except: pass
+                    ring.mark_reset_applied()
                     continue
-                        
-                # Queue data
-                jitter_buffer.append(chunk)
-                
-                # Start playback once buffered
+
+                available = ring.fill_level()
+                if not available:
+                    continue
+
+                # Start playback once buffered, or when the producer has gone quiet with a short tail
                 if not is_playing:
-                    if len(jitter_buffer) >= self.buffer_threshold:
-                        is_playing = True
-                        
-                if is_playing:
-                    while jitter_buffer:
-                        data = jitter_buffer.pop(0)
-                        
-                        # Expand to stereo if the hardware requires it
-                        if self.channels > 1:
-                            mono_data = np.frombuffer(data, dtype=np.int16)
-                            multi_data = np.repeat(mono_data, self.channels)
-                            data = multi_data.tobytes()
+                    if available < prebuffer_bytes and signalled:
+                        continue
+                    if drained_at is not None and time.monotonic() - drained_at < self.underrun_gap:
+                        ring.record_underrun()
+                    drained_at = None
+                    is_playing = True
 
+                while is_playing:
+                    ring.beat()
+                    if ring.stop_requested or ring.consume_reset():
+                        is_playing = False
+                        converter.reset()
                         try:
-                            self.stream.write(data)
-                        except Exception as e:
-                            print(f"[AudioEngine] Write error: {e}")
-                            break
+                            self.stream.stop_stream()
+                            self.stream.start_stream()
+                        except: pass
+                        ring.mark_reset_applied()
+                        break
+
+                    data = ring.read(write_bytes)
+                    if not data:
+                        # Natural pause or underrun; decided when audio resumes
+                        is_playing = False
+                        drained_at = time.monotonic()
+                        break
+
+                    # Resample / expand to the stream's format (no-op for mono at 24 kHz)
+                    data = converter.convert(data)
+
+                    try:
+                        self.stream.write(data)
+                    except Exception as e:
+                        print(f"[AudioEngine] Write error: {e}")
+                        is_playing = False
+                        break
 
         except KeyboardInterrupt:
             pass
@@ -146,8 +186,9 @@ class AudioEngine(multiprocessing.Process):
                 except: pass
             if hasattr(self, 'p'):
                 self.p.terminate()
+            self.audio_ring.close(unlink=False)
 
-def create_audio_engine(output_device_index=None):
-    audio_queue = multiprocessing.Queue()
-    engine = AudioEngine(audio_queue, output_device_index=output_device_index)
-    return engine, audio_queue
+def create_audio_engine(output_device_index=None, device_info=None):
+    audio_ring = AudioRingBuffer(sample_rate=24000)
+    engine = AudioEngine(audio_ring, output_device_index=output_device_index, device_info=device_info)
+    return engine, audio_ring
@@ -0,0 +1,128 @@
+from math import gcd
+
+import numpy as np
+
+from audio_analysis import PCM16, pcm16_view
+
+
+def design_polyphase_filter(up, down, taps_per_phase=16, beta=8.0):
+    """
+    Kaiser-windowed sinc low-pass for rational resampling by up/down.
+    Returns an (up, taps_per_phase) float32 bank; row p holds the taps of phase p, time-reversed
+    so each output sample is a plain dot product with a contiguous input window.
+    """
+    num_taps = up * taps_per_phase
+    cutoff = 0.5 / max(up, down)  # cycles per sample at the upsampled rate
+    n = np.arange(num_taps) - (num_taps - 1) / 2.0
+    h = 2 * cutoff * np.sinc(2 * cutoff * n) * np.kaiser(num_taps, beta)
+    h *= up / h.sum()  # unity gain after zero-stuffing
+    bank = h.reshape(taps_per_phase, up).T  # bank[p, k] = h[p + k*up]
+    return np.ascontiguousarray(bank[:, ::-1], dtype=np.float32)
+
+
+class PolyphaseResampler:
+    """
+    Streaming rational resampler (e.g. 24 kHz -> 48 kHz is 2/1, -> 44.1 kHz is 147/80).
+    Only the taps that land on real input samples are evaluated, and filter history is carried
+    across chunks so chunk boundaries are seamless. Work buffers are reused between calls.
+    """
+    def __init__(self, in_rate, out_rate, taps_per_phase=16, max_chunk=4096):
+        g = gcd(int(in_rate), int(out_rate))
+        self.up = int(out_rate) // g
+        self.down = int(in_rate) // g
+        self.taps = taps_per_phase
+        self.bank = design_polyphase_filter(self.up, self.down, taps_per_phase)
+        self._pos = 0  # next output position, in 1/up input-sample units, relative to the chunk start
+        self._alloc(max_chunk)
+        self.reset()
+
+    def _alloc(self, max_chunk):
+        self.max_chunk = max_chunk
+        max_out = -(-max_chunk * self.up // self.down) + 1
+        self._x = np.zeros(self.taps - 1 + max_chunk, dtype=np.float32)
+        self._windows = np.empty((max_out, self.taps), dtype=np.float32)
+        self._coeffs = np.empty((max_out, self.taps), dtype=np.float32)
+        self._y = np.empty(max_out, dtype=np.float32)
+        self._steps = np.arange(max_out, dtype=np.int64) * self.down
+
+    def reset(self):
+        """Forgets filter history (after a playback RESET the next audio is unrelated)."""
+        self._x[:self.taps - 1] = 0
+        self._pos = 0
+
+    def output_length(self, n_in):
+        return max(0, -(-(n_in * self.up - self._pos) // self.down))
+
+    def process(self, samples):
+        """Resamples a 1-D int16/float chunk. Returns a float32 view into an internal buffer."""
+        n_in = len(samples)
+        if n_in > self.max_chunk:
+            history = self._x[:self.taps - 1].copy()
+            self._alloc(n_in)
+            self._x[:self.taps - 1] = history
+        hist = self.taps - 1
+        self._x[hist:hist + n_in] = samples
+
+        n_out = self.output_length(n_in)
+        pos = self._pos + self._steps[:n_out]
+        index = pos // self.up
+        phase = pos - index * self.up
+
+        # windows[j] = x[j : j + taps] covers input samples j-taps+1 .. j (in chunk coordinates)
+        windows = np.lib.stride_tricks.sliding_window_view(self._x[:hist + n_in], self.taps)
+        np.take(windows, index, axis=0, out=self._windows[:n_out])
+        np.take(self.bank, phase, axis=0, out=self._coeffs[:n_out])
+        y = self._y[:n_out]
+        np.einsum("ij,ij->i", self._windows[:n_out], self._coeffs[:n_out], out=y)
+
+        self._pos += n_out * self.down - n_in * self.up
+        # Keep the last taps-1 inputs as history for the next chunk
+        self._x[:hist] = self._x[n_in:n_in + hist]
+        return y
+
+
+class OutputConverter:
+    """
+    Converts the 24 kHz mono model stream to the format the output device was opened with.
+    Mono is copied into a preallocated interleave buffer instead of np.repeat per chunk;
+    a PolyphaseResampler is inserted only when the device's native rate differs.
+    """
+    def __init__(self, in_rate, out_rate, channels, max_chunk=4096):
+        self.in_rate = int(in_rate)
+        self.out_rate = int(out_rate)
+        self.channels = int(channels)
+        self.resampler = PolyphaseResampler(in_rate, out_rate, max_chunk=max_chunk) if self.in_rate != self.out_rate else None
+        self._interleaved = None
+        self._ensure(max_chunk)
+
+    @property
+    def passthrough(self):
+        return self.resampler is None and self.channels == 1
+
+    def _ensure(self, n_in):
+        max_out = n_in if self.resampler is None else -(-n_in * self.resampler.up // self.resampler.down) + 1
+        if self._interleaved is None or len(self._interleaved) < max_out:
+            self._interleaved = np.empty((max_out, self.channels), dtype=PCM16)
+            self._mono = np.empty(max_out, dtype=PCM16)
+
+    def reset(self):
+        if self.resampler:
+            self.resampler.reset()
+
+    def convert(self, data):
+        """Returns PCM bytes for the device (PyAudio's write() only accepts read-only buffers)."""
+        if self.passthrough:
+            return data
+        samples = pcm16_view(data)
+        self._ensure(len(samples))
+        if self.resampler:
+            y = self.resampler.process(samples)
+            np.clip(y, -32768, 32767, out=y)
+            np.rint(y, out=y)
+            samples = self._mono[:len(y)]
+            np.copyto(samples, y, casting="unsafe")
+        out = self._interleaved[:len(samples)]
+        # One strided copy per channel; measurably faster than broadcasting a (n, 1) column
+        for channel in range(self.channels):
+            out[:, channel] = samples
+        return out.tobytes()
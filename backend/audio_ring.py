@@ -0,0 +1,239 @@
+import multiprocessing
+import os
+import sys
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Header slots (uint64). Each slot has exactly one writer, which is what keeps the ring lock-free:
+#   producer owns WRITE_POS, OVERRUN_COUNT, RESET_SEQ, RESET_POS, STOP_FLAG, RESET_ISSUED_NS
+#   consumer owns READ_POS, UNDERRUN_COUNT, RESET_APPLIED_SEQ, RESET_APPLIED_NS, HEARTBEAT_NS
+(WRITE_POS, READ_POS, UNDERRUN_COUNT, OVERRUN_COUNT, RESET_SEQ, RESET_POS, STOP_FLAG,
+ RESET_ISSUED_NS, RESET_APPLIED_SEQ, RESET_APPLIED_NS, HEARTBEAT_NS) = range(11)
+HEADER_SLOTS = 16
+HEADER_BYTES = HEADER_SLOTS * 8
+
+# Control commands for the small control channel
+RESET = "RESET"
+STOP = "STOP"
+
+
+def _attach(name):
+    """Attaches to an existing block without letting this process' resource tracker unlink it on exit."""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    # Python < 3.13: the attaching process registers the block too, so undo that on POSIX
+    shm = shared_memory.SharedMemory(name=name)
+    if os.name != "nt":
+        try:
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, "shared_memory")
+        except Exception:
+            pass
+    return shm
+
+
+class AudioRingBuffer:
+    """
+    Single-producer/single-consumer PCM ring in multiprocessing.shared_memory.
+    AudioLoop (producer) copies model audio straight into the shared block; the AudioEngine
+    process (consumer) blocks on a semaphore until data or a control command arrives.
+    Read/write positions are monotonically increasing byte counters stored in the shared header.
+    """
+    def __init__(self, capacity_bytes=24000 * 2 * 60, sample_rate=24000, sample_width=2):
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+        # Keep whole samples in the ring so wrap-around never splits one
+        self.capacity = capacity_bytes - (capacity_bytes % sample_width)
+        self._shm = shared_memory.SharedMemory(create=True, size=HEADER_BYTES + self.capacity)
+        self._owner = True
+        self.closed = False
+        self._data_ready = multiprocessing.Semaphore(0)
+        self._map()
+        self._header[:] = 0
+        self._last_reset_seq = 0
+
+    def _map(self):
+        buf = self._shm.buf
+        if buf is None:
+            raise ValueError(f"Shared memory block {self._shm.name} is closed")
+        self._header = np.ndarray((HEADER_SLOTS,), dtype=np.uint64, buffer=buf[:HEADER_BYTES])
+        self._data = buf[HEADER_BYTES:HEADER_BYTES + self.capacity]
+
+    @property
+    def name(self):
+        return self._shm.name
+
+    # --- Pickling (the ring is handed to the AudioEngine process on spawn) ---
+
+    def __getstate__(self):
+        return {
+            "name": self._shm.name,
+            "sample_rate": self.sample_rate,
+            "sample_width": self.sample_width,
+            "data_ready": self._data_ready,
+        }
+
+    def __setstate__(self, state):
+        self.sample_rate = state["sample_rate"]
+        self.sample_width = state["sample_width"]
+        self._shm = _attach(state["name"])
+        self.capacity = self._shm.size - HEADER_BYTES
+        self._owner = False
+        self.closed = False
+        self._data_ready = state["data_ready"]
+        self._map()
+        self._last_reset_seq = int(self._header[RESET_SEQ])
+
+    # --- Producer side ---
+
+    def write(self, data):
+        """
+        Copies PCM into the ring without pickling. Returns the number of bytes accepted;
+        anything that does not fit is dropped and counted as an overrun.
+        """
+        mv = memoryview(data).cast("B")
+        write = int(self._header[WRITE_POS])
+        free = self.capacity - (write - int(self._header[READ_POS]))
+        n = min(len(mv), free)
+        n -= n % self.sample_width
+        if n < len(mv):
+            self._header[OVERRUN_COUNT] += 1
+        if n <= 0:
+            return 0
+
+        start = write % self.capacity
+        first = min(n, self.capacity - start)
+        self._data[start:start + first] = mv[:first]
+        if first < n:
+            self._data[:n - first] = mv[first:n]
+
+        # Publish only after the bytes are in place
+        self._header[WRITE_POS] = write + n
+        self._data_ready.release()
+        return n
+
+    def send_control(self, command):
+        """Control channel: RESET drops everything written so far, STOP ends the consumer loop."""
+        if command == RESET:
+            # perf_counter is system-wide on Windows/Linux/macOS, so both processes share the clock
+            self._header[RESET_ISSUED_NS] = time.perf_counter_ns()
+            self._header[RESET_POS] = self._header[WRITE_POS]
+            self._header[RESET_SEQ] += 1
+        elif command == STOP:
+            self._header[STOP_FLAG] = 1
+        else:
+            raise ValueError(f"Unknown ring control command: {command}")
+        self._data_ready.release()
+
+    def reset(self):
+        self.send_control(RESET)
+
+    def stop(self):
+        self.send_control(STOP)
+
+    # --- Consumer side ---
+
+    def wait(self, timeout=None):
+        """Blocks until the producer signals new data or a control command. Returns False on timeout."""
+        return self._data_ready.acquire(timeout=timeout)
+
+    @property
+    def stop_requested(self):
+        return bool(self._header[STOP_FLAG])
+
+    def consume_reset(self):
+        """Applies a pending RESET in O(1) by jumping the read position. Returns True if one was pending."""
+        seq = int(self._header[RESET_SEQ])
+        if seq == self._last_reset_seq:
+            return False
+        self._last_reset_seq = seq
+        reset_pos = int(self._header[RESET_POS])
+        if reset_pos > int(self._header[READ_POS]):
+            self._header[READ_POS] = reset_pos
+        return True
+
+    def read(self, max_bytes):
+        """Returns up to max_bytes of PCM (whole samples), or b'' if the ring is empty."""
+        read = int(self._header[READ_POS])
+        available = int(self._header[WRITE_POS]) - read
+        n = min(max_bytes, available)
+        n -= n % self.sample_width
+        if n <= 0:
+            return b""
+
+        start = read % self.capacity
+        first = min(n, self.capacity - start)
+        if first == n:
+            chunk = bytes(self._data[start:start + n])
+        else:
+            chunk = bytes(self._data[start:]) + bytes(self._data[:n - first])
+        self._header[READ_POS] = read + n
+        return chunk
+
+    def mark_reset_applied(self):
+        """Consumer: the output device is silent for the last consumed RESET."""
+        self._header[RESET_APPLIED_NS] = time.perf_counter_ns()
+        self._header[RESET_APPLIED_SEQ] = self._last_reset_seq
+
+    def last_reset_latency_ms(self):
+        """Issue-to-silence time of the most recent RESET, or None if it has not been applied yet."""
+        seq = int(self._header[RESET_SEQ])
+        if seq == 0 or int(self._header[RESET_APPLIED_SEQ]) != seq:
+            return None
+        return (int(self._header[RESET_APPLIED_NS]) - int(self._header[RESET_ISSUED_NS])) / 1e6
+
+    def record_underrun(self):
+        self._header[UNDERRUN_COUNT] += 1
+
+    def beat(self):
+        """Consumer liveness heartbeat (monotonic clock, comparable across processes)."""
+        self._header[HEARTBEAT_NS] = time.monotonic_ns()
+
+    def heartbeat_age(self):
+        """Seconds since the consumer last called beat(), or None if it never has."""
+        last = int(self._header[HEARTBEAT_NS])
+        if not last:
+            return None
+        return (time.monotonic_ns() - last) / 1e9
+
+    # --- Metrics (safe from either side) ---
+
+    def fill_level(self):
+        """Bytes written but not yet consumed."""
+        return max(0, int(self._header[WRITE_POS]) - int(self._header[READ_POS]))
+
+    def latency_ms(self):
+        """Playback latency currently queued in the ring."""
+        return self.fill_level() / (self.sample_rate * self.sample_width) * 1000
+
+    def get_stats(self):
+        return {
+            "capacity_bytes": self.capacity,
+            "fill_bytes": self.fill_level(),
+            "fill_ratio": self.fill_level() / self.capacity,
+            "buffered_ms": round(self.latency_ms(), 1),
+            "underruns": int(self._header[UNDERRUN_COUNT]),
+            "overruns": int(self._header[OVERRUN_COUNT]),
+        }
+
+    def close(self, unlink=None):
+        """Releases the mapping. The creating side unlinks the block by default."""
+        if self.closed:
+            return
+        self.closed = True
+        if unlink is None:
+            unlink = self._owner
+        # Views into shm.buf must be dropped before the buffer can be closed
+        del self._header
+        self._data.release()
+        try:
+            self._shm.close()
+        except BufferError:
+            pass
+        if unlink:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,169 @@
+import time
+
+
+def _default_engine_factory(output_device_index=None, device_info=None):
+    # audio_engine imports pyaudio at module level; keep that out of importers of this module
+    from audio_engine import create_audio_engine
+    return create_audio_engine(output_device_index=output_device_index, device_info=device_info)
+
+
+class AudioEngineSupervisor:
+    """
+    Owns the AudioEngine process independently of the Gemini Live session.
+    The engine is started once and reused across reconnects; it is only recreated when the
+    output device changes or it stops responding. Liveness comes from a heartbeat the engine
+    writes into the ring header on every loop iteration (at least once per second while idle).
+    Crash restarts back off exponentially (restart_backoff, doubling up to max_backoff). After
+    max_restarts consecutive crashes (an engine that ran for stable_after seconds resets the count)
+    the engine is marked failed: it is not respawned again until the device changes or reset() is
+    called, and on_failed(reason) is invoked once.
+    """
+    def __init__(self, engine_factory=None, heartbeat_timeout=3.0, startup_timeout=15.0,
+                 restart_backoff=1.0, max_backoff=30.0, max_restarts=5, stable_after=60.0, on_failed=None):
+        self._engine_factory = engine_factory or _default_engine_factory
+        self.heartbeat_timeout = heartbeat_timeout
+        # PyAudio init + opening the device can take seconds before the first heartbeat
+        self.startup_timeout = startup_timeout
+        self.restart_backoff = restart_backoff
+        self.max_backoff = max_backoff
+        self.max_restarts = max_restarts
+        self.stable_after = stable_after
+        self.on_failed = on_failed
+
+        self.process = None
+        self.ring = None
+        self.device_index = None
+        self._started_at = 0.0
+        self.starts = 0
+        self.restarts = 0
+        self.last_restart_reason = None
+        self.consecutive_failures = 0
+        self.failed = False
+        self._next_restart_at = 0.0
+
+    @property
+    def state(self):
+        """running | starting | backoff (unhealthy, waiting to restart) | unhealthy (restart due) | failed | stopped"""
+        if self.failed:
+            return "failed"
+        if self.process is None:
+            return "stopped"
+        if self.is_healthy():
+            return "running" if self.heartbeat_age() is not None else "starting"
+        return "backoff" if time.monotonic() < self._next_restart_at else "unhealthy"
+
+    def reset(self):
+        """Clears the failed state and crash count so the next ensure() starts a fresh engine."""
+        self.failed = False
+        self.consecutive_failures = 0
+        self._next_restart_at = 0.0
+
+    def ensure(self, output_device_index=None, device_info=None):
+        """
+        Returns (process, ring), starting or replacing the engine only if needed.
+        Call on every (re)connect; for a healthy engine on the same device this is a no-op.
+        """
+        reason = None
+        crashed = False
+        if output_device_index != self.device_index and (self.process is not None or self.failed):
+            # A different device deserves a fresh attempt, even after giving up on the old one
+            reason = f"output device changed ({self.device_index} -> {output_device_index})"
+            self.reset()
+        elif self.failed:
+            return None, None
+        elif self.process is None:
+            reason = "initial start"
+        elif not self.is_healthy():
+            reason = "engine unresponsive" if self.process.is_alive() else "engine process died"
+            crashed = True
+
+        if reason is None:
+            return self.process, self.ring
+
+        if crashed:
+            now = time.monotonic()
+            if now < self._next_restart_at:
+                return self.process, self.ring # backing off
+            if self.heartbeat_age() is not None and now - self._started_at >= self.stable_after:
+                self.consecutive_failures = 0
+            self.consecutive_failures += 1
+            if self.consecutive_failures > self.max_restarts:
+                return self._give_up(reason)
+            delay = min(self.max_backoff, self.restart_backoff * 2 ** (self.consecutive_failures - 1))
+            self._next_restart_at = now + delay
+
+        if self.process is not None:
+            self.restarts += 1
+            print(f"[AudioEngine] Restarting: {reason}"
+                  + (f" (attempt {self.consecutive_failures}/{self.max_restarts})" if crashed else ""))
+        self.last_restart_reason = reason
+        self._shutdown()
+        self.process, self.ring = self._engine_factory(output_device_index=output_device_index, device_info=device_info)
+        self.process.start()
+        self.device_index = output_device_index
+        self._started_at = time.monotonic()
+        self.starts += 1
+        print(f"[AudioEngine] Started (PID: {self.process.pid}) for output_device_index={output_device_index}")
+        return self.process, self.ring
+
+    def _give_up(self, reason):
+        self.failed = True
+        self.last_restart_reason = reason
+        self._shutdown()
+        message = f"Audio engine failed {self.max_restarts + 1} times in a row ({reason}); not restarting"
+        print(f"[AudioEngine] {message}")
+        if self.on_failed:
+            try:
+                self.on_failed(message)
+            except Exception as e:
+                print(f"[AudioEngine] on_failed callback error: {e}")
+        return None, None
+
+    def heartbeat_age(self):
+        return self.ring.heartbeat_age() if self.ring else None
+
+    def is_healthy(self):
+        if self.process is None or not self.process.is_alive():
+            return False
+        age = self.heartbeat_age()
+        if age is None:
+            # Not beating yet: still starting up
+            return time.monotonic() - self._started_at < self.startup_timeout
+        return age < self.heartbeat_timeout
+
+    def get_stats(self):
+        age = self.heartbeat_age()
+        return {
+            "state": self.state,
+            "pid": self.process.pid if self.process else None,
+            "alive": bool(self.process and self.process.is_alive()),
+            "healthy": self.is_healthy(),
+            "heartbeat_age_ms": round(age * 1000, 1) if age is not None else None,
+            "output_device_index": self.device_index,
+            "starts": self.starts,
+            "restarts": self.restarts,
+            "last_restart_reason": self.last_restart_reason,
+            "consecutive_failures": self.consecutive_failures,
+            "next_restart_in_s": round(max(0.0, self._next_restart_at - time.monotonic()), 1) if self.state == "backoff" else None,
+        }
+
+    def _shutdown(self, timeout=0.5):
+        if self.process is not None:
+            if self.process.is_alive():
+                # Ask the engine to stop via the ring control channel, force terminate if it lingers
+                try: self.ring.stop()
+                except Exception: pass
+                self.process.join(timeout=timeout)
+                if self.process.is_alive():
+                    self.process.terminate()
+                    self.process.join(timeout=1.0)
+            self.process = None
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
+
+    def stop(self):
+        """Stops the engine for good (AudioLoop shutdown)."""
+        self._shutdown()
+        self.device_index = None
+        self.reset()
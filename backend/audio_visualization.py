@@ -0,0 +1,126 @@
+import asyncio
+import time
+
+from audio_analysis import envelope_bins, spectrum_bins
+
+DETAIL_LEVELS = ("off", "envelope", "fft", "pcm")
+DEFAULT_SUBSCRIPTION = {"level": "envelope", "bins": 64}
+MAX_BINS = 512
+
+
+class AudioVisualizationStream:
+    """
+    Coalesces model audio chunks and emits them to the frontend on a fixed frame cadence.
+    Each client opts in to a detail level:
+      - "envelope": `bins` peak amplitudes (uint8), the default and what the visualizer needs
+      - "fft":      `bins` spectrum bands (uint8)
+      - "pcm":      the raw coalesced 16-bit PCM for the frame
+      - "off":      nothing
+    Payloads are bytes, so Socket.IO sends them as binary attachments instead of JSON integer lists.
+    """
+    def __init__(self, sio, event_name="audio_data", fps=30, max_buffer_bytes=24000 * 2):
+        self.sio = sio
+        self.event_name = event_name
+        self.frame_interval = 1.0 / fps
+        self.max_buffer_bytes = max_buffer_bytes
+        self.subscriptions = {} # sid -> {"level": ..., "bins": ...}
+
+        self._buffer = bytearray()
+        self._has_data = asyncio.Event()
+        self._task = None
+
+        self.frames_sent = 0
+        self.chunks_coalesced = 0
+        self.bytes_sent = 0
+
+    # --- Subscriptions ---
+
+    def subscribe(self, sid, level=None, bins=None):
+        """Sets a client's detail level. Unknown levels raise ValueError."""
+        level = level or DEFAULT_SUBSCRIPTION["level"]
+        if level not in DETAIL_LEVELS:
+            raise ValueError(f"Unknown audio visualization level '{level}'. Expected one of {DETAIL_LEVELS}")
+        bins = int(bins or DEFAULT_SUBSCRIPTION["bins"])
+        bins = max(1, min(bins, MAX_BINS))
+        self.subscriptions[sid] = {"level": level, "bins": bins}
+        return self.subscriptions[sid]
+
+    def unsubscribe(self, sid):
+        self.subscriptions.pop(sid, None)
+
+    # --- Producer ---
+
+    def push(self, data_bytes):
+        """Called for every model audio chunk. Only appends to a buffer; emitting happens on the frame timer."""
+        if not self.subscriptions:
+            return
+        self._buffer += data_bytes
+        # Envelope/FFT only look at the latest audio; cap raw PCM backlog if the emitter falls behind
+        overflow = len(self._buffer) - self.max_buffer_bytes
+        if overflow > 0:
+            del self._buffer[:overflow + (overflow % 2)]
+        self.chunks_coalesced += 1
+        self._has_data.set()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._frame_loop())
+
+    # --- Frame loop ---
+
+    async def _frame_loop(self):
+        try:
+            while True:
+                await self._has_data.wait()
+                started = time.perf_counter()
+
+                self._has_data.clear()
+                frame = bytes(self._buffer)
+                self._buffer.clear()
+                if frame:
+                    await self._emit_frame(frame)
+
+                await asyncio.sleep(max(0.0, self.frame_interval - (time.perf_counter() - started)))
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            print(f"[AudioViz] Frame loop error: {e}")
+
+    def _build_payload(self, frame, level, bins):
+        if level == "envelope":
+            data = envelope_bins(frame, bins).tobytes()
+        elif level == "fft":
+            data = spectrum_bins(frame, bins).tobytes()
+        else:
+            data = frame
+        return {"level": level, "bins": bins if level != "pcm" else None, "data": data}
+
+    async def _emit_frame(self, frame):
+        # Compute each distinct (level, bins) payload once per frame, however many clients share it
+        payloads = {}
+        for sid, sub in list(self.subscriptions.items()):
+            key = (sub["level"], sub["bins"])
+            if key[0] == "off":
+                continue
+            if key not in payloads:
+                payloads[key] = self._build_payload(frame, *key)
+            payload = payloads[key]
+            try:
+                await self.sio.emit(self.event_name, payload, room=sid)
+                self.bytes_sent += len(payload["data"])
+            except Exception as e:
+                print(f"[AudioViz] Emit to {sid} failed: {e}")
+        if payloads:
+            self.frames_sent += 1
+
+    def get_stats(self):
+        return {
+            "subscribers": len(self.subscriptions),
+            "frames_sent": self.frames_sent,
+            "chunks_coalesced": self.chunks_coalesced,
+            "bytes_sent": self.bytes_sent,
+        }
+
+    def stop(self):
+        if self._task and not self._task.done():
+            self._task.cancel()
+        self._task = None
+        self._buffer.clear()
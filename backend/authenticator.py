@@ -8,26 +8,37 @@ import base64
 import numpy as np
 import urllib.request
 
+from face_tracking import FaceROITracker, PreviewThrottle, ReferenceMatrix, UnlockMetrics
+
 class FaceAuthenticator:
     # MediaPipe Face Landmarker model URL
     MODEL_URL = "https://storage.googleapis.com/mediapipe-models/face_landmarker/face_landmarker/float16/1/face_landmarker.task"
     MODEL_PATH = os.path.join(os.path.dirname(__file__), "face_landmarker.task")
     
-    def __init__(self, reference_image_path="reference.jpg", on_status_change=None, on_frame=None):
+    def __init__(self, reference_image_path="reference.jpg", on_status_change=None, on_frame=None,
+                 match_threshold=0.15, detect_width=320, preview_fps=10, preview_width=320):
         """
-        :param reference_image_path: Path to the user's reference photo.
+        :param reference_image_path: Path to the user's reference photo, a list of photos, or a directory of photos.
         :param on_status_change: Async callback(is_authenticated: bool).
         :param on_frame: Async callback(frame_data_b64: str) to send frames to frontend.
+        :param detect_width: Width frames are downscaled to when searching for a face (no track yet).
+        :param preview_fps: Maximum rate of preview frames sent to the frontend.
         """
         self.reference_image_path = reference_image_path
         self.on_status_change = on_status_change
         self.on_frame = on_frame
+        self.match_threshold = match_threshold
+        self.preview_width = preview_width
         
         self.authenticated = False
         self.running = False
-        self.reference_landmarks = None
+        self.references = ReferenceMatrix()
         self.landmarker = None
 
+        self.tracker = FaceROITracker(detect_width=detect_width)
+        self.preview = PreviewThrottle(preview_fps)
+        self.metrics = None # UnlockMetrics of the last authentication attempt
+
         self._ensure_model()
         self._init_landmarker()
         self._load_reference()
@@ -83,53 +94,57 @@ class FaceAuthenticator:
             print(f"[AUTH] [ERR] Landmark extraction failed: {e}")
             return None
 
-    def _compare_landmarks(self, landmarks1, landmarks2, threshold=0.15):
-        """
-        Compare two landmark vectors using cosine similarity.
-        Returns True if similarity is above (1 - threshold).
-        """
-        if landmarks1 is None or landmarks2 is None:
-            return False
-        
-        # Normalize vectors
-        norm1 = np.linalg.norm(landmarks1)
-        norm2 = np.linalg.norm(landmarks2)
-        
-        if norm1 == 0 or norm2 == 0:
-            return False
-        
-        # Cosine similarity
-        similarity = np.dot(landmarks1, landmarks2) / (norm1 * norm2)
-        
-        # Threshold check (similarity should be close to 1 for a match)
-        is_match = similarity > (1 - threshold)
-        if is_match:
-            print(f"[AUTH] Face match! Similarity: {similarity:.4f}")
-        return is_match
+    def _reference_paths(self):
+        paths = self.reference_image_path
+        if isinstance(paths, (list, tuple)):
+            return list(paths)
+        if os.path.isdir(paths):
+            return sorted(os.path.join(paths, f) for f in os.listdir(paths)
+                          if f.lower().endswith((".jpg", ".jpeg", ".png")))
+        return [paths]
 
     def _load_reference(self):
-        if not os.path.exists(self.reference_image_path):
-            print(f"[AUTH] [WARN] Reference file not found at {self.reference_image_path}. Authentication will fail.")
-            return
+        for path in self._reference_paths():
+            if not os.path.exists(path):
+                print(f"[AUTH] [WARN] Reference file not found at {path}. Authentication will fail.")
+                continue
 
-        try:
-            print("[AUTH] Loading reference image...")
-            img_bgr = cv2.imread(self.reference_image_path)
-            if img_bgr is None:
-                print(f"[AUTH] [ERR] Failed to read image file: {self.reference_image_path}")
-                return
-            
-            # Convert to RGB
-            image_rgb = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2RGB)
-            
-            self.reference_landmarks = self._extract_landmarks(image_rgb)
-            
-            if self.reference_landmarks is not None:
-                print("[AUTH] [OK] Reference face landmarks extracted successfully.")
-            else:
-                print("[AUTH] [ERR] No face found in reference image.")
-        except Exception as e:
-            print(f"[AUTH] [ERR] Error loading reference: {e}")
+            try:
+                print(f"[AUTH] Loading reference image {path}...")
+                img_bgr = cv2.imread(path)
+                if img_bgr is None:
+                    print(f"[AUTH] [ERR] Failed to read image file: {path}")
+                    continue
+                
+                # Convert to RGB
+                image_rgb = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2RGB)
+                
+                landmarks = self._extract_landmarks(image_rgb)
+                
+                if landmarks is not None and self.references.add(landmarks, label=os.path.basename(path)):
+                    print("[AUTH] [OK] Reference face landmarks extracted successfully.")
+                else:
+                    print(f"[AUTH] [ERR] No face found in reference image {path}.")
+            except Exception as e:
+                print(f"[AUTH] [ERR] Error loading reference: {e}")
+
+    def _match_references(self, landmarks):
+        """Compares live landmarks with every enrolled reference at once."""
+        similarity, label = self.references.best_match(landmarks)
+        is_match = label is not None and similarity > (1 - self.match_threshold)
+        if is_match:
+            print(f"[AUTH] Face match ({label})! Similarity: {similarity:.4f}")
+        return is_match
+
+    def get_stats(self):
+        return {
+            "authenticated": self.authenticated,
+            "references": len(self.references),
+            "last_attempt": self.metrics.to_dict() if self.metrics else None,
+            "tracking": self.tracker.get_stats(),
+            "preview_sent": self.preview.sent,
+            "preview_skipped": self.preview.skipped,
+        }
 
     async def start_authentication_loop(self):
         if self.authenticated:
@@ -138,7 +153,7 @@ class FaceAuthenticator:
                 await self.on_status_change(True)
             return
 
-        if self.reference_landmarks is None:
+        if not len(self.references):
              print("[AUTH] [ERR] Cannot start auth loop: No reference landmarks.")
              return
 
@@ -185,7 +200,9 @@ class FaceAuthenticator:
              self.running = False
              return
 
-        process_this_frame = True
+        metrics = self.metrics = UnlockMetrics()
+        metrics.start()
+        self.tracker.reset()
         
         while self.running and not self.authenticated:
             ret, frame = video_capture.read()
@@ -193,29 +210,29 @@ class FaceAuthenticator:
                 print("[AUTH] [ERR] Failed to read frame from camera loop.")
                 break
             
-            # Convert BGR to RGB
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            # Downscaled frame, or a crop around the face tracked from the previous frame
+            image_rgb, region = self.tracker.prepare(frame)
+            current_landmarks = self.tracker.update(self._extract_landmarks(image_rgb), region, frame.shape)
+            metrics.frame(current_landmarks is not None)
             
-            # Process every other frame for performance
-            if process_this_frame:
-                current_landmarks = self._extract_landmarks(rgb_frame)
-                
-                if self._compare_landmarks(self.reference_landmarks, current_landmarks):
-                    self.authenticated = True
-                    print("[AUTH] [OPEN] FACE RECOGNIZED! Access Granted.")
-                    if self.on_status_change:
-                        asyncio.run_coroutine_threadsafe(self.on_status_change(True), loop)
-                    self.running = False
-                    break
-
-            process_this_frame = not process_this_frame
-
-            # Send frame to frontend if callback exists
-            if self.on_frame:
-                small_frame = cv2.resize(frame, (0, 0), fx=0.5, fy=0.5)
-                _, buffer = cv2.imencode('.jpg', small_frame)
+            if current_landmarks is not None and self._match_references(current_landmarks):
+                self.authenticated = True
+                metrics.unlock()
+                print("[AUTH] [OPEN] FACE RECOGNIZED! Access Granted.")
+                if self.on_status_change:
+                    asyncio.run_coroutine_threadsafe(self.on_status_change(True), loop)
+                self.running = False
+                break
+
+            # Send frame to frontend if callback exists (rate-limited, small)
+            if self.on_frame and self.preview.ready():
+                scale = min(1.0, self.preview_width / frame.shape[1])
+                small_frame = cv2.resize(frame, (0, 0), fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+                _, buffer = cv2.imencode('.jpg', small_frame, [cv2.IMWRITE_JPEG_QUALITY, 70])
                 b64_str = base64.b64encode(buffer).decode('utf-8')
                 
                 asyncio.run_coroutine_threadsafe(self.on_frame(b64_str), loop)
 
+        metrics.finish()
+        print(f"[AUTH] Attempt stats: {metrics.to_dict()}")
         video_capture.release()
@@ -0,0 +1,151 @@
+import ast
+import hashlib
+import re
+from dataclasses import dataclass, asdict
+
+# Top-level declarations in JavaScript/TypeScript (column 0, optionally exported)
+JS_BOUNDARY = re.compile(
+    r"^(?:export\s+(?:default\s+)?)?(?:"
+    r"(?:async\s+)?function\b|class\b|interface\b|type\s+\w+\s*=|enum\b|"
+    r"(?:const|let|var)\s+\w+\s*(?::[^=]+)?=\s*(?:async\s*)?(?:\(|function\b|\w+\s*=>|React\.|styled))"
+)
+MD_HEADING = re.compile(r"^#{1,6}\s")
+
+
+@dataclass
+class Chunk:
+    """A span of a file: 1-based inclusive line range, byte range into the UTF-8 file and its text."""
+    text: str
+    start_line: int
+    end_line: int
+    start_byte: int
+    end_byte: int
+
+    @property
+    def sha256(self):
+        return hashlib.sha256(self.text.encode("utf-8")).hexdigest()
+
+    def to_dict(self) -> dict:
+        d = asdict(self)
+        d["sha256"] = self.sha256
+        return d
+
+
+def _split_lines(text):
+    """
+    Lines with their endings, split on "\n" only: "\r\n" stays inside one line (keeping byte offsets
+    exact for CRLF files) and form feeds or Unicode separators don't start a new line.
+    """
+    lines = [line + "\n" for line in text.split("\n")]
+    lines[-1] = lines[-1][:-1]
+    return lines if lines[-1] else lines[:-1]
+
+
+def _python_boundaries(text):
+    """
+    (top-level def/class starts, method starts) as 0-based line indexes, decorators included.
+    None if the file doesn't parse.
+    """
+    try:
+        tree = ast.parse(text)
+    except (SyntaxError, ValueError):
+        return None
+
+    def first_line(node):
+        return min([node.lineno] + [d.lineno for d in node.decorator_list]) - 1
+
+    primary, secondary = [], []
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            primary.append(first_line(node))
+            if isinstance(node, ast.ClassDef):
+                secondary.extend(first_line(child) for child in node.body
+                                 if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)))
+    return primary, secondary
+
+
+def _regex_boundaries(lines, pattern):
+    return [i for i, line in enumerate(lines) if pattern.match(line)]
+
+
+def boundaries_for(suffix, text, lines):
+    """
+    (primary, secondary) boundary line indexes for a file type. Primary boundaries always start a
+    new section; secondary ones (methods inside classes) are only used to split oversized sections.
+    """
+    suffix = suffix.lower()
+    if suffix == ".py":
+        parsed = _python_boundaries(text)
+        if parsed is not None:
+            return parsed
+        return _regex_boundaries(lines, re.compile(r"^(?:async\s+def|def|class)\b")), []
+    if suffix in (".js", ".jsx", ".ts", ".tsx", ".mjs", ".cjs"):
+        return _regex_boundaries(lines, JS_BOUNDARY), []
+    if suffix in (".md", ".markdown"):
+        return _regex_boundaries(lines, MD_HEADING), []
+    return [], []
+
+
+def _split(start, end, cuts):
+    """Splits [start, end) at the cut points inside it."""
+    points = [start] + sorted(c for c in set(cuts) if start < c < end) + [end]
+    return [(a, b) for a, b in zip(points, points[1:]) if a < b]
+
+
+def chunk_text(suffix, text, max_chars=4000, overlap_lines=3):
+    """
+    Splits a file into chunks along syntax boundaries: top-level functions/classes for Python
+    (methods when a class is too big), top-level declarations for JS/TS, headings for Markdown.
+    Adjacent small sections are merged up to max_chars; a section still larger than max_chars is
+    cut into line windows that overlap by `overlap_lines`, so no text falls between two chunks.
+    """
+    if not text.strip():
+        return []
+    lines = _split_lines(text)
+    # Prefix sums: byte offsets (for the stored range) and character counts (for sizing)
+    offsets, chars = [0], [0]
+    for line in lines:
+        offsets.append(offsets[-1] + len(line.encode("utf-8")))
+        chars.append(chars[-1] + len(line))
+
+    def size(a, b):
+        return chars[b] - chars[a]
+
+    primary, secondary = boundaries_for(suffix, text, lines)
+    sections = []
+    for a, b in _split(0, len(lines), primary):
+        if size(a, b) > max_chars and secondary:
+            sections.extend(_split(a, b, secondary))
+        else:
+            sections.append((a, b))
+
+    # Oversized sections -> overlapping line windows
+    spans = []
+    for a, b in sections:
+        if size(a, b) <= max_chars:
+            spans.append((a, b))
+            continue
+        start = a
+        while start < b:
+            end = start
+            while end < b and (end == start or size(start, end + 1) <= max_chars):
+                end += 1
+            spans.append((start, end))
+            if end >= b:
+                break
+            start = max(start + 1, end - overlap_lines)
+
+    # Merge small neighbours so tiny functions don't become one embedding each
+    merged = []
+    for a, b in spans:
+        if merged and merged[-1][1] == a and size(merged[-1][0], b) <= max_chars:
+            merged[-1] = (merged[-1][0], b)
+        else:
+            merged.append((a, b))
+
+    chunks = []
+    for a, b in merged:
+        body = "".join(lines[a:b])
+        if body.strip():
+            chunks.append(Chunk(text=body, start_line=a + 1, end_line=b, start_byte=offsets[a], end_byte=offsets[b]))
+    return chunks
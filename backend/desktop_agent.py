@@ -1,5 +1,5 @@
+import asyncio
 import mss
-import mss.tools
 import pywinauto
 import pyautogui
 from pywinauto import Desktop
@@ -8,6 +8,8 @@ import base64
 import json
 from datetime import datetime
 
+from frame_encoder import FrameEncoder, MIME_TYPES
+
 class DesktopAgent:
     """
     Agent for inspecting the Windows Desktop environment.
@@ -16,37 +18,46 @@ class DesktopAgent:
     - Active window detection
     - (Future) App launching/control
     """
-    def __init__(self):
+    def __init__(self, debug_screenshots=False):
         self.sct = mss.mss()
         self.desktop = Desktop(backend="uia")
+        # Opt-in: also write every capture to debug_screenshot.<ext> to verify what REX sees
+        self.debug_screenshots = debug_screenshots
+        self.encoder = FrameEncoder(max_size=None, format="png")
 
-    async def get_screenshot(self, monitor_index=1):
+    async def get_screenshot(self, monitor_index=1, format="png", quality=85, region=None, max_dimension=None, raw=False, debug=None):
         """
-        Captures a screenshot of the specified monitor.
-        Returns: Base64 encoded PNG string.
+        Captures a screenshot of the specified monitor (or of `region`).
+        Args:
+            format: "png", "jpeg" or "webp"; quality applies to jpeg/webp
+            region: optional {"left", "top", "width", "height"} in virtual-screen pixels
+            max_dimension: optional longest-side limit; the capture is downscaled before encoding
+            raw: return the encoded bytes instead of a base64 string (saves callers a decode)
+            debug: write the image to disk; defaults to self.debug_screenshots
+        Returns: {"mime_type": ..., "data": base64 str or bytes}, or None on failure.
         """
         try:
             # mss monitors are 1-indexed (0 is all monitors combined)
-            monitor = self.sct.monitors[monitor_index]
+            monitor = region or self.sct.monitors[monitor_index]
             
             # Capture
             sct_img = self.sct.grab(monitor)
             
-            # Convert to PNG bytes
-            png_bytes = mss.tools.to_png(sct_img.rgb, sct_img.size)
-            
-            # Encode to Base64
-            b64_str = base64.b64encode(png_bytes).decode('utf-8')
+            # Downscale + encode off the event loop, straight from the BGRA buffer
+            max_size = (max_dimension, max_dimension) if max_dimension else None
+            image_bytes = await asyncio.to_thread(self.encoder.encode, sct_img, max_size=max_size, quality=quality, format=format)
             
-            # DEBUG: Save to disk to verify what REX sees
-            try:
-                with open("debug_screenshot.png", "wb") as f:
-                    f.write(png_bytes)
-                print(f"[DesktopAgent] Saved debug screenshot to debug_screenshot.png")
-            except Exception as e:
-                print(f"[DesktopAgent] Failed to save debug screenshot: {e}")
+            if debug if debug is not None else self.debug_screenshots:
+                path = f"debug_screenshot.{format}"
+                try:
+                    with open(path, "wb") as f:
+                        f.write(image_bytes)
+                    print(f"[DesktopAgent] Saved debug screenshot to {path}")
+                except Exception as e:
+                    print(f"[DesktopAgent] Failed to save debug screenshot: {e}")
 
-            return {"mime_type": "image/png", "data": b64_str}
+            data = image_bytes if raw else base64.b64encode(image_bytes).decode('utf-8')
+            return {"mime_type": MIME_TYPES[format], "data": data}
             
         except Exception as e:
             print(f"[DesktopAgent] Screenshot error: {e}")
@@ -0,0 +1,131 @@
+import hashlib
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+
+def content_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Content-addressed embedding store: vectors keyed by (model, task type, sha256 of the exact text
+    embedded). Nothing in the key depends on a path, project or mtime, so a renamed, copied, touched
+    or checked-out-again file costs a lookup instead of an API call, and identical files in different
+    projects share one entry. Lives in its own table of the semantic search database.
+    Holds at most `max_rows` vectors; beyond that the least recently used ones are evicted.
+    Methods are blocking (SQLite); call them via asyncio.to_thread from the event loop.
+    """
+    LOOKUP_CHUNK = 500 # host parameters per SELECT
+    LEGACY_TASK_TYPE = "RETRIEVAL_DOCUMENT" # what every row was embedded with before the key had a task type
+
+    def __init__(self, db_path, max_rows=100_000):
+        self.db_path = db_path
+        self.max_rows = max_rows
+        self.hits = 0
+        self.misses = 0
+        self.stored = 0
+        self.evicted = 0
+        self._lock = threading.Lock()
+        self._init_db()
+
+    def _init_db(self):
+        conn = sqlite3.connect(self.db_path)
+        with conn:
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(embedding_cache)")]
+            if columns and "task_type" not in columns:
+                print("[SemanticSearch] Migrating embedding cache: adding task type and last use to the key")
+                conn.execute("ALTER TABLE embedding_cache RENAME TO embedding_cache_old")
+            conn.execute('''CREATE TABLE IF NOT EXISTS embedding_cache
+                            (model TEXT,
+                             task_type TEXT,
+                             hash TEXT,
+                             embedding BLOB,
+                             last_used REAL,
+                             PRIMARY KEY (model, task_type, hash)) WITHOUT ROWID''')
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_embedding_cache_last_used ON embedding_cache(last_used)")
+            if columns and "task_type" not in columns:
+                conn.execute("""INSERT INTO embedding_cache (model, task_type, hash, embedding, last_used)
+                                SELECT model, ?, hash, embedding, ? FROM embedding_cache_old""",
+                             (self.LEGACY_TASK_TYPE, time.time()))
+                conn.execute("DROP TABLE embedding_cache_old")
+        conn.close()
+        self.prune()
+
+    def seed(self, model, task_type, rows):
+        """Adds (hash, embedding BLOB) rows already embedded with `model` (e.g. existing chunks) without overwriting."""
+        now = time.time()
+        conn = sqlite3.connect(self.db_path)
+        with conn:
+            conn.executemany("""INSERT OR IGNORE INTO embedding_cache (model, task_type, hash, embedding, last_used)
+                                VALUES (?, ?, ?, ?, ?)""",
+                             ((model, task_type, h, blob, now) for h, blob in rows))
+        conn.close()
+        self.prune()
+
+    def get_many(self, model, task_type, hashes):
+        """float32 vectors (or None for misses) in the order of `hashes`; hits count as a use for eviction."""
+        hashes = list(hashes)
+        found = {}
+        now = time.time()
+        conn = sqlite3.connect(self.db_path)
+        unique = list(set(hashes))
+        with conn:
+            for i in range(0, len(unique), self.LOOKUP_CHUNK):
+                part = unique[i:i + self.LOOKUP_CHUNK]
+                where = f"model = ? AND task_type = ? AND hash IN ({','.join('?' * len(part))})"
+                cursor = conn.execute(f"SELECT hash, embedding FROM embedding_cache WHERE {where}", [model, task_type, *part])
+                hits = {h: np.frombuffer(blob, dtype=np.float32) for h, blob in cursor}
+                if hits:
+                    conn.execute(f"UPDATE embedding_cache SET last_used = ? WHERE {where}", [now, model, task_type, *part])
+                found.update(hits)
+        conn.close()
+        vectors = [found.get(h) for h in hashes]
+        with self._lock:
+            hit = sum(v is not None for v in vectors)
+            self.hits += hit
+            self.misses += len(vectors) - hit
+        return vectors
+
+    def put_many(self, model, task_type, items):
+        """Stores (hash, vector) pairs, then evicts down to max_rows."""
+        now = time.time()
+        rows = [(model, task_type, h, np.asarray(v, dtype=np.float32).tobytes(), now) for h, v in items]
+        if not rows:
+            return
+        conn = sqlite3.connect(self.db_path)
+        with conn:
+            conn.executemany("""INSERT OR REPLACE INTO embedding_cache (model, task_type, hash, embedding, last_used)
+                                VALUES (?, ?, ?, ?, ?)""", rows)
+        conn.close()
+        with self._lock:
+            self.stored += len(rows)
+        self.prune()
+
+    def prune(self):
+        """Deletes the least recently used rows beyond max_rows; returns how many were removed."""
+        conn = sqlite3.connect(self.db_path)
+        with conn:
+            excess = conn.execute("SELECT COUNT(*) FROM embedding_cache").fetchone()[0] - self.max_rows
+            if excess > 0:
+                conn.execute("""DELETE FROM embedding_cache WHERE (model, task_type, hash) IN
+                                (SELECT model, task_type, hash FROM embedding_cache ORDER BY last_used LIMIT ?)""", (excess,))
+        conn.close()
+        if excess <= 0:
+            return 0
+        with self._lock:
+            self.evicted += excess
+        return excess
+
+    def get_stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            "stored": self.stored,
+            "evicted": self.evicted,
+        }
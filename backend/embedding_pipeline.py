@@ -0,0 +1,263 @@
+import asyncio
+import random
+import time
+
+from google.genai import types
+
+from embedding_cache import content_hash
+
+
+async def _cancel_all(tasks):
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+class EmbeddingBatcher:
+    """
+    Multi-input embed_content calls under a concurrency limit.
+    embed(texts) splits into requests of at most `batch_size` texts, runs at most `max_concurrency`
+    of them at once (each on a worker thread, the SDK call is blocking) and retries failures with
+    exponential backoff plus jitter. A batch that still fails yields None for each of its texts.
+    With an EmbeddingCache, texts already embedded by this model and task type are served from it,
+    repeated texts within one call are requested once, and new vectors are added to it.
+    """
+    def __init__(self, client, model="models/text-embedding-004", task_type="RETRIEVAL_DOCUMENT",
+                 batch_size=100, max_concurrency=4, max_retries=4, base_delay=1.0, max_delay=30.0, cache=None):
+        self.client = client
+        self.model = model
+        self.task_type = task_type
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.cache = cache
+        self._semaphore = None
+        self._loop = None
+
+        self.requests = 0
+        self.texts = 0
+        self.retries = 0
+        self.failures = 0
+
+    def _call(self, texts):
+        result = self.client.models.embed_content(
+            model=self.model,
+            contents=texts,
+            config=types.EmbedContentConfig(task_type=self.task_type)
+        )
+        return [e.values for e in result.embeddings]
+
+    def _limit(self):
+        # The limit is shared by every caller on the loop (one per running loop)
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def _embed_batch(self, texts, max_retries):
+        async with self._limit():
+            for attempt in range(max_retries + 1):
+                try:
+                    self.requests += 1
+                    vectors = await asyncio.to_thread(self._call, texts)
+                    if len(vectors) != len(texts):
+                        raise RuntimeError(f"Expected {len(texts)} embeddings, got {len(vectors)}")
+                    self.texts += len(texts)
+                    return vectors
+                except Exception as e:
+                    if attempt == max_retries:
+                        self.failures += 1
+                        print(f"[SemanticSearch] Embedding batch failed after {attempt + 1} attempts: {e}")
+                        return [None] * len(texts)
+                    self.retries += 1
+                    delay = min(self.max_delay, self.base_delay * 2 ** attempt) * (0.5 + random.random() / 2)
+                    print(f"[SemanticSearch] Embedding batch error ({e}), retrying in {delay:.1f}s")
+                    await asyncio.sleep(delay)
+
+    async def _embed_uncached(self, texts, max_retries):
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        results = await asyncio.gather(*(self._embed_batch(batch, max_retries) for batch in batches))
+        return [vector for batch in results for vector in batch]
+
+    async def embed(self, texts, max_retries=None, cached=True):
+        """
+        Vectors (float sequences, or None on failure) in the order of `texts`.
+        max_retries overrides the default, e.g. 0 for an interactive query that shouldn't wait out backoff.
+        cached=False bypasses the cache, for one-off texts such as search queries.
+        """
+        texts = list(texts)
+        max_retries = self.max_retries if max_retries is None else max_retries
+        if self.cache is None or not cached:
+            return await self._embed_uncached(texts, max_retries)
+
+        hashes = [content_hash(t) for t in texts]
+        vectors = await asyncio.to_thread(self.cache.get_many, self.model, self.task_type, hashes)
+        missing = {} # hash -> text, one request per distinct text
+        for h, text, vector in zip(hashes, texts, vectors):
+            if vector is None:
+                missing.setdefault(h, text)
+        if not missing:
+            return vectors
+
+        fresh = dict(zip(missing, await self._embed_uncached(list(missing.values()), max_retries)))
+        fresh = {h: v for h, v in fresh.items() if v is not None}
+        await asyncio.to_thread(self.cache.put_many, self.model, self.task_type, fresh.items())
+        return [fresh.get(h) if v is None else v for h, v in zip(hashes, vectors)]
+
+    def get_stats(self):
+        return {
+            "requests": self.requests,
+            "texts": self.texts,
+            "retries": self.retries,
+            "failures": self.failures,
+            "cache": self.cache.get_stats() if self.cache is not None else None,
+        }
+
+
+class IndexingPipeline:
+    """
+    Three-stage indexing run: producer -> batcher -> writer, joined by bounded queues.
+      - produce: async iterator of items, each a dict with at least a "text" key
+      - the batcher collects `batch_size` items (or whatever is left at the end) and embeds them
+        through the EmbeddingBatcher, keeping several requests in flight
+      - write(rows) is awaited with up to `commit_every` (item, vector) pairs and must store them in
+        one transaction (off the event loop, e.g. via asyncio.to_thread)
+    on_progress (async or sync) receives get_progress() after every written transaction.
+    """
+    def __init__(self, embedder, produce, write, commit_every=64, on_progress=None, queue_size=512):
+        self.embedder = embedder
+        self.produce = produce
+        self.write = write
+        self.commit_every = commit_every
+        self.on_progress = on_progress
+        self.queue_size = queue_size
+
+        self.started = None
+        self.finished = None
+        self.produced = 0
+        self.embedded = 0
+        self.failed = 0
+        self.written = 0
+        # Busy seconds per stage; embedding runs concurrently, so its span (first start to last end) is used
+        self.stage_s = {"produce": 0.0, "embed": 0.0, "write": 0.0}
+        self._embed_span = [None, None]
+
+    async def _producer(self, out):
+        started = time.perf_counter()
+        try:
+            async for item in self.produce:
+                self.produced += 1
+                await out.put(item)
+        finally:
+            self.stage_s["produce"] += time.perf_counter() - started
+        await out.put(None)
+
+    async def _embed_batch(self, batch, out, slots):
+        try:
+            if self._embed_span[0] is None:
+                self._embed_span[0] = time.perf_counter()
+            vectors = await self.embedder.embed([item["text"] for item in batch])
+            self._embed_span[1] = time.perf_counter()
+            self.stage_s["embed"] = self._embed_span[1] - self._embed_span[0]
+            for item, vector in zip(batch, vectors):
+                if vector is None:
+                    self.failed += 1
+                else:
+                    self.embedded += 1
+                    await out.put((item, vector))
+        finally:
+            slots.release()
+
+    async def _batcher(self, inp, out):
+        batch_size = self.embedder.batch_size
+        # One slot per concurrent request the embedder allows; beyond that, reading input waits
+        slots = asyncio.Semaphore(self.embedder.max_concurrency)
+        tasks = []
+        batch = []
+        try:
+            while True:
+                item = await inp.get()
+                if item is not None:
+                    batch.append(item)
+                if batch and (len(batch) >= batch_size or item is None):
+                    await slots.acquire()
+                    tasks.append(asyncio.create_task(self._embed_batch(batch, out, slots)))
+                    batch = []
+                if item is None:
+                    break
+            await asyncio.gather(*tasks)
+        except BaseException:
+            await _cancel_all(tasks)
+            raise
+        await out.put(None)
+
+    async def _flush(self, rows):
+        started = time.perf_counter()
+        await self.write(rows)
+        self.stage_s["write"] += time.perf_counter() - started
+        self.written += len(rows)
+        await self._report()
+
+    async def _writer(self, inp):
+        rows = []
+        while True:
+            row = await inp.get()
+            if row is None:
+                break
+            rows.append(row)
+            if len(rows) >= self.commit_every:
+                await self._flush(rows)
+                rows = []
+        if rows:
+            await self._flush(rows)
+
+    async def _report(self):
+        if self.on_progress:
+            result = self.on_progress(self.get_progress())
+            if asyncio.iscoroutine(result):
+                await result
+
+    async def run(self):
+        self.started = time.perf_counter()
+        to_embed = asyncio.Queue(self.queue_size)
+        to_write = asyncio.Queue(self.queue_size)
+        stages = [
+            asyncio.create_task(self._producer(to_embed)),
+            asyncio.create_task(self._batcher(to_embed, to_write)),
+            asyncio.create_task(self._writer(to_write)),
+        ]
+        try:
+            await asyncio.gather(*stages)
+        except BaseException:
+            # A failed stage stops draining its queue; the others would block on it forever
+            await _cancel_all(stages)
+            raise
+        self.finished = time.perf_counter()
+        await self._report()
+        return self.get_progress()
+
+    def get_progress(self):
+        elapsed = (self.finished or time.perf_counter()) - self.started if self.started else 0.0
+
+        def rate(count, stage):
+            seconds = self.stage_s[stage]
+            return round(count / seconds, 1) if seconds else None
+
+        return {
+            "done": self.finished is not None,
+            "elapsed_s": round(elapsed, 2),
+            "produced": self.produced,
+            "embedded": self.embedded,
+            "failed": self.failed,
+            "written": self.written,
+            "throughput_per_s": {
+                "produce": rate(self.produced, "produce"),
+                "embed": rate(self.embedded, "embed"),
+                "write": rate(self.written, "write"),
+                "overall": round(self.written / elapsed, 1) if elapsed else None,
+            },
+            "embedder": self.embedder.get_stats(),
+        }
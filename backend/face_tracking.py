@@ -0,0 +1,186 @@
+import time
+
+import cv2
+import numpy as np
+
+
+class ReferenceMatrix:
+    """
+    Enrolled face references as one row-normalized float32 matrix.
+    Matching a live landmark vector against every reference is a single matrix-vector product
+    (cosine similarity per row) instead of a Python loop of np.dot calls.
+    """
+    def __init__(self):
+        self._matrix = None # (n_references, n_features), rows L2-normalized
+        self.labels = []
+
+    def __len__(self):
+        return len(self.labels)
+
+    def add(self, landmarks, label=None):
+        vector = np.asarray(landmarks, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        if norm == 0:
+            return False
+        row = (vector / norm)[None, :]
+        if self._matrix is not None and self._matrix.shape[1] != row.shape[1]:
+            raise ValueError(f"Reference has {row.shape[1]} features, expected {self._matrix.shape[1]}")
+        self._matrix = row if self._matrix is None else np.vstack([self._matrix, row])
+        self.labels.append(label if label is not None else len(self.labels))
+        return True
+
+    def similarities(self, landmarks):
+        """Cosine similarity of `landmarks` to every reference (empty if none enrolled or zero vector)."""
+        if self._matrix is None or landmarks is None:
+            return np.empty(0, dtype=np.float32)
+        vector = np.asarray(landmarks, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        if norm == 0:
+            return np.empty(0, dtype=np.float32)
+        return self._matrix @ (vector / norm)
+
+    def best_match(self, landmarks):
+        """(similarity, label) of the closest reference, or (0.0, None)."""
+        sims = self.similarities(landmarks)
+        if sims.size == 0:
+            return 0.0, None
+        best = int(np.argmax(sims))
+        return float(sims[best]), self.labels[best]
+
+
+class FaceROITracker:
+    """
+    Chooses what the landmarker looks at.
+    Without a track, the whole frame is downscaled to `detect_width`. After a detection, the next
+    frames are cropped to the face's bounding box (plus `margin`) from the full-resolution frame
+    and scaled to at most `roi_size`, which is both cheaper and sharper than the whole frame.
+    Landmarks found in a downscaled frame or crop are mapped back to full-frame normalized
+    coordinates, so references compare the same way whichever path found the face.
+    """
+    def __init__(self, detect_width=320, roi_size=256, margin=0.3):
+        self.detect_width = detect_width
+        self.roi_size = roi_size
+        self.margin = margin
+        self.roi = None # (x0, y0, x1, y1) in full-frame pixels
+
+        self.full_detections = 0
+        self.roi_detections = 0
+        self.roi_losses = 0
+
+    def prepare(self, frame_bgr):
+        """Returns (rgb image for the landmarker, region (x0, y0, x1, y1) of the frame it covers)."""
+        height, width = frame_bgr.shape[:2]
+        region = self.roi or (0, 0, width, height)
+        x0, y0, x1, y1 = region
+        crop = frame_bgr[y0:y1, x0:x1]
+        # Whole frames are limited by width, face crops by their longest side
+        limit, extent = (self.roi_size, max(crop.shape[:2])) if self.roi else (self.detect_width, crop.shape[1])
+        scale = min(1.0, limit / max(extent, 1))
+        if scale < 1.0:
+            crop = cv2.resize(crop, (max(1, round(crop.shape[1] * scale)), max(1, round(crop.shape[0] * scale))),
+                              interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(crop, cv2.COLOR_BGR2RGB), region
+
+    def update(self, landmarks, region, frame_shape):
+        """
+        Takes flattened (x, y, z) landmarks normalized to the prepared image (or None) and returns
+        them normalized to the full frame. Updates the ROI for the next frame.
+        """
+        tracked = self.roi is not None
+        if landmarks is None:
+            if tracked:
+                self.roi_losses += 1
+            self.roi = None
+            return None
+        if tracked:
+            self.roi_detections += 1
+        else:
+            self.full_detections += 1
+
+        height, width = frame_shape[:2]
+        x0, y0, x1, y1 = region
+        coords = np.asarray(landmarks, dtype=np.float32).reshape(-1, 3).copy()
+        coords[:, 0] = (x0 + coords[:, 0] * (x1 - x0)) / width
+        coords[:, 1] = (y0 + coords[:, 1] * (y1 - y0)) / height
+        coords[:, 2] = coords[:, 2] * (x1 - x0) / width
+
+        xs, ys = coords[:, 0] * width, coords[:, 1] * height
+        bw, bh = xs.max() - xs.min(), ys.max() - ys.min()
+        size = max(bw, bh) * (1 + 2 * self.margin)
+        cx, cy = (xs.max() + xs.min()) / 2, (ys.max() + ys.min()) / 2
+        roi = (max(0, int(cx - size / 2)), max(0, int(cy - size / 2)),
+               min(width, int(cx + size / 2)), min(height, int(cy + size / 2)))
+        self.roi = roi if roi[2] - roi[0] > 8 and roi[3] - roi[1] > 8 else None
+        return coords.ravel()
+
+    def reset(self):
+        self.roi = None
+
+    def get_stats(self):
+        return {
+            "full_detections": self.full_detections,
+            "roi_detections": self.roi_detections,
+            "roi_losses": self.roi_losses,
+        }
+
+
+class PreviewThrottle:
+    """Lets at most `fps` preview frames through per second."""
+    def __init__(self, fps=10):
+        self.interval = 1.0 / fps if fps else 0.0
+        self._next = 0.0
+        self.sent = 0
+        self.skipped = 0
+
+    def ready(self, now=None):
+        now = time.monotonic() if now is None else now
+        if now >= self._next:
+            self._next = now + self.interval
+            self.sent += 1
+            return True
+        self.skipped += 1
+        return False
+
+
+class UnlockMetrics:
+    """
+    Wall time to first face and to unlock, and the CPU the auth thread used meanwhile.
+    start() and finish() must be called on the thread doing the work (thread_time is per thread).
+    """
+    def __init__(self):
+        self.started = None
+        self.first_face = None
+        self.unlocked = None
+        self.finished = None
+        self.frames = 0
+        self._cpu_start = None
+        self.cpu_s = 0.0
+
+    def start(self):
+        self.started = time.monotonic()
+        self._cpu_start = time.thread_time()
+
+    def frame(self, face_found):
+        self.frames += 1
+        if face_found and self.first_face is None:
+            self.first_face = time.monotonic()
+
+    def unlock(self):
+        self.unlocked = time.monotonic()
+
+    def finish(self):
+        self.finished = time.monotonic()
+        if self._cpu_start is not None:
+            self.cpu_s = time.thread_time() - self._cpu_start
+
+    def to_dict(self):
+        def ms(t):
+            return round((t - self.started) * 1000, 1) if t is not None and self.started is not None else None
+        wall = (self.finished - self.started) if self.finished and self.started else None
+        return {
+            "time_to_first_face_ms": ms(self.first_face),
+            "time_to_unlock_ms": ms(self.unlocked),
+            "frames": self.frames,
+            "cpu_s": round(self.cpu_s, 3),
+            "cpu_percent": round(100 * self.cpu_s / wall, 1) if wall else None,
+        }
@@ -0,0 +1,157 @@
+import os
+import sqlite3
+import struct
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from frame_encoder import FrameEncoder
+
+# Per-record header: capture timestamp, payload length. Makes a segment readable without the index.
+RECORD_HEADER = struct.Struct("<dI")
+
+
+class FrameArchive:
+    """
+    Append-only, time-segmented frame storage.
+    Frames land in one file per `segment_seconds` window (hourly by default) and are located through
+    an (segment_id, offset, length) index in SQLite, so the disk holds a handful of files instead of
+    one JPEG per capture. Retention drops whole segments: one DELETE and one unlink per expired hour.
+    Frames wider/taller than `max_dimension` are re-encoded smaller before archiving; the full-size
+    capture is only needed for indexing, which happens before the frame is stored.
+    """
+    def __init__(self, db_path, root_dir, segment_seconds=3600, max_dimension=1280, quality=60):
+        self.db_path = db_path
+        self.root_dir = root_dir
+        self.segment_seconds = segment_seconds
+        self.max_dimension = max_dimension
+        self.quality = quality
+        self.encoder = FrameEncoder(max_size=(max_dimension, max_dimension) if max_dimension else None, quality=quality)
+
+        self._lock = threading.Lock()
+        self._current = None # (segment start, segment_id, path)
+
+        self.frames_archived = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.segments_dropped = 0
+
+        os.makedirs(self.root_dir, exist_ok=True)
+        self._init_db()
+
+    def _init_db(self):
+        conn = sqlite3.connect(self.db_path)
+        c = conn.cursor()
+        c.execute('''CREATE TABLE IF NOT EXISTS frame_segments
+                     (id INTEGER PRIMARY KEY, start_time REAL, path TEXT, frames INTEGER DEFAULT 0, bytes INTEGER DEFAULT 0)''')
+        c.execute('''CREATE UNIQUE INDEX IF NOT EXISTS idx_segment_start ON frame_segments(start_time)''')
+        conn.commit()
+        conn.close()
+
+    def segment_start(self, timestamp):
+        return timestamp - (timestamp % self.segment_seconds)
+
+    def _segment_for(self, c, timestamp):
+        start = self.segment_start(timestamp)
+        if self._current and self._current[0] == start:
+            return self._current
+        c.execute("SELECT id, path FROM frame_segments WHERE start_time = ?", (start,))
+        row = c.fetchone()
+        if row:
+            segment_id, path = row
+        else:
+            name = time.strftime("segment_%Y%m%d_%H%M%S.frames", time.localtime(start))
+            path = os.path.join(self.root_dir, name)
+            c.execute("INSERT INTO frame_segments (start_time, path) VALUES (?, ?)", (start, path))
+            segment_id = c.lastrowid
+        self._current = (start, segment_id, path)
+        return self._current
+
+    def _shrink(self, data):
+        """Re-encodes a JPEG that exceeds max_dimension; smaller frames are archived byte-for-byte."""
+        if not self.max_dimension:
+            return data
+        frame = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if frame is None or max(frame.shape[:2]) <= self.max_dimension:
+            return data
+        return self.encoder.encode(frame)
+
+    def append(self, timestamp, data):
+        """Stores an encoded frame. Returns its (segment_id, offset, length) locator."""
+        stored = self._shrink(data)
+        with self._lock:
+            conn = sqlite3.connect(self.db_path)
+            c = conn.cursor()
+            _, segment_id, path = self._segment_for(c, timestamp)
+            with open(path, "ab") as f:
+                f.write(RECORD_HEADER.pack(timestamp, len(stored)))
+                offset = f.tell()
+                f.write(stored)
+            c.execute("UPDATE frame_segments SET frames = frames + 1, bytes = bytes + ? WHERE id = ?",
+                      (RECORD_HEADER.size + len(stored), segment_id))
+            conn.commit()
+            conn.close()
+
+        self.frames_archived += 1
+        self.bytes_in += len(data)
+        self.bytes_out += len(stored)
+        return segment_id, offset, len(stored)
+
+    def read(self, segment_id, offset, length):
+        """Encoded frame bytes at a locator, or None if its segment has expired."""
+        conn = sqlite3.connect(self.db_path)
+        c = conn.cursor()
+        c.execute("SELECT path FROM frame_segments WHERE id = ?", (segment_id,))
+        row = c.fetchone()
+        conn.close()
+        if not row or not os.path.exists(row[0]):
+            return None
+        with open(row[0], "rb") as f:
+            f.seek(offset)
+            return f.read(length)
+
+    def expired_segments(self, cutoff):
+        """[(segment_id, path)] of segments that ended before `cutoff`."""
+        conn = sqlite3.connect(self.db_path)
+        c = conn.cursor()
+        c.execute("SELECT id, path FROM frame_segments WHERE start_time + ? <= ?", (self.segment_seconds, cutoff))
+        rows = c.fetchall()
+        conn.close()
+        return rows
+
+    def drop_segments(self, segments):
+        """Deletes the given segments' files and index rows (the frames' own rows are the caller's)."""
+        if not segments:
+            return 0
+        with self._lock:
+            conn = sqlite3.connect(self.db_path)
+            c = conn.cursor()
+            c.executemany("DELETE FROM frame_segments WHERE id = ?", [(segment_id,) for segment_id, _ in segments])
+            conn.commit()
+            conn.close()
+            for segment_id, path in segments:
+                if self._current and self._current[1] == segment_id:
+                    self._current = None
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+        self.segments_dropped += len(segments)
+        return len(segments)
+
+    def get_stats(self):
+        conn = sqlite3.connect(self.db_path)
+        c = conn.cursor()
+        c.execute("SELECT COUNT(*), COALESCE(SUM(frames), 0), COALESCE(SUM(bytes), 0) FROM frame_segments")
+        segments, frames, size = c.fetchone()
+        conn.close()
+        return {
+            "segments": segments,
+            "frames": frames,
+            "bytes_on_disk": size,
+            "frames_archived": self.frames_archived,
+            "compression_ratio": round(self.bytes_out / self.bytes_in, 3) if self.bytes_in else 1.0,
+            "segments_dropped": self.segments_dropped,
+        }
@@ -0,0 +1,184 @@
+import asyncio
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+
+class BackgroundFrameCapture:
+    """
+    Capture worker thread with a double-buffered latest-frame slot.
+    The thread grabs, change-gates and encodes frames on its own schedule and publishes each
+    frame that passes by swapping a single reference, so consumers never wait on capture.
+    Its rate adapts to demand:
+      - user speaking (is_active())     -> active_interval
+      - screen changing (gate passed)   -> changing_interval
+      - unchanged                       -> backs off by `backoff` per frame up to idle_interval
+      - paused (is_paused())            -> no captures at all
+    The capture rate only bounds how fresh the newest frame is; forward() sends at its own
+    (lower) rate, so a fast capture rate doesn't mean more frames sent to the model.
+    """
+    def __init__(self, grab, gate, encoder, is_active=None, is_paused=None, on_frame=None, on_stop=None,
+                 active_interval=0.25, changing_interval=0.5, idle_interval=4.0, backoff=1.5, age_window=256):
+        self.grab = grab
+        self.gate = gate
+        self.encoder = encoder
+        self.is_active = is_active or (lambda: False)
+        self.is_paused = is_paused or (lambda: False)
+        # Called on the capture thread for each published frame (e.g. to wake an asyncio consumer)
+        self.on_frame = on_frame
+        # Called on the capture thread as it exits, to release handles bound to that thread (mss, camera)
+        self.on_stop = on_stop
+
+        self.active_interval = active_interval
+        self.changing_interval = changing_interval
+        self.idle_interval = idle_interval
+        self.backoff = backoff
+        self.interval = changing_interval
+
+        self._slot = None # (seq, captured_at, payload); replaced whole, never mutated
+        self._seq = 0
+        # Last successful grab, changed or not: an unchanged grab confirms the published frame is current
+        self._checked_at = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.captures = 0
+        self.capture_errors = 0
+        self.frames_sent = 0
+        self._ages = deque(maxlen=age_window)
+
+    # --- Lifecycle ---
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="FrameCapture", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=1.0):
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+    def wake(self):
+        """Capture now and switch to the fast rate (e.g. on VAD onset)."""
+        self.interval = self.active_interval
+        self._wake.set()
+
+    # --- Worker ---
+
+    def _run(self):
+        try:
+            self._loop()
+        finally:
+            if self.on_stop:
+                try:
+                    self.on_stop()
+                except Exception as e:
+                    print(f"[FrameCapture] Cleanup failed: {e}")
+
+    def _loop(self):
+        while not self._stop.is_set():
+            if self.is_paused():
+                self._wake.wait(0.5)
+                self._wake.clear()
+                continue
+
+            started = time.monotonic()
+            try:
+                self.capture_once()
+            except Exception as e:
+                self.capture_errors += 1
+                print(f"[FrameCapture] Capture failed: {e}")
+
+            elapsed = time.monotonic() - started
+            self._wake.wait(max(0.0, self.interval - elapsed))
+            self._wake.clear()
+
+    def capture_once(self):
+        """One grab -> gate -> encode -> publish step. Returns True if a frame was published."""
+        frame = self.grab()
+        self.captures += 1
+        if frame is None:
+            return False
+        captured_at = time.monotonic()
+        self._checked_at = captured_at
+        changed = self.gate.should_send(frame)
+        self._adapt(changed)
+        if not changed:
+            return False
+        payload = self.encoder.encode_payload(frame)
+        self._seq += 1
+        self._slot = (self._seq, captured_at, payload)
+        if self.on_frame:
+            self.on_frame(self._seq)
+        return True
+
+    def _adapt(self, changed):
+        if self.is_active():
+            self.interval = self.active_interval
+        elif changed:
+            self.interval = self.changing_interval
+        else:
+            self.interval = min(self.idle_interval, max(self.interval, self.active_interval) * self.backoff)
+
+    # --- Consumers ---
+
+    def latest(self):
+        """(seq, captured_at, payload) of the newest published frame, or None. Never blocks."""
+        return self._slot
+
+    def record_use(self):
+        """
+        Notes that the newest frame is what the model sees right now; returns its age in seconds,
+        i.e. how long ago the screen was last checked to still match it.
+        """
+        checked_at = self._checked_at
+        if self._slot is None or checked_at is None:
+            return None
+        age = time.monotonic() - checked_at
+        self._ages.append(age)
+        return age
+
+    async def forward(self, new_frame, send, min_interval=1.0, should_stop=None):
+        """
+        Consumer loop: waits on `new_frame` (an asyncio.Event set from on_frame) and awaits
+        send(payload) with the newest frame, at most once per min_interval whatever the capture
+        rate; frames published in between collapse into the newest one.
+        """
+        loop = asyncio.get_running_loop()
+        should_stop = should_stop or (lambda: False)
+        sent_seq = 0
+        sent_at = None
+        while not should_stop():
+            await new_frame.wait()
+            if sent_at is not None:
+                delay = sent_at + min_interval - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            new_frame.clear()
+            slot = self._slot
+            if slot is not None and slot[0] != sent_seq:
+                sent_seq = slot[0]
+                sent_at = loop.time()
+                self.frames_sent += 1
+                await send(slot[2])
+
+    def get_stats(self):
+        ages = np.array(list(self._ages)) * 1000 if self._ages else None
+        return {
+            "captures": self.captures,
+            "frames_published": self._seq,
+            "frames_sent": self.frames_sent,
+            "capture_errors": self.capture_errors,
+            "interval_s": round(self.interval, 2),
+            "frame_age_p50_ms": round(float(np.percentile(ages, 50)), 1) if ages is not None else None,
+            "frame_age_p95_ms": round(float(np.percentile(ages, 95)), 1) if ages is not None else None,
+            "gate": self.gate.get_stats(),
+        }
@@ -0,0 +1,117 @@
+import base64
+import threading
+import time
+
+import cv2
+import numpy as np
+
+MIME_TYPES = {"jpeg": "image/jpeg", "png": "image/png", "webp": "image/webp"}
+
+
+class FrameEncoder:
+    """
+    Single-pass encoder for screen and camera frames.
+    Works directly on the capture buffer (mss BGRA or OpenCV BGR): downscale first, drop alpha on
+    the already-small image, then cv2.imencode. Downscaling halves with cv2.resize(INTER_AREA)
+    (OpenCV's fast integer-factor path) until less than 2x remains, then finishes bilinearly;
+    a single fractional INTER_AREA pass is several times slower. Every intermediate target is kept
+    between calls, so steady-state capture allocates only the encoded output.
+    """
+    def __init__(self, max_size=(1024, 1024), quality=75, format="jpeg"):
+        if format not in MIME_TYPES:
+            raise ValueError(f"Unsupported image format '{format}'. Expected one of {tuple(MIME_TYPES)}")
+        self.max_size = max_size
+        self.quality = quality
+        self.format = format
+
+        self._buffers = {}
+        # Callers encode from worker threads (asyncio.to_thread); the reused buffers need one user at a time
+        self._lock = threading.Lock()
+
+        self.frames_encoded = 0
+        self.total_ns = 0
+        self.bytes_out = 0
+
+    @property
+    def mime_type(self):
+        return MIME_TYPES[self.format]
+
+    def target_size(self, width, height, max_size=None):
+        """(width, height) that fits in max_size keeping aspect ratio; never upscales (like PIL thumbnail)."""
+        max_size = max_size or self.max_size
+        if max_size is None:
+            # Encoder without a size limit (full-resolution screenshots)
+            return width, height
+        max_w, max_h = max_size
+        scale = min(max_w / width, max_h / height, 1.0)
+        return max(1, round(width * scale)), max(1, round(height * scale))
+
+    def _params(self, format, quality):
+        if format == "jpeg":
+            return [cv2.IMWRITE_JPEG_QUALITY, int(quality)]
+        if format == "webp":
+            return [cv2.IMWRITE_WEBP_QUALITY, int(quality)]
+        return [cv2.IMWRITE_PNG_COMPRESSION, 3]
+
+    def _buffer(self, key, shape):
+        buf = self._buffers.get(key)
+        if buf is None or buf.shape != shape:
+            buf = self._buffers[key] = np.empty(shape, dtype=np.uint8)
+        return buf
+
+    def _downscale(self, frame, size):
+        stage = 0
+        while frame.shape[1] >= 2 * size[0] and frame.shape[0] >= 2 * size[1]:
+            half = (frame.shape[1] // 2, frame.shape[0] // 2)
+            dst = self._buffer(("half", stage), (half[1], half[0]) + frame.shape[2:])
+            frame = cv2.resize(frame, half, dst=dst, interpolation=cv2.INTER_AREA)
+            stage += 1
+        if (frame.shape[1], frame.shape[0]) != size:
+            # Less than 2x left: bilinear doesn't alias at this ratio
+            dst = self._buffer("final", (size[1], size[0]) + frame.shape[2:])
+            frame = cv2.resize(frame, size, dst=dst, interpolation=cv2.INTER_LINEAR)
+        return frame
+
+    def encode(self, frame, max_size=None, quality=None, format=None):
+        """
+        Encodes a BGRA/BGR/grayscale uint8 frame (or anything np.asarray accepts, e.g. an mss
+        ScreenShot). Per-call overrides leave the encoder's defaults untouched. Returns bytes.
+        """
+        started = time.perf_counter_ns()
+        format = format or self.format
+        if format not in MIME_TYPES:
+            raise ValueError(f"Unsupported image format '{format}'. Expected one of {tuple(MIME_TYPES)}")
+        quality = self.quality if quality is None else quality
+
+        frame = np.asarray(frame)
+        height, width = frame.shape[:2]
+        size = self.target_size(width, height, max_size)
+        with self._lock:
+            if size != (width, height):
+                frame = self._downscale(frame, size)
+
+            if frame.ndim == 3 and frame.shape[2] == 4:
+                # Screen alpha is meaningless (often 0); never let it reach PNG/WebP
+                frame = cv2.cvtColor(frame, cv2.COLOR_BGRA2BGR, dst=self._buffer("bgr", frame.shape[:2] + (3,)))
+
+            ok, encoded = cv2.imencode("." + format, frame, self._params(format, quality))
+        if not ok:
+            raise RuntimeError(f"cv2.imencode failed for format '{format}'")
+        data = encoded.tobytes()
+
+        self.frames_encoded += 1
+        self.total_ns += time.perf_counter_ns() - started
+        self.bytes_out += len(data)
+        return data
+
+    def encode_payload(self, frame, **kwargs):
+        """Gemini Live / Socket.IO payload: {"mime_type", "data": base64 str}."""
+        format = kwargs.get("format") or self.format
+        return {"mime_type": MIME_TYPES.get(format, self.mime_type), "data": base64.b64encode(self.encode(frame, **kwargs)).decode()}
+
+    def get_stats(self):
+        return {
+            "frames_encoded": self.frames_encoded,
+            "mean_ms": round(self.total_ns / self.frames_encoded / 1e6, 2) if self.frames_encoded else 0.0,
+            "mean_bytes": self.bytes_out // self.frames_encoded if self.frames_encoded else 0,
+        }
@@ -0,0 +1,81 @@
+import time
+
+import cv2
+import numpy as np
+
+
+class FrameChangeGate:
+    """
+    Skips video frames that look the same as the last frame that was sent.
+    Each frame is reduced to a small grayscale grid (grid x grid cells, INTER_AREA averaging) and
+    compared with the grid of the last *sent* frame; the frame passes when more than `threshold` of
+    the cells changed by more than `pixel_delta` gray levels. Comparing against the last sent frame
+    (not the previous one) means slow drift still triggers a send eventually.
+    """
+    def __init__(self, threshold=0.01, pixel_delta=8, grid=32, keyframe_interval=None):
+        self.threshold = threshold
+        self.pixel_delta = pixel_delta
+        self.grid = grid
+        # Optional: force a frame through at least this often (seconds), even if nothing changed
+        self.keyframe_interval = keyframe_interval
+
+        self._reference = None
+        self._last_sent = 0.0
+        self.last_change = None
+
+        self.frames_sent = 0
+        self.frames_suppressed = 0
+
+    def signature(self, frame):
+        """Small int16 luminance grid for a BGR, BGRA or grayscale uint8 frame."""
+        if frame.ndim == 3:
+            code = cv2.COLOR_BGRA2GRAY if frame.shape[2] == 4 else cv2.COLOR_BGR2GRAY
+            # Shrink first so the color conversion only touches grid*grid pixels
+            small = cv2.resize(frame, (self.grid, self.grid), interpolation=cv2.INTER_AREA)
+            small = cv2.cvtColor(small, code)
+        else:
+            small = cv2.resize(frame, (self.grid, self.grid), interpolation=cv2.INTER_AREA)
+        return small.astype(np.int16)
+
+    def signature_from_jpeg(self, jpeg_bytes):
+        """Signature of an already-encoded frame; the JPEG is decoded at 1/8 scale, grayscale."""
+        buf = np.frombuffer(jpeg_bytes, dtype=np.uint8)
+        frame = cv2.imdecode(buf, cv2.IMREAD_REDUCED_GRAYSCALE_8)
+        if frame is None:
+            return None
+        return self.signature(frame)
+
+    def change(self, signature):
+        """Fraction of grid cells that differ from the last sent frame (1.0 if nothing was sent yet)."""
+        if self._reference is None:
+            return 1.0
+        return float(np.count_nonzero(np.abs(signature - self._reference) > self.pixel_delta)) / signature.size
+
+    def should_send(self, frame=None, signature=None):
+        """Returns True (and makes this frame the new reference) if the frame changed enough."""
+        if signature is None:
+            signature = self.signature(frame)
+        self.last_change = self.change(signature)
+        now = time.monotonic()
+        keyframe_due = self.keyframe_interval is not None and now - self._last_sent >= self.keyframe_interval
+        if self.last_change > self.threshold or keyframe_due:
+            self._reference = signature
+            self._last_sent = now
+            self.frames_sent += 1
+            return True
+        self.frames_suppressed += 1
+        return False
+
+    def reset(self):
+        """Forgets the reference so the next frame is sent (new session, source switch)."""
+        self._reference = None
+
+    def get_stats(self):
+        total = self.frames_sent + self.frames_suppressed
+        return {
+            "frames_sent": self.frames_sent,
+            "frames_suppressed": self.frames_suppressed,
+            "suppressed_ratio": round(self.frames_suppressed / total, 3) if total else 0.0,
+            "last_change": round(self.last_change, 4) if self.last_change is not None else None,
+            "threshold": self.threshold,
+        }
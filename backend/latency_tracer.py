@@ -0,0 +1,117 @@
+import time
+from collections import deque
+from dataclasses import dataclass, field, asdict
+from typing import Optional
+
+import numpy as np
+
+# (name, start mark, end mark) -- every segment is reported in milliseconds
+SEGMENTS = (
+    ("first_transcript", "speech_end", "first_transcript"),   # server ASR
+    ("first_model_audio", "speech_end", "first_model_audio"), # network + model time to first byte
+    ("local_playback", "first_model_audio", "first_playback"), # queueing before AudioEngine gets it
+    ("end_to_end", "speech_end", "first_playback"),
+)
+
+
+@dataclass
+class TurnTrace:
+    """perf_counter_ns timestamps for one voice turn. Unset points stay None."""
+    speech_end: Optional[int] = None
+    first_transcript: Optional[int] = None
+    first_model_audio: Optional[int] = None
+    first_playback: Optional[int] = None
+    tool_calls: int = 0
+    tool_ns: int = 0
+    _tool_started: Optional[int] = field(default=None, repr=False)
+
+    def segments_ms(self):
+        result = {}
+        for name, start, end in SEGMENTS:
+            a, b = getattr(self, start), getattr(self, end)
+            result[name] = (b - a) / 1e6 if a is not None and b is not None and b >= a else None
+        result["tool_dispatch"] = self.tool_ns / 1e6 if self.tool_calls else None
+        return result
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data.pop("_tool_started")
+        data["segments_ms"] = {k: round(v, 1) if v is not None else None for k, v in self.segments_ms().items()}
+        return data
+
+
+class LatencyTracer:
+    """
+    Per-turn latency tracer for the voice pipeline.
+    Records when the user stopped speaking (VAD falling edge), the first transcription delta,
+    the first model audio byte, the first sample handed to AudioEngine, and time spent in tool
+    dispatch. Completed turns go into a bounded ring; get_stats() reports p50/p95/p99 per segment
+    so slowness can be attributed to the network, tool dispatch or local buffering.
+    """
+    def __init__(self, capacity=200):
+        self._turns = deque(maxlen=capacity)
+        self.current = None
+        self.turns_completed = 0
+
+    def begin_turn(self, ago=0.0):
+        """VAD falling edge. `ago` backdates the mark to when silence actually started (seconds)."""
+        now = time.perf_counter_ns() - int(ago * 1e9)
+        if self.current is not None and self.current.first_model_audio is not None:
+            # User spoke again after the model answered (e.g. barge-in): the previous turn is over
+            self.end_turn(force=True)
+        if self.current is None:
+            self.current = TurnTrace()
+        # Several utterances before the model responds: the latest one is what it responds to
+        self.current.speech_end = now
+
+    def mark(self, point):
+        """Records the first occurrence of `point` in the current turn."""
+        if self.current is None:
+            if point == "first_playback":
+                # Tail of a turn that already ended; not the start of a new one
+                return
+            # Turn started without a VAD edge (text input, server-side VAD)
+            self.current = TurnTrace()
+        if getattr(self.current, point) is None:
+            setattr(self.current, point, time.perf_counter_ns())
+
+    def tool_started(self):
+        if self.current is None:
+            self.current = TurnTrace()
+        self.current._tool_started = time.perf_counter_ns()
+
+    def tool_finished(self):
+        if self.current is None or self.current._tool_started is None:
+            return
+        self.current.tool_ns += time.perf_counter_ns() - self.current._tool_started
+        self.current.tool_calls += 1
+        self.current._tool_started = None
+
+    def end_turn(self, force=False):
+        """Server turn complete. A turn that only produced tool calls stays open for the follow-up answer."""
+        trace = self.current
+        if trace is None:
+            return None
+        if not force and trace.tool_calls and trace.first_model_audio is None:
+            return None
+        self.current = None
+        self._turns.append(trace)
+        self.turns_completed += 1
+        return trace
+
+    def get_stats(self):
+        turns = list(self._turns)
+        per_turn = [t.segments_ms() for t in turns]
+        segments = {}
+        for name in [s[0] for s in SEGMENTS] + ["tool_dispatch"]:
+            values = [seg[name] for seg in per_turn if seg[name] is not None]
+            if values:
+                p50, p95, p99 = np.percentile(np.array(values), [50, 95, 99])
+                segments[name] = {"count": len(values), "p50": round(p50, 1), "p95": round(p95, 1), "p99": round(p99, 1)}
+            else:
+                segments[name] = {"count": 0, "p50": None, "p95": None, "p99": None}
+        return {
+            "turns": self.turns_completed,
+            "segments_ms": segments,
+            "last_turn": turns[-1].to_dict() if turns else None,
+        }
@@ -0,0 +1,118 @@
+import asyncio
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+
+class OCRBackend:
+    """On-box text extraction hook. The base backend has no engine and returns no text."""
+    available = False
+
+    def extract(self, jpeg_bytes) -> str:
+        return ""
+
+
+class TesseractOCRBackend(OCRBackend):
+    """Tesseract via pytesseract (needs the tesseract binary on PATH)."""
+    available = True
+
+    def __init__(self, lang="eng"):
+        import pytesseract
+        pytesseract.get_tesseract_version() # Raises if the binary is missing
+        self.lang = lang
+
+    def extract(self, jpeg_bytes):
+        import pytesseract
+        image = cv2.imdecode(np.frombuffer(jpeg_bytes, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+        if image is None:
+            return ""
+        return pytesseract.image_to_string(image, lang=self.lang)
+
+
+def default_ocr_backend():
+    try:
+        return TesseractOCRBackend()
+    except Exception as e:
+        print(f"[LocalOCR] Tesseract unavailable, every frame goes to the vision model: {e}")
+    return OCRBackend()
+
+
+def word_count(text):
+    """Words that look like real text (2+ letters/digits); OCR noise on icons rarely qualifies."""
+    return len(re.findall(r"[^\W_]{2,}", text or ""))
+
+
+class LocalOCRTier:
+    """
+    First indexing tier for screen frames: local OCR in a worker process.
+    A frame whose local text has at least `min_words` words is indexed from that text alone;
+    sparser frames (images, video, mostly-graphical UIs) are escalated to the vision model.
+    OCR runs in a separate process so a multi-second Tesseract pass never holds the GIL the
+    event loop and audio threads need.
+    """
+    def __init__(self, backend=None, min_words=15, use_process=True):
+        self._backend = backend
+        self.min_words = min_words
+        self.use_process = use_process
+        self._pool = None
+
+        self.frames = 0
+        self.hits = 0
+        self.errors = 0
+        self.total_ms = 0.0
+
+    @property
+    def backend(self):
+        # Created lazily: probing for the tesseract binary spawns a subprocess
+        if self._backend is None:
+            self._backend = default_ocr_backend()
+        return self._backend
+
+    @property
+    def available(self):
+        return self.backend.available
+
+    def is_sufficient(self, text):
+        return word_count(text) >= self.min_words
+
+    async def extract(self, jpeg_bytes):
+        """Local text for a frame ('' if unavailable or failed)."""
+        if not self.available:
+            return ""
+        started = time.perf_counter()
+        try:
+            if self.use_process:
+                if self._pool is None:
+                    self._pool = ProcessPoolExecutor(max_workers=1)
+                text = await asyncio.get_running_loop().run_in_executor(self._pool, self.backend.extract, jpeg_bytes)
+            else:
+                text = await asyncio.to_thread(self.backend.extract, jpeg_bytes)
+        except Exception as e:
+            self.errors += 1
+            print(f"[LocalOCR] Extraction failed: {e}")
+            return ""
+        finally:
+            self.frames += 1
+            self.total_ms += (time.perf_counter() - started) * 1000
+        text = (text or "").strip()
+        if self.is_sufficient(text):
+            self.hits += 1
+        return text
+
+    def shutdown(self):
+        if self._pool:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def get_stats(self):
+        return {
+            "available": self._backend.available if self._backend is not None else None,
+            "frames": self.frames,
+            "hits": self.hits,
+            "hit_rate": round(self.hits / self.frames, 3) if self.frames else 0.0,
+            "errors": self.errors,
+            "mean_ms": round(self.total_ms / self.frames, 1) if self.frames else 0.0,
+        }
@@ -1,7 +1,6 @@
 import os
 import time
 import json
-import base64
 import threading
 import asyncio
 from pynput import mouse
@@ -177,7 +176,8 @@ class MacroAgent:
         for step in steps:
 
             # 1. Capture current screen
-            current_screen = await self.desktop_agent.get_screenshot()
+            # Full resolution (coordinates must map 1:1 to the screen), JPEG raw bytes instead of b64 PNG
+            current_screen = await self.desktop_agent.get_screenshot(format="jpeg", quality=85, raw=True)
             if not current_screen:
                 results.append(f"Step {step['id']}: Failed to capture screen.")
                 continue
@@ -203,7 +203,7 @@ class MacroAgent:
                                 parts=[
                                     types.Part.from_text(text=prompt),
                                     types.Part.from_bytes(data=reference_bytes, mime_type="image/png"),
-                                    types.Part.from_bytes(data=base64.b64decode(current_screen["data"]), mime_type="image/png")
+                                    types.Part.from_bytes(data=current_screen["data"], mime_type=current_screen["mime_type"])
                                 ]
                             )
                         ],
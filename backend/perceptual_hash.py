@@ -0,0 +1,91 @@
+from collections import OrderedDict, deque
+
+import cv2
+import numpy as np
+
+
+SIGNATURE_GRID = 64
+
+
+def frame_signature(image, grid=SIGNATURE_GRID):
+    """
+    grid x grid grayscale thumbnail (INTER_AREA cell averages) of a BGR(A)/grayscale frame, as
+    bytes for an SQLite BLOB. A 64-bit difference hash is too coarse for screens of text: two
+    different pages in the same window layout land a few bits apart. At 64x64 a rewritten line of
+    text already moves several cells, while JPEG noise or a blinking caret moves one or two.
+    """
+    if image.ndim == 3:
+        code = cv2.COLOR_BGRA2GRAY if image.shape[2] == 4 else cv2.COLOR_BGR2GRAY
+        # Shrink first so the color conversion only touches grid*grid pixels
+        image = cv2.cvtColor(cv2.resize(image, (grid, grid), interpolation=cv2.INTER_AREA), code)
+    else:
+        image = cv2.resize(image, (grid, grid), interpolation=cv2.INTER_AREA)
+    return image.tobytes()
+
+
+def frame_signature_jpeg(jpeg_bytes, grid=SIGNATURE_GRID):
+    """Signature of an encoded image, decoded at 1/4 scale in grayscale (still >= 64 px for screenshots)."""
+    image = cv2.imdecode(np.frombuffer(jpeg_bytes, dtype=np.uint8), cv2.IMREAD_REDUCED_GRAYSCALE_4)
+    if image is None:
+        return None
+    return frame_signature(image, grid)
+
+
+def signature_distance(a, b, pixel_delta=4):
+    """Number of cells whose gray level differs by more than pixel_delta (every cell if the sizes differ)."""
+    if len(a) != len(b):
+        return max(len(a), len(b))
+    cells_a = np.frombuffer(a, dtype=np.uint8).astype(np.int16)
+    cells_b = np.frombuffer(b, dtype=np.uint8).astype(np.int16)
+    return int(np.count_nonzero(np.abs(cells_a - cells_b) > pixel_delta))
+
+
+class FrameDeduper:
+    """
+    Remembers the signatures of recently indexed frames per window title and finds near-duplicates:
+    at most max_distance changed cells (out of 64x64), enough for noise and a caret but not for a
+    changed line of text. A frame only counts as a duplicate of a frame from the *same* window, so
+    two apps that happen to look alike are still indexed separately.
+    """
+    def __init__(self, max_distance=4, pixel_delta=4, per_title=8, max_titles=64):
+        self.max_distance = max_distance
+        self.pixel_delta = pixel_delta
+        self.per_title = per_title
+        self.max_titles = max_titles
+        self._recent = OrderedDict() # title -> deque[(hash, ref)], least recently used first
+
+        self.frames_checked = 0
+        self.duplicates = 0
+
+    def find(self, title, signature):
+        """Returns the `ref` of the closest recent frame within max_distance, or None."""
+        self.frames_checked += 1
+        entries = self._recent.get(title)
+        if not entries:
+            return None
+        self._recent.move_to_end(title)
+        best, best_distance = None, self.max_distance + 1
+        for known, ref in entries:
+            distance = signature_distance(signature, known, self.pixel_delta)
+            if distance < best_distance:
+                best, best_distance = ref, distance
+        if best is not None:
+            self.duplicates += 1
+        return best
+
+    def add(self, title, signature, ref):
+        entries = self._recent.get(title)
+        if entries is None:
+            entries = self._recent[title] = deque(maxlen=self.per_title)
+            if len(self._recent) > self.max_titles:
+                self._recent.popitem(last=False)
+        else:
+            self._recent.move_to_end(title)
+        entries.append((signature, ref))
+
+    def get_stats(self):
+        return {
+            "frames_checked": self.frames_checked,
+            "duplicates": self.duplicates,
+            "tracked_titles": len(self._recent),
+        }
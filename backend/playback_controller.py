@@ -0,0 +1,140 @@
+import asyncio
+import time
+from collections import deque
+
+
+class PlaybackController:
+    """
+    Generation-tagged playback state for model audio.
+    Every chunk is tagged with the generation current when it arrived. An interruption bumps the
+    generation, so stale chunks are dropped wherever they sit:
+      - asyncio queue: play_audio discards chunks whose tag is old (no draining loop)
+      - IPC ring + engine buffer: one RESET jumps the ring's read position
+    Speaking state is tracked with a single rescheduled timer instead of a task per chunk.
+    """
+    def __init__(self, hangover=0.5, bytes_per_second=24000 * 2, history=50):
+        self.hangover = hangover
+        self.bytes_per_second = bytes_per_second
+        self.audio_ring = None
+
+        self.generation = 0
+        self.is_speaking = False
+        self.speech_start_time = None
+
+        self._last_chunk_time = 0.0
+        self._playback_end = 0.0
+        self._timer = None
+
+        # Barge-in measurements
+        self._speech_onset_ns = None
+        self.interruptions = 0
+        self.dropped_chunks = 0
+        self._history = deque(maxlen=history)
+
+    # --- Tagging ---
+
+    def tag(self, data):
+        return (self.generation, data)
+
+    def is_current(self, generation):
+        return generation == self.generation
+
+    def drop_stale(self):
+        self.dropped_chunks += 1
+
+    # --- Speaking state ---
+
+    def on_chunk_played(self, nbytes):
+        """Called for each chunk handed to the engine. Returns True if this chunk started speech."""
+        now = time.monotonic()
+        started = not self.is_speaking
+        if started:
+            self.is_speaking = True
+            self.speech_start_time = time.time()
+        self._last_chunk_time = now
+        # Model audio arrives faster than real time, so speech lasts until the queued audio has played
+        self._playback_end = max(now, self._playback_end) + nbytes / self.bytes_per_second
+        if self._timer is None:
+            self._schedule(self._deadline() - now)
+        return started
+
+    def _deadline(self):
+        return max(self._last_chunk_time + self.hangover, self._playback_end)
+
+    def _schedule(self, delay):
+        loop = asyncio.get_running_loop()
+        self._timer = loop.call_later(max(0.0, delay), self._on_timer)
+
+    def _on_timer(self):
+        self._timer = None
+        remaining = self._deadline() - time.monotonic()
+        if remaining > 0:
+            # More audio arrived since the timer was set; push it out once rather than per chunk
+            self._schedule(remaining)
+            return
+        self._finish_speaking()
+        print("[REX DEBUG] [AUDIO] REX finished speaking")
+
+    def _finish_speaking(self):
+        self.is_speaking = False
+        self.speech_start_time = None
+        self._playback_end = 0.0
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+
+    # --- Interruption ---
+
+    def note_user_speech_onset(self):
+        """VAD rising edge while the model is talking: start of a potential barge-in."""
+        if self.is_speaking and self._speech_onset_ns is None:
+            self._speech_onset_ns = time.perf_counter_ns()
+
+    def interrupt(self):
+        """Invalidates all queued model audio in O(1) and silences the engine."""
+        was_speaking = self.is_speaking
+        self.generation += 1
+        if self.audio_ring:
+            self.audio_ring.reset()
+        interrupted_ns = time.perf_counter_ns()
+        onset_ns, self._speech_onset_ns = self._speech_onset_ns, None
+        self._finish_speaking()
+
+        if not was_speaking:
+            return
+        self.interruptions += 1
+        record = {
+            "generation": self.generation,
+            "detect_ms": (interrupted_ns - onset_ns) / 1e6 if onset_ns else None,
+            "silence_ms": None,
+            "total_ms": None,
+        }
+        self._history.append(record)
+        try:
+            asyncio.get_running_loop().call_later(0.25, self._report, record)
+        except RuntimeError:
+            pass
+
+    def _report(self, record):
+        """Fills in engine-side silence time once the engine has applied the reset."""
+        if not self.audio_ring:
+            return
+        silence_ms = self.audio_ring.last_reset_latency_ms()
+        if silence_ms is None:
+            return
+        record["silence_ms"] = round(silence_ms, 1)
+        if record["detect_ms"] is not None:
+            record["detect_ms"] = round(record["detect_ms"], 1)
+            record["total_ms"] = round(record["detect_ms"] + silence_ms, 1)
+        print(f"[REX DEBUG] [AUDIO] Barge-in: speech->interrupt {record['detect_ms']} ms, interrupt->silence {record['silence_ms']} ms")
+
+    def get_stats(self):
+        totals = [r["total_ms"] for r in self._history if r["total_ms"] is not None]
+        return {
+            "generation": self.generation,
+            "is_speaking": self.is_speaking,
+            "interruptions": self.interruptions,
+            "dropped_stale_chunks": self.dropped_chunks,
+            "last_barge_in": self._history[-1] if self._history else None,
+            "avg_barge_in_ms": round(sum(totals) / len(totals), 1) if totals else None,
+        }
@@ -0,0 +1,265 @@
+import asyncio
+import os
+import time
+from pathlib import Path
+
+from semantic_search_agent import SUPPORTED_EXTENSIONS, is_ignored_dir, scan_tree
+
+
+class ProjectIndexer:
+    """
+    Keeps the current project's semantic index up to date in the background.
+      - watch() starts with one full pass (tree walk diffed against the stored mtimes), which also
+        drops files deleted while nobody was watching
+      - afterwards only changed paths are queued: from filesystem events when watchdog is installed,
+        otherwise from diffing an in-memory mtime snapshot of the tree every poll_interval seconds
+      - queued paths are debounced: a batch is flushed once no event arrived for debounce_s (at most
+        max_delay_s after the first event of a burst), then existing files are re-embedded and missing
+        ones removed from the index
+      - a full pass runs again only after a gap: the observer died, a directory was moved/removed,
+        or the loop woke up far later than scheduled (sleep/suspend)
+    """
+    def __init__(self, agent, debounce_s=1.5, max_delay_s=10.0, poll_interval=30.0, check_interval=30.0,
+                 gap_s=60.0, use_watchdog=True):
+        self.agent = agent
+        self.debounce_s = debounce_s
+        self.max_delay_s = max_delay_s
+        self.poll_interval = poll_interval
+        self.check_interval = check_interval
+        self.gap_s = gap_s
+        self.use_watchdog = use_watchdog
+
+        self.project_name = None
+        self.root = None
+        self._loop = None
+        self._task = None
+        self._observer = None
+        self._wake = None
+        self._dirty = {} # path -> None (insertion ordered set)
+        self._first_event = None
+        self._last_event = None
+        self._rescan = False
+        self._snapshot = None # {path: mtime}, polling mode only
+        self._next_poll = 0.0
+
+        self.full_scans = 0
+        self.gaps = 0
+        self.events = 0
+        self.batches = 0
+        self.files_indexed = 0
+        self.files_removed = 0
+
+    @property
+    def mode(self):
+        if self._task is None:
+            return "stopped"
+        return "watchdog" if self._observer is not None else "polling"
+
+    async def watch(self, project_name: str, project_path: str):
+        """Starts (or switches) background indexing for a project; returns immediately."""
+        root = str(Path(project_path))
+        if project_name == self.project_name and root == self.root and self._task and not self._task.done():
+            return
+        await self.stop()
+        if not Path(root).exists():
+            print(f"[ProjectIndexer] Project path not found: {root}")
+            return
+        self.project_name, self.root = project_name, root
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._dirty.clear()
+        self._rescan = False
+        self._observer = self._start_observer() if self.use_watchdog else None
+        self._task = asyncio.create_task(self._run())
+        print(f"[ProjectIndexer] Watching {project_name} at {root} ({self.mode})")
+
+    async def stop(self):
+        if self._observer is not None:
+            observer, self._observer = self._observer, None
+            observer.stop()
+            await asyncio.to_thread(observer.join, 5)
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _start_observer(self):
+        try:
+            from watchdog.events import FileSystemEventHandler
+            from watchdog.observers import Observer
+        except ImportError:
+            print("[ProjectIndexer] watchdog not installed, falling back to mtime polling")
+            return None
+
+        indexer = self
+
+        class Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                if event.event_type in ("opened", "closed", "closed_no_write"):
+                    return
+                if event.is_directory:
+                    # Children of a moved/removed directory get no events of their own
+                    if event.event_type in ("moved", "deleted"):
+                        indexer.notify_rescan()
+                    return
+                indexer.notify(event.src_path)
+                if getattr(event, "dest_path", None):
+                    indexer.notify(event.dest_path)
+
+        try:
+            observer = Observer()
+            observer.schedule(Handler(), self.root, recursive=True)
+            observer.daemon = True
+            observer.start()
+            return observer
+        except Exception as e:
+            print(f"[ProjectIndexer] Could not start file watcher ({e}), falling back to mtime polling")
+            return None
+
+    def _relevant(self, path: str):
+        if os.path.splitext(path)[1] not in SUPPORTED_EXTENSIONS:
+            return False
+        try:
+            parts = Path(path).relative_to(self.root).parts[:-1]
+        except ValueError:
+            return False
+        return not any(is_ignored_dir(part) for part in parts)
+
+    def notify(self, path):
+        """Marks a path as changed (created, modified, moved or deleted). Safe to call from any thread."""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._mark, [str(path)])
+
+    def notify_rescan(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._mark_rescan)
+
+    def _mark(self, paths):
+        now = time.monotonic()
+        for path in paths:
+            if not self._relevant(path):
+                continue
+            self.events += 1
+            if not self._dirty:
+                self._first_event = now
+            self._dirty[path] = None
+            self._last_event = now
+        if self._dirty and self._wake is not None:
+            self._wake.set()
+
+    def _mark_rescan(self):
+        self._rescan = True
+        if self._wake is not None:
+            self._wake.set()
+
+    def _timeout(self):
+        now = time.monotonic()
+        deadlines = [self.check_interval]
+        if self._dirty:
+            flush_at = min(self._last_event + self.debounce_s, self._first_event + self.max_delay_s)
+            deadlines.append(flush_at - now)
+        if self._observer is None:
+            deadlines.append(self._next_poll - now)
+        return max(0.0, min(deadlines))
+
+    def _batch_ready(self):
+        if not self._dirty:
+            return False
+        now = time.monotonic()
+        return now - self._last_event >= self.debounce_s or now - self._first_event >= self.max_delay_s
+
+    async def _run(self):
+        needs_scan = True # first run
+        while True:
+            try:
+                if needs_scan:
+                    needs_scan = False
+                    await self._full_scan()
+                timeout = self._timeout()
+                started = time.time()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                self._wake.clear()
+
+                observer_died = self._observer is not None and not self._observer.is_alive()
+                if time.time() - started > timeout + self.gap_s or observer_died or self._rescan:
+                    self.gaps += 1
+                    print(f"[ProjectIndexer] Gap detected in {self.project_name}, rescanning")
+                    if observer_died:
+                        self._observer = self._start_observer()
+                    needs_scan = True
+                    continue
+
+                if self._observer is None and time.monotonic() >= self._next_poll:
+                    await self._poll()
+                if self._batch_ready():
+                    await self._flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Whatever was in flight is unknown now; the next pass re-diffs the whole tree
+                print(f"[ProjectIndexer] Indexing error in {self.project_name}: {e}")
+                needs_scan = True
+                await asyncio.sleep(self.check_interval)
+
+    async def _full_scan(self):
+        self._dirty.clear()
+        self._rescan = False
+        self.full_scans += 1
+        files = await asyncio.to_thread(scan_tree, self.root, self.agent.max_file_bytes)
+        if self._observer is None:
+            self._snapshot = files
+            self._next_poll = time.monotonic() + self.poll_interval
+        await self.agent.index_project(self.project_name, self.root, files=files)
+
+    async def _poll(self):
+        files = await asyncio.to_thread(scan_tree, self.root, self.agent.max_file_bytes)
+        previous = self._snapshot or {}
+        changed = [p for p, mtime in files.items() if previous.get(p) != mtime]
+        changed.extend(p for p in previous if p not in files)
+        self._snapshot = files
+        self._next_poll = time.monotonic() + self.poll_interval
+        self._mark(changed)
+
+    def _classify(self, paths):
+        changed, deleted = [], []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                deleted.append(path)
+                continue
+            if stat.st_size > self.agent.max_file_bytes:
+                deleted.append(path)
+            else:
+                changed.append((Path(path), stat.st_mtime))
+        return changed, deleted
+
+    async def _flush(self):
+        paths = list(self._dirty)
+        self._dirty.clear()
+        self.batches += 1
+        changed, deleted = await asyncio.to_thread(self._classify, paths)
+        if deleted:
+            self.files_removed += await self.agent.remove_files(self.project_name, deleted)
+        if changed:
+            await self.agent.index_files(self.project_name, changed)
+            self.files_indexed += len(changed)
+
+    def get_stats(self):
+        return {
+            "project": self.project_name,
+            "mode": self.mode,
+            "pending": len(self._dirty),
+            "full_scans": self.full_scans,
+            "gaps": self.gaps,
+            "events": self.events,
+            "batches": self.batches,
+            "files_indexed": self.files_indexed,
+            "files_removed": self.files_removed,
+        }
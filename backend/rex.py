@@ -11,6 +11,7 @@ import PIL.Image
 import mss
 import argparse
 import numpy as np
+import threading
 import time
 
 from google import genai
@@ -28,6 +29,7 @@ CHANNELS = 1
 SEND_SAMPLE_RATE = 16000
 RECEIVE_SAMPLE_RATE = 24000
 CHUNK_SIZE = 1024
+VIDEO_SEND_INTERVAL = 1.0 # seconds between frames sent to the model, independent of the capture rate
 
 MODEL = "models/gemini-2.5-flash-native-audio-preview-12-2025"
 DEFAULT_MODE = "camera"
@@ -230,6 +232,7 @@ from speech_agent import SpeechAgent, speech_tools
 from communications_agent import communication_tools
 from ethical_hacking_agent import EthicalHackingAgent, hacking_tools
 from semantic_search_agent import SemanticSearchAgent, semantic_search_tools
+from project_indexer import ProjectIndexer
 
 calendar_tools = [
      {
@@ -260,7 +263,8 @@ visual_memory_tools = [
         "parameters": {
             "type": "OBJECT",
             "properties": {
-                "query": {"type": "STRING", "description": "The search term (e.g., 'Python docs', 'Spotify', 'Budget spreadsheet')."}
+                "query": {"type": "STRING", "description": "The search term (e.g., 'Python docs', 'Spotify', 'Budget spreadsheet')."},
+                "time_range_hours": {"type": "NUMBER", "description": "How far back to search, in hours. Defaults to 24."}
             },
             "required": ["query"]
         }
@@ -338,7 +342,17 @@ config = types.LiveConnectConfig(
 
 import concurrent.futures
 import pyttsx3
-from audio_engine import create_audio_engine
+from audio_supervisor import AudioEngineSupervisor
+from audio_analysis import AudioAnalyzer
+from audio_capture import MicrophoneCapture
+from audio_devices import AudioDeviceRegistry
+from wake_word import WakeWordStage
+from playback_controller import PlaybackController
+from latency_tracer import LatencyTracer
+from frame_gate import FrameChangeGate
+from frame_encoder import FrameEncoder
+from window_tracker import WindowFocusTracker
+from frame_capture import BackgroundFrameCapture
 
 # pya representation removed (handled by AudioEngine process)
 
@@ -423,10 +437,17 @@ class AudioLoop:
         self.speech_agent = speech_agent or SpeechAgent()
         self.wake_word_active = self.settings.get("wake_word_enabled", False)
         self._wake_session_is_active = not self.wake_word_active
+        # Runs on the mic capture thread; armed only while waiting for the wake word
+        self.wake_word = WakeWordStage(
+            self.speech_agent,
+            is_armed=lambda: self.wake_word_active and not self._wake_session_is_active,
+        )
         self.printer_agent = printer_agent or PrinterAgent()
         self.stock_agent = stock_agent or StockAgent()
         self.hacking_agent = hacking_agent or EthicalHackingAgent()
         self.semantic_search = semantic_search or SemanticSearchAgent(api_key=None)
+        # Background re-indexing of the current project (file events or mtime polling)
+        self.project_indexer = ProjectIndexer(self.semantic_search)
         
         from workflow_agent import WorkflowAgent
         self.workflow_agent = WorkflowAgent(self.desktop_agent, gemini_client=client)
@@ -439,9 +460,24 @@ class AudioLoop:
 
         # Video buffering state
         self._latest_image_payload = None
+        self._latest_image_sent = False
+        # Change-detection gates: unchanged frames are neither encoded nor sent upstream
+        frame_threshold = self.settings.get("frame_change_threshold", 0.01)
+        self.frame_gate = FrameChangeGate(threshold=frame_threshold)          # video_loop (screen/camera)
+        self.client_frame_gate = FrameChangeGate(threshold=frame_threshold)   # frames pushed by the frontend
+        self.frame_encoder = FrameEncoder(max_size=(1024, 1024))
+        # Which monitor holds the focused window; cached until a foreground-change event so UIA isn't queried every frame
+        self.window_tracker = WindowFocusTracker()
+        # Capture worker owned by video_loop; the camera and mss handles only live on its thread
+        self.frame_capture = None
+        self._capture_local = threading.local() # .sct / .camera: the capture thread's own handles
+        self._capture_mode = None
         # VAD State
         self._is_speaking = False
         self._silence_start_time = None
+        self.audio_analyzer = AudioAnalyzer()
+        self.mic_capture = None
+        self._mic_hotplug_seq = 0
         
         # Initialize ProjectManager
         from project_manager import ProjectManager
@@ -454,21 +490,23 @@ class AudioLoop:
         self.privacy_mode = False # If True, force local LLM
         self.ollama = ollama_agent # Set from constructor or server
         
-        # Zero-Latency Audio Engine - Initialized in run()
+        # Zero-Latency Audio Engine - Started in run(), reused across Live session reconnects
+        self.audio_engine = AudioEngineSupervisor(on_failed=self._on_audio_engine_failed)
         self.audio_process = None
-        self.audio_queue = None
+        self.audio_ring = None
         
         # Ack Executor
         self.ack_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
         
         # Barge-in Prevention State
-        self._is_rex_speaking = False  # Track if REX is currently outputting audio
-        self._rex_speech_timer = None  # Timer to detect when REX stops speaking
+        # Generation-tagged playback: speaking state, stale-chunk invalidation and barge-in timing
+        self.playback = PlaybackController()
+        # Per-turn timing: VAD end -> transcript -> model audio -> AudioEngine, plus tool dispatch
+        self.latency = LatencyTracer()
         self._mute_during_rex_speech = True  # Default: mute mic when REX speaks
         self._barge_in_threshold = 5000  # RMS threshold for allowing interruptions (higher = quieter interruptions blocked)
         self._normal_vad_threshold = 100  # LOWERED to 100 for high sensitivity (Default was 800) -- REX FIX
         self._mute_buffer_duration = 1.0  # Seconds to fully mute after REX starts speaking (prevent loopback)
-        self._rex_speech_start_time = None  # Track when REX started speaking for mute buffer
         
         # Ack Executor
         self.ack_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
@@ -548,13 +586,17 @@ class AudioLoop:
             
         if hasattr(self, 'printer_agent') and hasattr(self.printer_agent, 'shutdown'):
             asyncio.create_task(self.printer_agent.shutdown())
+
+        if hasattr(self, 'window_tracker'):
+            self.window_tracker.stop()
+
+        if hasattr(self, 'project_indexer'):
+            asyncio.create_task(self.project_indexer.stop())
             
-        if hasattr(self, 'audio_process') and self.audio_process.is_alive():
-            # Send Stop Signal
-            # self.audio_queue.put(None) # Sentinel 
-            # Force terminate for speed
-            self.audio_process.terminate()
-            self.audio_process.join()
+        self.playback.audio_ring = None
+        self.audio_engine.stop()
+        self.audio_process = None
+        self.audio_ring = None
         
         if hasattr(self, 'ack_executor'):
             self.ack_executor.shutdown(wait=False)
@@ -571,37 +613,72 @@ class AudioLoop:
         else:
             print(f"[REX DEBUG] [WARN] Confirmation Request {request_id} not found in pending dict. Keys: {list(self._pending_confirmations.keys())}")
 
+    def get_capture_stats(self):
+        """Captured, dropped and overflowed microphone frame counts."""
+        if not self.mic_capture:
+            return {}
+        stats = self.mic_capture.get_stats()
+        stats["wake_word"] = self.wake_word.get_stats()
+        return stats
+
+    def get_playback_stats(self):
+        """Fill level, buffered latency and underrun/overrun counts of the playback ring."""
+        if not self.audio_ring:
+            return {}
+        return self.audio_ring.get_stats()
+
+    @property
+    def _is_rex_speaking(self):
+        return self.playback.is_speaking
+
+    @property
+    def _rex_speech_start_time(self):
+        return self.playback.speech_start_time
+
+    def get_latency_stats(self):
+        """p50/p95/p99 of each voice-turn latency segment over recent turns."""
+        return self.latency.get_stats()
+
+    def get_barge_in_stats(self):
+        """Interruption count and speech-onset -> silence latency of recent barge-ins."""
+        return self.playback.get_stats()
+
     def clear_audio_queue(self):
-        """Clears the queue of pending audio chunks to stop playback immediately."""
+        """Stops playback immediately by invalidating every queued chunk."""
         try:
-            # 1. Pulse RESET to the playback engine (for local buffer)
-            from audio_engine import RESET_SIGNAL
-            self.audio_in_queue.put_nowait(RESET_SIGNAL)
-            
-            # 2. Clear the communication queue
-            count = 0
-            while not self.audio_in_queue.empty():
-                try:
-                    self.audio_in_queue.get_nowait()
-                    count += 1
-                except: break
-                
-            if count > 0:
-                print(f"[REX DEBUG] [AUDIO] Cleared {count} chunks from playback queue due to interruption.")
+            # Bumps the generation (queued chunks are dropped lazily by play_audio) and
+            # pulses RESET to the playback engine, which drops everything already in the shared ring
+            self.playback.interrupt()
         except Exception as e:
             print(f"[REX DEBUG] [ERR] Failed to clear audio queue: {e}")
 
     async def send_frame(self, frame_data):
         # Update the latest frame payload
         if isinstance(frame_data, bytes):
+            jpeg_bytes = frame_data
             b64_data = base64.b64encode(frame_data).decode('utf-8')
         else:
             b64_data = frame_data 
+            jpeg_bytes = base64.b64decode(frame_data)
+
+        # Unchanged frame: the model already has the previous one, keep it as the pending payload
+        signature = self.client_frame_gate.signature_from_jpeg(jpeg_bytes)
+        if signature is not None and not self.client_frame_gate.should_send(signature=signature):
+            return
 
         # Store as the designated "next frame to send"
         self._latest_image_payload = {"mime_type": "image/jpeg", "data": b64_data}
+        self._latest_image_sent = False
         # No event signal needed - listen_audio pulls it
 
+    def set_frame_change_threshold(self, threshold):
+        self.frame_gate.threshold = threshold
+        self.client_frame_gate.threshold = threshold
+
+    def get_frame_gate_stats(self):
+        video = self.frame_capture.get_stats() if self.frame_capture else self.frame_gate.get_stats()
+        return {"video_loop": video, "client": self.client_frame_gate.get_stats()}
+
     async def send_realtime(self):
         try:
             while True:
@@ -662,98 +739,102 @@ class AudioLoop:
             print(f"[REX DEBUG] [FILE] Error handling file drop: {e}")
 
     def _resolve_device(self, name_to_find, kind='input'):
-        """Resolves a device name to a PyAudio index."""
+        """Resolves a device name to a PyAudio index using the shared (cached) device registry."""
         if not name_to_find:
             return None
-            
-        p = pyaudio.PyAudio()
+        print(f"[REX] Attempting to find {kind} matching: '{name_to_find}'")
+        return AudioDeviceRegistry.get().resolve_index(name_to_find, kind=kind)
+
+    def _on_wake_word(self, keyword_index):
+        """Called on the event loop when the capture thread detects the wake word."""
+        self._wake_session_is_active = True
+        print(f"[REX DEBUG] [WAKE] Wake word detected (keyword {keyword_index}) {self.wake_word.get_stats()}")
+        if self.on_transcription:
+             self.on_transcription({"sender": "System", "text": "[Wake Word Detected]"})
+
+    async def _open_microphone(self):
+        """Opens the callback-mode input stream on the registry's shared PyAudio. Returns the capture, or None on failure."""
+        registry = AudioDeviceRegistry.get()
+        default_mic = registry.default_device('input')
+        if default_mic:
+            mic_info = {"index": default_mic.index, "name": default_mic.name}
+        else:
+            print(f"[REX] [WARN] No default input device found")
+            mic_info = {"index": 0}
+
+        # Resolve Input Device by Name
+        resolved_index = self._resolve_device(self.input_device_name, kind='input')
+        if resolved_index is not None:
+            self.input_device_index = resolved_index
+
+        # Final Device Choice
+        device_index = self.input_device_index
+        if device_index is None:
+            print(f"[REX] Using default input device: {mic_info.get('name')} (Index {mic_info.get('index')})")
+            device_index = mic_info.get('index')
+        else:
+            print(f"[REX] Using resolved input device index: {device_index}")
+
+        # Callback-mode capture: frames arrive from the PortAudio thread, no per-chunk to_thread
+        loop = asyncio.get_running_loop()
+        self.wake_word.on_detect = lambda keyword_index: loop.call_soon_threadsafe(self._on_wake_word, keyword_index)
+        self._mic_hotplug_seq = registry.hotplug_seq
+        p = registry.acquire()
+        self.mic_capture = MicrophoneCapture(chunk_size=CHUNK_SIZE, frame_processor=self.wake_word.feed)
         try:
-            count = p.get_device_count()
-            print(f"[REX] Attempting to find {kind} matching: '{name_to_find}'")
-            
-            for i in range(count):
-                try:
-                    info = p.get_device_info_by_index(i)
-                    name = info.get('name', '')
-                    channels = info.get('maxInputChannels' if kind == 'input' else 'maxOutputChannels', 0)
-                    
-                    if channels > 0:
-                        # Simple case-insensitive check
-                        if name_to_find.lower() in name.lower() or name.lower() in name_to_find.lower():
-                             print(f"   [MATCH] Index {i}: {name}")
-                             return i
-                except Exception:
-                    continue
-            print(f"[REX] No match found for '{name_to_find}' ({kind}). Falling back.")
+            self.audio_stream = await self.mic_capture.start(
+                p,
+                format=FORMAT,
+                channels=CHANNELS,
+                rate=SEND_SAMPLE_RATE,
+                input_device_index=device_index if device_index is not None else mic_info["index"],
+            )
+        except OSError as e:
+            print(f"[REX] [ERR] Failed to open audio input stream: {e}")
+            print("[REX] [WARN] Audio features will be disabled. Please check microphone permissions.")
+            self.mic_capture = None
+            registry.release()
             return None
-        finally:
-            p.terminate()
+        return self.mic_capture
+
+    def _close_microphone(self):
+        if self.mic_capture:
+            self.mic_capture.close()
+            self.mic_capture = None
+            self.audio_stream = None
+            AudioDeviceRegistry.get().release()
 
     async def listen_audio(self):
         try:
-            # Instantiate PyAudio locally for process safety (though input is usually main process)
-            p = pyaudio.PyAudio()
-            
-            try:
-                mic_info = p.get_default_input_device_info()
-            except Exception as e:
-                print(f"[REX] [WARN] No default input device found: {e}")
-                mic_info = {"index": 0}
-
-            # Resolve Input Device by Name
-            resolved_index = self._resolve_device(self.input_device_name, kind='input')
-            if resolved_index is not None:
-                self.input_device_index = resolved_index
-            
-            # Final Device Choice
-            device_index = self.input_device_index
-            if device_index is None:
-                print(f"[REX] Using default input device: {mic_info.get('name')} (Index {mic_info.get('index')})")
-                device_index = mic_info.get('index')
-            else:
-                print(f"[REX] Using resolved input device index: {device_index}")
-
-            try:
-                self.audio_stream = await asyncio.to_thread(
-                    p.open,
-                    format=FORMAT,
-                    channels=CHANNELS,
-                    rate=SEND_SAMPLE_RATE,
-                    input=True,
-                    input_device_index=device_index if device_index is not None else mic_info["index"],
-                    frames_per_buffer=CHUNK_SIZE,
-                )
-            except OSError as e:
-                print(f"[REX] [ERR] Failed to open audio input stream: {e}")
-                print("[REX] [WARN] Audio features will be disabled. Please check microphone permissions.")
-                p.terminate()
+            mic = await self._open_microphone()
+            if mic is None:
                 return
 
-            if __debug__:
-                kwargs = {"exception_on_overflow": False}
-            else:
-                kwargs = {}
-            
             # VAD Constants
             VAD_THRESHOLD = self._normal_vad_threshold  # 800 for normal speech
             SILENCE_DURATION = 0.5 # Seconds of silence to consider "done speaking"
             
             while True:
+                if AudioDeviceRegistry.get().hotplug_seq != self._mic_hotplug_seq:
+                    # PortAudio only sees added/removed devices once every stream on it is closed
+                    print("[REX] Audio devices changed, reopening the microphone")
+                    self._close_microphone()
+                    mic = await self._open_microphone()
+                    if mic is None:
+                        return
+
                 if self.paused:
+                    # Frames keep arriving in callback mode; don't let stale audio build up
+                    mic.clear()
                     await asyncio.sleep(0.1)
                     continue
 
                 try:
-                    data = await asyncio.to_thread(self.audio_stream.read, CHUNK_SIZE, **kwargs)
+                    data = await mic.read()
                     
-                    # Calculate RMS
-                    count = len(data) // 2
-                    shorts = struct.unpack(f"<{count}h", data) if count > 0 else []
-                    if count > 0:
-                        sum_squares = sum(s**2 for s in shorts)
-                        rms = int(math.sqrt(sum_squares / count))
-                    else:
-                        rms = 0
+                    # Calculate RMS (vectorized over a zero-copy int16 view)
+                    levels = self.audio_analyzer.analyze(data)
+                    rms = levels.rms
                     
                     # Log RMS occasionally for debugging
                     if not hasattr(self, "_last_rms_log_time"): self._last_rms_log_time = 0
@@ -761,18 +842,9 @@ class AudioLoop:
                         print(f"[REX AUDIO DEBUG] RMS: {rms} (VAD Threshold: {VAD_THRESHOLD})")
                         self._last_rms_log_time = time.time()
                     
-                    # Wake Word
+                    # Wake Word (detection itself runs on the capture thread, see WakeWordStage)
                     if self.wake_word_active and not self._wake_session_is_active:
-                        frame_len = self.speech_agent.porcupine.frame_length if self.speech_agent.porcupine else 512
-                        for i in range(0, count, frame_len):
-                            chunk = shorts[i : i + frame_len]
-                            if len(chunk) == frame_len:
-                                if self.speech_agent.process_frame(chunk) >= 0:
-                                    self._wake_session_is_active = True
-                                    if self.on_transcription:
-                                         self.on_transcription({"sender": "System", "text": "[Wake Word Detected]"})
-                                    break
-                        if not self._wake_session_is_active: continue
+                        continue
 
                     if self._is_rex_speaking and self._mute_during_rex_speech:
                         if self._rex_speech_start_time and (time.time() - self._rex_speech_start_time) < self._mute_buffer_duration:
@@ -788,14 +860,21 @@ class AudioLoop:
                         if not self._is_speaking:
                             print(f"[REX DEBUG] VAD TRIGGERED (RMS: {rms})")
                             self._is_speaking = True
-                            if self._latest_image_payload and self.out_queue:
+                            self.playback.note_user_speech_onset()
+                            if self.frame_capture:
+                                # The newest frame is what the model sees as the user starts talking
+                                self.frame_capture.record_use()
+                                self.frame_capture.wake()
+                            if self._latest_image_payload and not self._latest_image_sent and self.out_queue:
                                 await self.out_queue.put(self._latest_image_payload)
+                                self._latest_image_sent = True
                     else:
                         if self._is_speaking:
                             if self._silence_start_time is None:
                                 self._silence_start_time = time.time()
                             elif time.time() - self._silence_start_time > SILENCE_DURATION:
                                 self._is_speaking = False
+                                self.latency.begin_turn(ago=time.time() - self._silence_start_time)
                                 self._silence_start_time = None
 
                     if self.wake_word_active and self._wake_session_is_active:
@@ -809,11 +888,7 @@ class AudioLoop:
             print(f"[CRITICAL] listen_audio crashed: {e}")
             traceback.print_exc()
         finally:
-            if hasattr(self, 'audio_stream') and self.audio_stream:
-                try: self.audio_stream.close() 
-                except: pass
-            if 'p' in locals():
-                p.terminate()
+            self._close_microphone()
 
     async def handle_cad_request(self, prompt):
         print(f"[REX DEBUG] [CAD] Background Task Started: handle_cad_request('{prompt}')")
@@ -1091,11 +1166,16 @@ class AudioLoop:
                 async for response in turn:
                     # 1. Handle Audio Data
                     if data := response.data:
-                        self.audio_in_queue.put_nowait(data)
+                        self.latency.mark("first_model_audio")
+                        self.audio_in_queue.put_nowait(self.playback.tag(data))
                         # NOTE: 'continue' removed here to allow processing transcription/tools in same packet
 
                     # 2. Handle Transcription (User & Model)
                     if response.server_content:
+                        if response.server_content.interrupted:
+                            # Server-side VAD detected the user before any transcript arrived
+                            self.clear_audio_queue()
+
                         if response.server_content.input_transcription:
                             transcript = response.server_content.input_transcription.text
                             if transcript:
@@ -1109,6 +1189,7 @@ class AudioLoop:
                                     
                                     # Only send if there's new text
                                     if delta:
+                                        self.latency.mark("first_transcript")
                                         # User is speaking, so interrupt model playback!
                                         self.clear_audio_queue()
 
@@ -1140,6 +1221,7 @@ class AudioLoop:
                                     
                                     # Only send if there's new text
                                     if delta:
+                                        self.latency.mark("first_transcript")
                                         # Send to frontend (Streaming)
                                         if self.on_transcription:
                                              self.on_transcription({"sender": "REX", "text": delta})
@@ -1180,6 +1262,7 @@ class AudioLoop:
                     # 3. Handle Tool Calls
                     if response.tool_call:
                         print("The tool was called")
+                        self.latency.tool_started()
                         function_responses = []
                         for fc in response.tool_call.function_calls:
                             if fc.name in ["generate_cad", "run_web_agent", "write_file", "read_directory", "read_file", "create_project", "switch_project", "list_projects", "list_smart_devices", "control_light", "discover_printers", "print_stl", "get_print_status", "iterate_cad", "analyze_stock", "nmap_scan", "generate_hacking_payload", "test_website_vulnerability", "locate_file", "list_calendar_events", "create_calendar_event", "desktop_click", "desktop_type", "desktop_scroll", "desktop_press_key", "launch_app", "close_app", "query_visual_history", "start_recording_macro", "stop_recording_macro", "replay_macro", "generate_dashboard"]:
@@ -1316,7 +1399,7 @@ class AudioLoop:
                                     if success:
                                         # Auto-switch and Index
                                         self.project_manager.switch_project(name)
-                                        asyncio.create_task(self.semantic_search.index_project(name, self.project_manager.get_current_project_path()))
+                                        await self.project_indexer.watch(name, self.project_manager.get_current_project_path())
                                         msg += f" Switched to '{name}' and indexing started."
                                         if self.on_project_update:
                                             self.on_project_update(name)
@@ -1333,7 +1416,7 @@ class AudioLoop:
                                         if self.on_project_update:
                                             self.on_project_update(name)
                                         # Auto-index switched project
-                                        asyncio.create_task(self.semantic_search.index_project(name, self.project_manager.get_current_project_path()))
+                                        await self.project_indexer.watch(name, self.project_manager.get_current_project_path())
                                         # Gather project context and send to AI (silently, no response expected)
                                         context = self.project_manager.get_project_context()
                                         print(f"[REX DEBUG] [PROJECT] Sending project context to AI ({len(context)} chars)")
@@ -1644,7 +1727,8 @@ class AudioLoop:
 
                                 elif fc.name == "get_desktop_screenshot":
                                     print(f"[REX DEBUG] [TOOL] Tool Call: 'get_desktop_screenshot'")
-                                    result = await self.desktop_agent.get_screenshot()
+                                    # JPEG capped at 1920px: what the Live API downsamples to anyway
+                                    result = await self.desktop_agent.get_screenshot(format="jpeg", quality=80, max_dimension=1920)
                                     if result:
                                         # For Vision, we send the content as part of the next turn or as a response?
                                         # In Multimodal Live, we usually put it in the out_queue for the next turn.
@@ -1772,7 +1856,8 @@ class AudioLoop:
                                 elif fc.name == "query_visual_history":
                                     query = fc.args["query"]
                                     print(f"[REX DEBUG] [TOOL] Tool Call: 'query_visual_history' '{query}'")
-                                    result = await self.visual_memory.query_memory(query) if self.visual_memory else "Visual Memory not initialized."
+                                    time_range_hours = fc.args.get("time_range_hours", 24)
+                                    result = await self.visual_memory.query_memory(query, time_range_hours=time_range_hours) if self.visual_memory else "Visual Memory not initialized."
                                     function_response = types.FunctionResponse(
                                         id=fc.id, name=fc.name, response={"result": result}
                                     )
@@ -1878,8 +1963,8 @@ class AudioLoop:
                                     if results:
                                         res_str = "Top semantic matches:\n"
                                         for r in results:
-                                            res_str += f"- {r['name']} (Score: {r['score']:.2f})\n"
-                                        # Optionally add snippets if Gemini needs them
+                                            res_str += f"- {r['path']}:{r['start_line']}-{r['end_line']} (Score: {r['score']:.2f})\n"
+                                            res_str += f"  {r['content_snippet']}\n"
                                     else:
                                         res_str = "No semantic matches found."
                                     
@@ -1889,9 +1974,11 @@ class AudioLoop:
                                     function_responses.append(function_response)
                         if function_responses:
                             await self.session.send_tool_response(function_responses=function_responses)
+                        self.latency.tool_finished()
                 
                 # Turn/Response Loop Finished
                 self.flush_chat()
+                self.latency.end_turn()
 
                 while not self.audio_in_queue.empty():
                     self.audio_in_queue.get_nowait()
@@ -1911,138 +1998,166 @@ class AudioLoop:
         try:
              # We don't open a stream here anymore. The Audio Process has the stream.
             
-            # Track when REX stops speaking (0.5 second timeout)
-            self._rex_speech_timer = None
-            
-            # Track when REX started speaking (for mute buffer)
-            self._rex_speech_start_time = None
-            
             print("[REX DEBUG] [AUDIO] Audio Playback Loop Started (Redirecting to buffers)")
             
             while True:
-                bytestream = await self.audio_in_queue.get()
+                generation, bytestream = await self.audio_in_queue.get()
                 
-                # Mark that REX is speaking
-                if not self._is_rex_speaking:
-                    self._is_rex_speaking = True
-                    self._rex_speech_start_time = time.time()
-                    print(f"[REX DEBUG] [AUDIO] REX started speaking at {self._rex_speech_start_time}")
+                # Chunk queued before an interruption: drop it without touching the engine
+                if not self.playback.is_current(generation):
+                    self.playback.drop_stale()
+                    continue
                 
-                # Cancel any existing timer
-                if self._rex_speech_timer:
-                    self._rex_speech_timer.cancel()
-                    self._rex_speech_timer = None
+                # Mark that REX is speaking (a single timer tracks when playback ends)
+                self.latency.mark("first_playback")
+                if self.playback.on_chunk_played(len(bytestream)):
+                    print(f"[REX DEBUG] [AUDIO] REX started speaking at {self._rex_speech_start_time}")
                 
                 if self.on_audio_data:
                     self.on_audio_data(bytestream)
                 
-                # Send to Process-Isolated Audio Engine
-                # This Put can fail if the process died!
+                # Send to Process-Isolated Audio Engine (copied straight into shared memory, no pickling)
                 try:
-                    self.audio_queue.put(bytestream)
+                    # No ring once the engine has failed for good (reported through on_error)
+                    if self.audio_ring is not None and self.audio_ring.write(bytestream) < len(bytestream):
+                        print(f"[REX DEBUG] [WARN] Audio ring full, dropped audio: {self.audio_ring.get_stats()}")
                 except Exception as e:
-                    print(f"[REX DEBUG] [ERR] Failed to put to audio_queue: {e}")
-                    # If queue is broken, maybe restart engine?
-                    # For now just log
-                
-                # Set a timer to mark REX as done speaking after 0.5 seconds of silence
-                async def mark_rex_finished():
-                    await asyncio.sleep(0.5)
-                    if self._is_rex_speaking:  # Check if still true
-                        self._is_rex_speaking = False
-                        self._rex_speech_start_time = None
-                        self._rex_speech_timer = None
-                        print("[REX DEBUG] [AUDIO] REX finished speaking")
-                
-                self._rex_speech_timer = asyncio.create_task(mark_rex_finished())
+                    print(f"[REX DEBUG] [ERR] Failed to write to audio_ring: {e}")
         except Exception as e:
             print(f"[REX DEBUG] [CRITICAL] play_audio crashed: {e}")
             traceback.print_exc()
             raise e
 
     async def video_loop(self):
+        loop = asyncio.get_running_loop()
+        new_frame = asyncio.Event()
+        # Grabs, gates and encodes on its own thread at an adaptive rate; we only forward results
+        capture = BackgroundFrameCapture(
+            self._grab_current_frame,
+            self.frame_gate,
+            self.frame_encoder,
+            is_active=lambda: self._is_speaking,
+            is_paused=lambda: self.paused or self.video_mode not in ("camera", "screen"),
+            on_frame=lambda seq: loop.call_soon_threadsafe(new_frame.set),
+            on_stop=self._release_capture_handles,
+        )
+        self.frame_capture = capture
+        capture.start()
+
+        async def send(payload):
+            if self.out_queue:
+                await self.out_queue.put(payload)
+
         try:
-            cap = None
-            while not self.stop_event.is_set():
-                if self.paused:
-                    await asyncio.sleep(0.1)
-                    continue
-            
-            if self.video_mode == "camera":
-                if cap is None:
-                    print("[REX DEBUG] [VISION] Opening camera for first time...")
-                    cap = await asyncio.to_thread(cv2.VideoCapture, 0)
-            elif self.video_mode == "screen":
-                if cap is not None:
-                    print("[REX DEBUG] [VISION] Closing camera to switch to screen...")
-                    cap.release()
-                    cap = None
-            
-            frame = await asyncio.to_thread(self._get_frame, cap)
-            if frame:
-                if self.out_queue:
-                    await self.out_queue.put(frame)
-            
-            # Wait for next frame (1 FPS is usually fine for Gemini Live)
-            await asyncio.sleep(1.0)
-            
+            # Capture runs up to 4 fps to keep the newest frame fresh; the model still gets at most 1 fps
+            await capture.forward(new_frame, send, min_interval=VIDEO_SEND_INTERVAL,
+                                  should_stop=self.stop_event.is_set)
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
             print(f"[REX DEBUG] [CRITICAL] video_loop crashed: {e}")
             traceback.print_exc()
-        
-        if cap:
-            cap.release()
+        finally:
+            # The camera and mss handles are released by the capture thread itself (on_stop)
+            capture.stop()
+            self._capture_mode = None
+
+    def _grab_current_frame(self):
+        """Capture-thread source: follows video_mode, opening/closing the camera on this thread."""
+        mode = self.video_mode
+        camera = getattr(self._capture_local, "camera", None)
+        if mode == "camera" and camera is None:
+            print("[REX DEBUG] [VISION] Opening camera for first time...")
+            camera = self._capture_local.camera = cv2.VideoCapture(0)
+        elif mode != "camera" and camera is not None:
+            print("[REX DEBUG] [VISION] Closing camera to switch to screen...")
+            self._release_camera()
+            camera = None
+        if mode != "screen":
+            self._release_screen_grabber()
+        if mode != self._capture_mode:
+            # New source: its first frame always goes through
+            self._capture_mode = mode
+            self.frame_gate.reset()
+        return self._grab_frame(camera)
+
+    def _screen_grabber(self):
+        """mss handle of the calling (capture) thread; mss handles can't be shared across threads."""
+        sct = getattr(self._capture_local, "sct", None)
+        if sct is None:
+            sct = self._capture_local.sct = mss.mss()
+        return sct
+
+    def _release_screen_grabber(self):
+        sct = getattr(self._capture_local, "sct", None)
+        if sct is not None:
+            self._capture_local.sct = None
+            sct.close()
+
+    def _release_camera(self):
+        camera = getattr(self._capture_local, "camera", None)
+        if camera is not None:
+            self._capture_local.camera = None
+            camera.release()
+
+    def _release_capture_handles(self):
+        """
+        Runs on the capture thread as it exits: closes the handles opened there. Thread-local, so a
+        thread outliving stop()'s join can't release the handles of the next session's thread.
+        """
+        self._release_screen_grabber()
+        self._release_camera()
 
-    def _get_frame(self, cap):
+    def _grab_frame(self, cap):
+        """Raw BGRA (screen) or BGR (camera) frame as a numpy array."""
         try:
             if self.video_mode == "screen":
-                # Screen Capture Mode
-                # Use DesktopAgent's SCT if available
-                sct = self.desktop_agent.sct if hasattr(self, 'desktop_agent') else mss.mss()
-                
-                # Capture monitor with active window
-                import pywinauto
-                try:
-                    active_window = pywinauto.Desktop(backend="uia").window(active_only=True)
-                    if active_window.exists():
-                        rect = active_window.rectangle()
-                        # Find which monitor contains the rectangle center
-                        cx, cy = rect.mid_point().x, rect.mid_point().y
-                        selected_monitor = sct.monitors[1] # Default to primary
-                        for m in sct.monitors[1:]:
-                            if m['left'] <= cx <= m['left'] + m['width'] and \
-                               m['top'] <= cy <= m['top'] + m['height']:
-                                selected_monitor = m
-                                break
-                    else:
-                        selected_monitor = sct.monitors[1]
-                except:
-                    selected_monitor = sct.monitors[1]
+                # Screen Capture Mode (DesktopAgent's handle belongs to the event loop thread)
+                sct = self._screen_grabber()
+
+                # Capture monitor with active window (cached lookup, defaults to primary)
+                selected_monitor = sct.monitors[self.window_tracker.monitor_index(sct.monitors)]
 
                 sct_img = sct.grab(selected_monitor)
-                
-                # Convert to PIL for processing
-                img = PIL.Image.fromarray(cv2.cvtColor(np.array(sct_img), cv2.COLOR_BGRA2RGB))
+                return np.asarray(sct_img)
             else:
                 # Camera Mode
                 if cap is None: return None
                 ret, frame = cap.read()
                 if not ret:
                     return None
-                frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                img = PIL.Image.fromarray(frame_rgb)
+                return frame
         except Exception as e:
             print(f"[REX DEBUG] [ERR] Frame capture failed: {e}")
             return None
 
-        # Standard processing (resize, compress)
-        img.thumbnail([1024, 1024])
-        image_io = io.BytesIO()
-        img.save(image_io, format="jpeg")
-        image_io.seek(0)
-        image_bytes = image_io.read()
-        return {"mime_type": "image/jpeg", "data": base64.b64encode(image_bytes).decode()}
+    def _ensure_audio_engine(self):
+        """Starts the playback engine if it isn't running healthy on the selected output device."""
+        registry = AudioDeviceRegistry.get()
+        if self.output_device_index is not None:
+            output_device = registry.get_device(self.output_device_index)
+        else:
+            output_device = registry.default_device('output')
+        self.audio_process, self.audio_ring = self.audio_engine.ensure(self.output_device_index, output_device)
+        self.playback.audio_ring = self.audio_ring
 
+    async def _audio_engine_watchdog(self, interval=1.0):
+        """Restarts a dead or hung AudioEngine mid-session instead of waiting for the next reconnect."""
+        while not self.stop_event.is_set():
+            await asyncio.sleep(interval)
+            # backoff: a restart is scheduled; failed: gave up and already reported
+            if self.audio_engine.state == "unhealthy":
+                print(f"[REX DEBUG] [AUDIO] Audio engine heartbeat lost: {self.audio_engine.get_stats()}")
+                # On the loop thread on purpose: play_audio must never write to a ring being closed
+                self._ensure_audio_engine()
+
+    def _on_audio_engine_failed(self, message):
+        print(f"[REX DEBUG] [AUDIO] {message}")
+        if self.on_error:
+            self.on_error(f"{message}. Check the selected output device.")
+
+    def get_audio_engine_stats(self):
+        return self.audio_engine.get_stats()
 
     async def run(self, start_message=None):
         retry_delay = 1
@@ -2056,16 +2171,13 @@ class AudioLoop:
                     print(f"[REX] Resolved output_device_index to {resolved_speaker_index} (matched '{self.output_device_name}')")
                     self.output_device_index = resolved_speaker_index
                 
-                # Guaranteed Engine Start (or restart) with resolved index
-                if self.audio_process:
-                     try:
-                         print("[REX] Stopping existing audio process for re-init...")
-                         self.audio_process.terminate()
-                     except: pass
-                
-                print(f"[REX] Starting Audio Engine for session with output_device_index={self.output_device_index}")
-                self.audio_process, self.audio_queue = create_audio_engine(output_device_index=self.output_device_index)
-                self.audio_process.start()
+                # Engine outlives reconnects: only (re)started on first run, device change or death
+                self._ensure_audio_engine()
+
+                # A new session has seen no frames yet
+                self.frame_gate.reset()
+                self.client_frame_gate.reset()
+                self._latest_image_sent = False
 
                 print(f"[REX DEBUG] [CONNECT] Connecting to Gemini Live API...")
                 
@@ -2090,6 +2202,7 @@ class AudioLoop:
 
                     tg.create_task(self.receive_audio())
                     tg.create_task(self.play_audio())
+                    tg.create_task(self._audio_engine_watchdog())
 
                     # Handle Startup vs Reconnect Logic
                     if not is_reconnect:
@@ -2106,8 +2219,8 @@ class AudioLoop:
                         if self.on_project_update and self.project_manager:
                             self.on_project_update(self.project_manager.current_project)
                         
-                        # Initial project indexing
-                        asyncio.create_task(self.semantic_search.index_project(self.project_manager.current_project, self.project_manager.get_current_project_path()))
+                        # Initial project indexing, then incremental re-indexing as files change
+                        await self.project_indexer.watch(self.project_manager.current_project, self.project_manager.get_current_project_path())
                     
                     else:
                         print(f"[REX DEBUG] [RECONNECT] Connection restored.")
@@ -2167,26 +2280,10 @@ class AudioLoop:
                         pass
 
 def get_input_devices():
-    p = pyaudio.PyAudio()
-    info = p.get_host_api_info_by_index(0)
-    numdevices = info.get('deviceCount')
-    devices = []
-    for i in range(0, numdevices):
-        if (p.get_device_info_by_host_api_device_index(0, i).get('maxInputChannels')) > 0:
-            devices.append((i, p.get_device_info_by_host_api_device_index(0, i).get('name')))
-    p.terminate()
-    return devices
+    return AudioDeviceRegistry.get().list_devices('input')
 
 def get_output_devices():
-    p = pyaudio.PyAudio()
-    info = p.get_host_api_info_by_index(0)
-    numdevices = info.get('deviceCount')
-    devices = []
-    for i in range(0, numdevices):
-        if (p.get_device_info_by_host_api_device_index(0, i).get('maxOutputChannels')) > 0:
-            devices.append((i, p.get_device_info_by_host_api_device_index(0, i).get('name')))
-    p.terminate()
-    return devices
+    return AudioDeviceRegistry.get().list_devices('output')
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
@@ -1,27 +1,94 @@
 import os
 import json
+import asyncio
 import sqlite3
 import numpy as np
+from collections import OrderedDict
+from datetime import datetime
 from pathlib import Path
 from google import genai
-from google.genai import types
+
+from code_chunker import chunk_text
+from embedding_cache import EmbeddingCache
+from embedding_pipeline import EmbeddingBatcher, IndexingPipeline
+from vector_index import VectorIndex
+
+SUPPORTED_EXTENSIONS = {'.py', '.js', '.jsx', '.ts', '.tsx', '.json', '.md', '.txt', '.css', '.html'}
+# Dependency/tool directories never worth indexing (hidden directories are skipped as well)
+IGNORED_DIRS = {'node_modules', '__pycache__', 'venv', 'env', 'site-packages'}
+
+
+def is_ignored_dir(name: str):
+    return name in IGNORED_DIRS or name.startswith('.')
+
+
+def scan_tree(root, max_bytes=None):
+    """
+    {path: mtime} of supported files under root, as one os.scandir walk (DirEntry.stat is served from
+    the directory listing on Windows) that never descends into ignored directories.
+    """
+    files = {}
+    stack = [str(root)]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if not is_ignored_dir(entry.name):
+                                stack.append(entry.path)
+                        elif os.path.splitext(entry.name)[1] in SUPPORTED_EXTENSIONS and entry.is_file():
+                            stat = entry.stat()
+                            # Generated bundles/data dumps; everything else is chunked, however large
+                            if max_bytes is None or stat.st_size <= max_bytes:
+                                files[entry.path] = stat.st_mtime
+                    except OSError as e:
+                        print(f"[SemanticSearch] Error scanning {entry.path}: {e}")
+        except OSError as e:
+            print(f"[SemanticSearch] Error scanning {directory}: {e}")
+    return files
+
 
 class SemanticSearchAgent:
     """
     Agent for semantic search within local project files.
-    Uses Gemini 'text-embedding-004' for generating embeddings
-    and SQLite for storage and retrieval.
+    Files are split into syntax-aware chunks (code_chunker), each embedded with
+    Gemini 'text-embedding-004' and stored in SQLite with its line/byte range.
+    Every stored embedding (chunks of all projects, interactions) goes through a shared
+    EmbeddingCache keyed by content hash, so unchanged text is never re-embedded; search
+    queries only go through a small in-memory LRU.
+    Searches run against in-memory VectorIndex matrices (one per project, plus
+    one for interactions) loaded from SQLite on first use and kept in step with
+    every write.
     """
-    def __init__(self, api_key: str, db_path: str = "semantic_search.db"):
+    QUERY_CACHE_SIZE = 128 # recent query embeddings kept in memory
+
+    def __init__(self, api_key: str, db_path: str = "semantic_search.db", client=None, batch_size=100, max_concurrency=4, commit_every=64,
+                 max_chunk_chars=4000, max_file_bytes=1_000_000):
         self.api_key = api_key
         self.db_path = db_path
-        self.client = genai.Client(api_key=api_key)
+        self.client = client or genai.Client(api_key=api_key)
         self._init_db()
+        self.cache = EmbeddingCache(db_path)
+        self.embedder = EmbeddingBatcher(self.client, batch_size=batch_size, max_concurrency=max_concurrency, cache=self.cache)
+        if self._seed_cache:
+            self._seed_cache_from_chunks()
+        self.commit_every = commit_every
+        self.max_chunk_chars = max_chunk_chars
+        self.max_file_bytes = max_file_bytes
+        self.on_progress = None # Optional async callback(progress dict) for indexing runs (Socket.IO)
+        self.last_index_run = None
+        self._indexes = {} # project -> VectorIndex of chunk embeddings (keyed by chunk id)
+        self._index_loads = [] # one change log per project index being loaded, see _project_index
+        self._interaction_index = None # VectorIndex of interaction_history (keyed by id)
+        self._query_embeddings = OrderedDict() # query -> vector, least recently used first
 
     def _init_db(self):
-        """Initializes the SQLite database for storing file embeddings."""
+        """Initializes the SQLite database: indexed files, their chunks, and interaction history."""
         conn = sqlite3.connect(self.db_path)
         c = conn.cursor()
+        # One row per indexed file (last_modified drives re-indexing); content/embedding are legacy whole-file columns
         c.execute('''CREATE TABLE IF NOT EXISTS file_embeddings
                      (path TEXT PRIMARY KEY,
                       project TEXT,
@@ -29,6 +96,30 @@ class SemanticSearchAgent:
                       embedding BLOB,
                       last_modified REAL)''')
         c.execute('''CREATE INDEX IF NOT EXISTS idx_project ON file_embeddings(project)''')
+
+        c.execute("SELECT name FROM sqlite_master WHERE type='table' AND name IN ('chunks', 'embedding_cache')")
+        existing = {row[0] for row in c.fetchall()}
+        has_chunks = 'chunks' in existing
+        self._seed_cache = has_chunks and 'embedding_cache' not in existing
+        c.execute('''CREATE TABLE IF NOT EXISTS chunks
+                     (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                      path TEXT,
+                      project TEXT,
+                      start_line INTEGER,
+                      end_line INTEGER,
+                      start_byte INTEGER,
+                      end_byte INTEGER,
+                      hash TEXT,
+                      content TEXT,
+                      embedding BLOB)''')
+        c.execute('''CREATE INDEX IF NOT EXISTS idx_chunks_path ON chunks(path)''')
+        c.execute('''CREATE INDEX IF NOT EXISTS idx_chunks_project ON chunks(project)''')
+        if not has_chunks:
+            # Whole-file rows (first 8000 chars) from before chunking: drop them and re-index on the next run
+            c.execute("SELECT COUNT(*) FROM file_embeddings WHERE embedding IS NOT NULL")
+            if c.fetchone()[0]:
+                print("[SemanticSearch] Migrating DB: whole-file embeddings replaced by chunks on next index run")
+                c.execute("UPDATE file_embeddings SET content = NULL, embedding = NULL, last_modified = 0")
         
         # New: Interaction History for LTM
         c.execute('''CREATE TABLE IF NOT EXISTS interaction_history
@@ -42,101 +133,305 @@ class SemanticSearchAgent:
         conn.commit()
         conn.close()
 
+    def _seed_cache_from_chunks(self):
+        # Chunks indexed before the cache existed were embedded with the same model
+        conn = sqlite3.connect(self.db_path)
+        rows = conn.execute("SELECT hash, embedding FROM chunks WHERE embedding IS NOT NULL").fetchall()
+        conn.close()
+        if rows:
+            print(f"[SemanticSearch] Seeding embedding cache with {len(rows)} existing chunks")
+            self.cache.seed(self.embedder.model, self.embedder.task_type, rows)
+
     async def get_embedding(self, text: str):
         """Generates an embedding for the given text using Gemini."""
         try:
-            # text-embedding-004 is current standard
-            result = self.client.models.embed_content(
-                model="models/text-embedding-004",
-                content=text,
-                config=types.EmbedContentConfig(task_type="RETRIEVAL_DOCUMENT")
-            )
-            return result.embeddings[0].values
+            # Served from the embedding cache when this exact text was embedded before; no retries, callers are interactive
+            vectors = await self.embedder.embed([text], max_retries=0)
+            return vectors[0]
         except Exception as e:
             print(f"[SemanticSearch] Embedding error: {e}")
             return None
 
-    async def index_project(self, project_name: str, project_path: str):
-        """Indexes all supported text files in the project."""
-        print(f"[SemanticSearch] Indexing project: {project_name} at {project_path}")
-        path = Path(project_path)
-        if not path.exists():
-            return
+    async def get_query_embedding(self, query: str):
+        """Embedding for a search query; repeated queries are answered from memory, never persisted."""
+        vector = self._query_embeddings.get(query)
+        if vector is not None:
+            self._query_embeddings.move_to_end(query)
+            return vector
+        try:
+            vector = (await self.embedder.embed([query], max_retries=0, cached=False))[0]
+        except Exception as e:
+            print(f"[SemanticSearch] Embedding error: {e}")
+            return None
+        if vector is not None:
+            self._query_embeddings[query] = vector
+            if len(self._query_embeddings) > self.QUERY_CACHE_SIZE:
+                self._query_embeddings.popitem(last=False)
+        return vector
 
-        supported_extensions = {'.py', '.js', '.jsx', '.ts', '.tsx', '.json', '.md', '.txt', '.css', '.html'}
-        
+    def _load_index(self, sql, params=()):
+        """Builds a VectorIndex from (key, embedding BLOB) rows in one pass."""
+        conn = sqlite3.connect(self.db_path)
+        c = conn.cursor()
+        c.execute(sql, params)
+        rows = c.fetchall()
+        conn.close()
+        index = VectorIndex()
+        if rows:
+            # Rows from a different embedding model (other width) can't be compared; keep the majority width
+            widths = [len(blob) for _, blob in rows]
+            width = max(set(widths), key=widths.count)
+            rows = [row for row, w in zip(rows, widths) if w == width]
+            matrix = np.frombuffer(b"".join(blob for _, blob in rows), dtype=np.float32).reshape(len(rows), -1)
+            index.bulk_load([key for key, _ in rows], matrix)
+        return index
+
+    async def _project_index(self, project_name: str):
+        index = self._indexes.get(project_name)
+        if index is not None:
+            return index
+        # Writes applied while the snapshot loads may or may not be in it; log them and replay on top
+        changes = []
+        self._index_loads.append(changes)
+        try:
+            index = await asyncio.to_thread(
+                self._load_index, "SELECT id, embedding FROM chunks WHERE project = ?", (project_name,))
+        finally:
+            self._index_loads.remove(changes)
+        if project_name in self._indexes:
+            # A concurrent load finished first and is already up to date
+            return self._indexes[project_name]
+        for project, removed, added in changes:
+            for chunk_id in removed:
+                index.remove(chunk_id)
+            if project == project_name:
+                for chunk_id, embedding in added:
+                    self._index_upsert(index, chunk_id, embedding)
+        self._indexes[project_name] = index
+        return index
+
+    async def _interactions(self):
+        if self._interaction_index is None:
+            self._interaction_index = await asyncio.to_thread(self._load_index, "SELECT id, embedding FROM interaction_history")
+        return self._interaction_index
+
+    def _index_upsert(self, index, key, embedding):
+        try:
+            index.upsert(key, embedding)
+        except ValueError as e:
+            print(f"[SemanticSearch] Skipping vector for {key}: {e}")
+
+    def _scan_changed(self, project_name: str, path: Path, files=None):
+        """
+        Diffs a {path: mtime} snapshot of the tree (scanned now unless given) against the stored mtimes.
+        Returns ([(Path, mtime)] new or modified, [path] indexed but gone).
+        """
+        if files is None:
+            files = scan_tree(path, self.max_file_bytes)
         conn = sqlite3.connect(self.db_path)
         c = conn.cursor()
+        c.execute("SELECT path, last_modified FROM file_embeddings WHERE project = ?", (project_name,))
+        indexed = dict(c.fetchall())
+        conn.close()
+
+        changed = [(Path(p), mtime) for p, mtime in files.items() if indexed.get(p) is None or indexed[p] < mtime]
+        deleted = [p for p in indexed if p not in files]
+        return changed, deleted
+
+    @staticmethod
+    def _read_file(file_path: Path):
+        # newline="" keeps "\r\n" as is, so chunk byte offsets match the file
+        with open(file_path, 'r', encoding='utf-8', errors='ignore', newline='') as f:
+            return f.read()
+
+    async def _produce_chunks(self, project_name: str, changed, run):
+        """Yields one pipeline item per chunk of each changed file; run["pending"] counts chunks left per file."""
+        for file_path, mtime in changed:
+            try:
+                content = await asyncio.to_thread(self._read_file, file_path)
+            except OSError as e:
+                print(f"[SemanticSearch] Error indexing {file_path}: {e}")
+                continue
+            chunks = chunk_text(file_path.suffix, content, max_chars=self.max_chunk_chars)
+            if not chunks:
+                run["empty"].append((str(file_path), mtime))
+                continue
+            run["pending"][str(file_path)] = len(chunks)
+            for chunk in chunks:
+                yield {"path": str(file_path), "mtime": mtime, "chunk": chunk, "text": chunk.text}
+
+    def _store_chunks(self, project_name: str, rows, run):
+        """
+        Writes one batch of (item, embedding) rows in a single transaction. The first batch touching a
+        file replaces its previous chunks; the file's mtime is recorded once all of its chunks are
+        stored, so a file with a failed chunk is picked up again by the next run.
+        Returns (removed chunk ids, [(new chunk id, embedding)]).
+        """
+        removed, added = [], []
+        conn = sqlite3.connect(self.db_path)
+        with conn:
+            c = conn.cursor()
+            for item, embedding in rows:
+                path, chunk = item["path"], item["chunk"]
+                if path not in run["cleared"]:
+                    run["cleared"].add(path)
+                    c.execute("SELECT id FROM chunks WHERE path = ?", (path,))
+                    removed.extend(row[0] for row in c.fetchall())
+                    c.execute("DELETE FROM chunks WHERE path = ?", (path,))
+                c.execute("""INSERT INTO chunks (path, project, start_line, end_line, start_byte, end_byte, hash, content, embedding)
+                             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                          (path, project_name, chunk.start_line, chunk.end_line, chunk.start_byte, chunk.end_byte,
+                           chunk.sha256, chunk.text, np.array(embedding, dtype=np.float32).tobytes()))
+                added.append((c.lastrowid, embedding))
+                run["pending"][path] -= 1
+                if run["pending"][path] == 0:
+                    c.execute("""INSERT OR REPLACE INTO file_embeddings (path, project, content, embedding, last_modified)
+                                 VALUES (?, ?, NULL, NULL, ?)""", (path, project_name, item["mtime"]))
+        conn.close()
+        return removed, added
 
-        for file_path in path.rglob('*'):
-            if file_path.is_file() and file_path.suffix in supported_extensions:
-                try:
-                    # Skip large files for now
-                    if file_path.stat().st_size > 50000:
-                        continue
-                        
-                    mtime = file_path.stat().st_mtime
-                    
-                    # Check if already indexed and up to date
-                    c.execute("SELECT last_modified FROM file_embeddings WHERE path = ?", (str(file_path),))
-                    result = c.fetchone()
-                    if result and result[0] >= mtime:
-                        continue
-
-                    print(f"[SemanticSearch] Processing: {file_path.name}")
-                    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                        content = f.read()
-
-                    embedding = await self.get_embedding(content[:8000]) # Limit content for embedding
-                    if embedding:
-                        # Convert list to float32 blob
-                        embedding_blob = np.array(embedding, dtype=np.float32).tobytes()
-                        c.execute("""INSERT OR REPLACE INTO file_embeddings 
-                                     (path, project, content, embedding, last_modified)
-                                     VALUES (?, ?, ?, ?, ?)""",
-                                  (str(file_path), project_name, content, embedding_blob, mtime))
-                        conn.commit()
-                except Exception as e:
-                    print(f"[SemanticSearch] Error indexing {file_path}: {e}")
+    def _clear_files(self, project_name: str, files):
+        """Records files that have no indexable text anymore; returns the ids of their old chunks."""
+        removed = []
+        conn = sqlite3.connect(self.db_path)
+        with conn:
+            c = conn.cursor()
+            for path, mtime in files:
+                c.execute("SELECT id FROM chunks WHERE path = ?", (path,))
+                removed.extend(row[0] for row in c.fetchall())
+                c.execute("DELETE FROM chunks WHERE path = ?", (path,))
+                c.execute("""INSERT OR REPLACE INTO file_embeddings (path, project, content, embedding, last_modified)
+                             VALUES (?, ?, NULL, NULL, ?)""", (path, project_name, mtime))
+        conn.close()
+        return removed
 
+    def _forget_files(self, paths):
+        """Deletes files and their chunks; returns the removed chunk ids."""
+        removed = []
+        conn = sqlite3.connect(self.db_path)
+        with conn:
+            c = conn.cursor()
+            for path in paths:
+                c.execute("SELECT id FROM chunks WHERE path = ?", (path,))
+                removed.extend(row[0] for row in c.fetchall())
+                c.execute("DELETE FROM chunks WHERE path = ?", (path,))
+                c.execute("DELETE FROM file_embeddings WHERE path = ?", (path,))
         conn.close()
-        print(f"[SemanticSearch] Indexing complete for {project_name}.")
+        return removed
+
+    async def remove_files(self, project_name: str, paths):
+        """Drops deleted (or no longer indexable) files from the database and the loaded index."""
+        paths = [str(p) for p in paths]
+        if not paths:
+            return 0
+        removed = await asyncio.to_thread(self._forget_files, paths)
+        self._apply_index_changes(project_name, removed, [])
+        print(f"[SemanticSearch] Removed {len(paths)} files ({len(removed)} chunks) from {project_name}")
+        return len(paths)
+
+    def _apply_index_changes(self, project_name: str, removed, added):
+        for changes in self._index_loads:
+            changes.append((project_name, removed, added))
+        # Chunk ids are unique across projects, so removals apply to every loaded index
+        for chunk_id in removed:
+            for index in self._indexes.values():
+                index.remove(chunk_id)
+        if project_name in self._indexes:
+            for chunk_id, embedding in added:
+                self._index_upsert(self._indexes[project_name], chunk_id, embedding)
+
+    async def _write_chunks(self, project_name: str, rows, run):
+        removed, added = await asyncio.to_thread(self._store_chunks, project_name, rows, run)
+        self._apply_index_changes(project_name, removed, added)
+
+    async def index_files(self, project_name: str, changed, on_progress=None):
+        """
+        Re-indexes the given [(Path, mtime)] files: they are read and chunked by a producer, chunks are
+        embedded in multi-input batches (several requests in flight) and written in transactions of
+        commit_every rows. Progress dicts go to on_progress (or self.on_progress) after every
+        transaction and once at the end.
+        """
+        callback = on_progress or self.on_progress
+
+        async def report(progress):
+            if callback:
+                await callback({"project": project_name, **progress})
+
+        run = {"pending": {}, "cleared": set(), "empty": []}
+        pipeline = IndexingPipeline(
+            self.embedder,
+            self._produce_chunks(project_name, changed, run),
+            lambda rows: self._write_chunks(project_name, rows, run),
+            commit_every=self.commit_every,
+            on_progress=report,
+        )
+        progress = await pipeline.run()
+        if run["empty"]:
+            self._apply_index_changes(project_name, await asyncio.to_thread(self._clear_files, project_name, run["empty"]), [])
+        self.last_index_run = {"project": project_name, **progress}
+        print(f"[SemanticSearch] Indexed {progress['written']} chunks from {len(changed)} files in {project_name} in {progress['elapsed_s']}s "
+              f"({progress['embedder']['requests']} embedding requests, {progress['failed']} failed).")
+        return progress
+
+    async def index_project(self, project_name: str, project_path: str, on_progress=None, files=None):
+        """
+        Full pass over a project: walks the tree (or uses the given {path: mtime} snapshot), indexes
+        files that are new or changed since the last run and removes files that no longer exist.
+        """
+        print(f"[SemanticSearch] Indexing project: {project_name} at {project_path}")
+        path = Path(project_path)
+        if not path.exists():
+            return
+
+        changed, deleted = await asyncio.to_thread(self._scan_changed, project_name, path, files)
+        print(f"[SemanticSearch] {len(changed)} new or modified, {len(deleted)} deleted files in {project_name}")
+        await self.remove_files(project_name, deleted)
+        return await self.index_files(project_name, changed, on_progress=on_progress)
 
     async def search(self, project_name: str, query: str, top_k: int = 5):
-        """Searches for project files conceptually similar to the query."""
-        query_embedding = await self.get_embedding(query)
-        if not query_embedding:
+        """
+        Searches for project code/text conceptually similar to the query.
+        Each result is a chunk: path plus the exact start_line/end_line span it covers.
+        """
+        query_embedding = await self.get_query_embedding(query)
+        if query_embedding is None:
             return []
 
-        query_vec = np.array(query_embedding, dtype=np.float32)
+        index = await self._project_index(project_name)
+        hits = index.search(query_embedding, top_k)
+        if not hits:
+            return []
 
+        # Only the top_k rows are read back from SQLite
         conn = sqlite3.connect(self.db_path)
         c = conn.cursor()
-        c.execute("SELECT path, content, embedding FROM file_embeddings WHERE project = ?", (project_name,))
-        rows = c.fetchall()
+        c.execute(f"SELECT id, path, start_line, end_line, content FROM chunks WHERE id IN ({','.join('?' * len(hits))})",
+                  [chunk_id for chunk_id, _ in hits])
+        rows = {row[0]: row[1:] for row in c.fetchall()}
         conn.close()
 
         results = []
-        for path, content, embedding_blob in rows:
-            doc_vec = np.frombuffer(embedding_blob, dtype=np.float32)
-            
-            # Simple Cosine Similarity
-            dot_product = np.dot(query_vec, doc_vec)
-            norm_q = np.linalg.norm(query_vec)
-            norm_d = np.linalg.norm(doc_vec)
-            
-            if norm_q > 0 and norm_d > 0:
-                score = dot_product / (norm_q * norm_d)
-                results.append({
-                    "path": path,
-                    "name": Path(path).name,
-                    "content_snippet": content[:200] + "...",
-                    "score": float(score)
-                })
-
-        # Sort by score
-        results.sort(key=lambda x: x["score"], reverse=True)
-        return results[:top_k]
+        for chunk_id, score in hits:
+            if chunk_id not in rows:
+                continue
+            path, start_line, end_line, content = rows[chunk_id]
+            results.append({
+                "path": path,
+                "name": Path(path).name,
+                "start_line": start_line,
+                "end_line": end_line,
+                "content_snippet": (content or "")[:200] + "...",
+                "score": score
+            })
+        return results
+
+    def get_stats(self):
+        return {
+            "projects_loaded": {name: index.get_stats() for name, index in self._indexes.items()},
+            "interactions": self._interaction_index.get_stats() if self._interaction_index is not None else None,
+            "embedder": self.embedder.get_stats(),
+            "last_index_run": self.last_index_run,
+        }
 
     async def log_interaction(self, query: str, tool_used: str, result: str):
         """Logs a user-AI interaction and its outcome for future conceptual retrieval."""
@@ -147,7 +442,7 @@ class SemanticSearchAgent:
         context_text = f"User Query: {query}\nTool: {tool_used}\nOutcome: {result}"
         embedding = await self.get_embedding(context_text[:8000])
         
-        if embedding:
+        if embedding is not None:
             embedding_blob = np.array(embedding, dtype=np.float32).tobytes()
             conn = sqlite3.connect(self.db_path)
             c = conn.cursor()
@@ -155,40 +450,39 @@ class SemanticSearchAgent:
                          (timestamp, query, tool_used, result, embedding)
                          VALUES (?, ?, ?, ?, ?)""",
                       (timestamp, query, tool_used, result, embedding_blob))
+            row_id = c.lastrowid
             conn.commit()
             conn.close()
+            if self._interaction_index is not None:
+                self._index_upsert(self._interaction_index, row_id, embedding)
 
     async def search_interactions(self, query: str, top_k: int = 3):
         """Concepts search through past user interactions."""
-        query_embedding = await self.get_embedding(query)
-        if not query_embedding:
+        query_embedding = await self.get_query_embedding(query)
+        if query_embedding is None:
+            return []
+
+        index = await self._interactions()
+        hits = index.search(query_embedding, top_k)
+        if not hits:
             return []
 
-        query_vec = np.array(query_embedding, dtype=np.float32)
         conn = sqlite3.connect(self.db_path)
         c = conn.cursor()
-        c.execute("SELECT query, tool_used, result, embedding FROM interaction_history")
-        rows = c.fetchall()
+        c.execute(f"SELECT id, query, tool_used, result FROM interaction_history WHERE id IN ({','.join('?' * len(hits))})",
+                  [row_id for row_id, _ in hits])
+        rows = {row[0]: row[1:] for row in c.fetchall()}
         conn.close()
 
-        results = []
-        for q, tool, res, embedding_blob in rows:
-            doc_vec = np.frombuffer(embedding_blob, dtype=np.float32)
-            dot_product = np.dot(query_vec, doc_vec)
-            norm_q = np.linalg.norm(query_vec)
-            norm_d = np.linalg.norm(doc_vec)
-            
-            if norm_q > 0 and norm_d > 0:
-                score = dot_product / (norm_q * norm_d)
-                results.append({
-                    "query": q,
-                    "tool": tool,
-                    "result": res,
-                    "score": float(score)
-                })
-
-        results.sort(key=lambda x: x["score"], reverse=True)
-        return results[:top_k]
+        return [
+            {
+                "query": rows[row_id][0],
+                "tool": rows[row_id][1],
+                "result": rows[row_id][2],
+                "score": score
+            }
+            for row_id, score in hits if row_id in rows
+        ]
 
 # Tool Definition for Gemini
 semantic_search_tools = [
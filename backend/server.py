@@ -89,6 +89,10 @@ kasa_agent = None # Deprecated global, use service_manager
 # Create a Socket.IO server
 sio = socketio.AsyncServer(async_mode='asgi', cors_allowed_origins='*')
 
+# Coalesced, binary model-audio stream for the frontend visualizers
+from audio_visualization import AudioVisualizationStream
+audio_viz = AudioVisualizationStream(sio)
+
 # Define Lifespan Manager (Replaces deprecated @app.on_event("startup"))
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -249,6 +253,7 @@ async def lifespan(app: FastAPI):
     
     # Register Semantic Search for LTM
     ss_agent = SemanticSearchAgent(api_key=os.getenv("GEMINI_API_KEY"))
+    ss_agent.on_progress = lambda progress: sio.emit('semantic_index_progress', progress)
     await service_manager.register_service("semantic_search", ss_agent)
     
     dispatcher = ToolDispatcher(service_manager)
@@ -375,7 +380,8 @@ DEFAULT_SETTINGS = {
     },
     "printers": [], 
     "kasa_devices": [],
-    "camera_flipped": False 
+    "camera_flipped": False,
+    "frame_change_threshold": 0.01 # Fraction of the frame that must change before a video frame is sent
 }
 
 SETTINGS = DEFAULT_SETTINGS.copy()
@@ -422,6 +428,7 @@ async def status():
 async def connect(sid, environ):
     print(f"Client connected: {sid}")
     await sio.emit('status', {'msg': 'Connected to R.E.X Backend'}, room=sid)
+    audio_viz.subscribe(sid)
 
     global authenticator
     
@@ -461,6 +468,21 @@ async def connect(sid, environ):
 @sio.event
 async def disconnect(sid):
     print(f"Client disconnected: {sid}")
+    audio_viz.unsubscribe(sid)
+
+@sio.event
+async def set_audio_visualization(sid, data=None):
+    """Opt in to a model-audio detail level.
+
+    Args:
+        data: dict with 'level' ('off' | 'envelope' | 'fft' | 'pcm') and optional 'bins' (default 64)
+    """
+    data = data or {}
+    try:
+        sub = audio_viz.subscribe(sid, data.get('level'), data.get('bins'))
+        await sio.emit('audio_visualization', sub, room=sid)
+    except ValueError as e:
+        await sio.emit('error', {'msg': str(e)}, room=sid)
 
 @sio.event
 async def switch_video_mode(sid, data):
@@ -515,9 +537,8 @@ async def start_audio(sid, data=None):
 
     # Callback to send audio data to frontend
     def on_audio_data(data_bytes):
-        # We need to schedule this on the event loop
-        # This is high frequency, so we might want to downsample or batch if it's too much
-        asyncio.create_task(sio.emit('audio_data', {'data': list(data_bytes)}))
+        # Batched onto a ~30 Hz frame timer and sent as binary; see AudioVisualizationStream
+        audio_viz.push(data_bytes)
 
     # Callback to send CAL data to frontend
     def on_cad_data(data):
@@ -745,6 +766,18 @@ async def start_audio(sid, data=None):
         await sio.emit('error', {'msg': f"Failed to start: {str(e)}"})
         audio_loop = None # Ensure we can try again
 
+@sio.event
+async def refresh_audio_devices(sid, data=None):
+    """Hot-plug signal from the frontend (navigator.mediaDevices 'devicechange')."""
+    from audio_devices import AudioDeviceRegistry
+    registry = AudioDeviceRegistry.get()
+    registry.notify_hotplug()
+    inputs = await asyncio.to_thread(registry.list_devices, 'input', None)
+    outputs = registry.list_devices('output', None)
+    # complete is False while open streams keep PortAudio from seeing the change yet
+    await sio.emit('audio_devices', {'inputs': inputs, 'outputs': outputs,
+                                     'complete': registry.last_refresh_complete}, room=sid)
+
 @sio.event
 async def set_barge_in_prevention(sid, data=None):
     """Enable or disable barge-in prevention (mute mic while REX speaks)
@@ -1476,6 +1509,27 @@ async def control_kasa(sid, data):
          print(f"Error controlling kasa: {e}")
          await sio.emit('error', {'msg': f"Kasa Control Error: {str(e)}"})
 
+@app.get("/latency")
+async def latency_endpoint():
+    """Voice turn latency percentiles (speech end -> transcript -> model audio -> playback, tool dispatch)."""
+    if not audio_loop:
+        return JSONResponse(content={"error": "Audio loop not running"}, status_code=503)
+    return audio_loop.get_latency_stats()
+
+@sio.event
+async def get_latency_stats(sid):
+    if audio_loop:
+        await sio.emit('latency_stats', audio_loop.get_latency_stats(), room=sid)
+    else:
+        await sio.emit('error', {'msg': "Audio loop not running"}, room=sid)
+
+@sio.event
+async def get_auth_stats(sid):
+    if authenticator:
+        await sio.emit('auth_stats', authenticator.get_stats(), room=sid)
+    else:
+        await sio.emit('error', {'msg': "Authenticator not initialized"}, room=sid)
+
 @app.get("/market_pulse")
 async def market_pulse_endpoint(request: Request):
     """Fetch live market data (Commodities, News)."""
@@ -1516,6 +1570,11 @@ async def update_settings(sid, data):
         SETTINGS["camera_flipped"] = data["camera_flipped"]
         print(f"[SERVER] Camera flip set to: {data['camera_flipped']}")
 
+    if "frame_change_threshold" in data:
+        SETTINGS["frame_change_threshold"] = float(data["frame_change_threshold"])
+        if audio_loop:
+            audio_loop.set_frame_change_threshold(SETTINGS["frame_change_threshold"])
+
     save_settings()
     # Broadcast new full settings
     await sio.emit('settings', SETTINGS)
@@ -0,0 +1,109 @@
+import numpy as np
+
+
+class VectorIndex:
+    """
+    In-memory cosine-similarity index: one contiguous, L2-normalized float32 matrix.
+    Rows are normalized once on insert, so a query is a single matrix-vector product followed by
+    np.argpartition for the top k. Capacity grows geometrically, so incremental upserts don't copy
+    the whole matrix each time; removal moves the last row into the hole (row order is not kept).
+    """
+    def __init__(self, dim=None, capacity=1024):
+        self.dim = dim
+        self._min_capacity = capacity
+        # No rows are allocated until the dimension is known
+        self._matrix = np.empty((capacity, dim) if dim else (0, 0), dtype=np.float32)
+        self._keys = []
+        self._rows = {} # key -> row
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, key):
+        return key in self._rows
+
+    @staticmethod
+    def _normalize(vector):
+        vector = np.asarray(vector, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else None
+
+    def _ensure_capacity(self, rows, dim):
+        capacity = self._matrix.shape[0]
+        if rows <= capacity:
+            return
+        grown = np.empty((max(rows, capacity * 2, self._min_capacity), dim), dtype=np.float32)
+        if self._keys:
+            grown[:len(self._keys)] = self._matrix[:len(self._keys)]
+        self._matrix = grown
+
+    def upsert(self, key, vector):
+        """Adds or replaces `key`. Zero vectors can't be ranked and are dropped. Returns True if stored."""
+        vector = self._normalize(vector)
+        if vector is None:
+            self.remove(key)
+            return False
+        if self.dim is None:
+            self.dim = vector.size
+        elif vector.size != self.dim:
+            raise ValueError(f"Vector has {vector.size} dimensions, index has {self.dim}")
+        row = self._rows.get(key)
+        if row is None:
+            row = len(self._keys)
+            self._ensure_capacity(row + 1, vector.size)
+            self._keys.append(key)
+            self._rows[key] = row
+        self._matrix[row] = vector
+        return True
+
+    def bulk_load(self, keys, matrix):
+        """Replaces the contents with `matrix` (n, dim) for `keys`; rows are normalized in one pass."""
+        matrix = np.asarray(matrix, dtype=np.float32).reshape(len(keys), -1)
+        norms = np.linalg.norm(matrix, axis=1)
+        keep = norms > 0
+        keys = [k for k, ok in zip(keys, keep) if ok]
+        self.dim = matrix.shape[1] if matrix.size else self.dim
+        self._matrix = np.empty((0, 0), dtype=np.float32)
+        self._keys = []
+        self._rows = {}
+        if not keys:
+            return 0
+        self._ensure_capacity(len(keys), matrix.shape[1])
+        np.divide(matrix[keep], norms[keep, None], out=self._matrix[:len(keys)])
+        self._keys = keys
+        self._rows = {k: i for i, k in enumerate(keys)}
+        return len(keys)
+
+    def remove(self, key):
+        row = self._rows.pop(key, None)
+        if row is None:
+            return False
+        last = len(self._keys) - 1
+        if row != last:
+            moved = self._keys[last]
+            self._matrix[row] = self._matrix[last]
+            self._keys[row] = moved
+            self._rows[moved] = row
+        self._keys.pop()
+        return True
+
+    def search(self, query, top_k=5):
+        """[(key, cosine similarity)] of the top_k closest rows, best first."""
+        n = len(self._keys)
+        query = self._normalize(query)
+        if n == 0 or query is None or query.size != self.dim or top_k <= 0:
+            return []
+        scores = self._matrix[:n] @ query
+        if top_k < n:
+            top = np.argpartition(scores, -top_k)[-top_k:]
+        else:
+            top = np.arange(n)
+        top = top[np.argsort(scores[top])[::-1]]
+        return [(self._keys[i], float(scores[i])) for i in top]
+
+    def get_stats(self):
+        return {
+            "vectors": len(self._keys),
+            "dim": self.dim,
+            "bytes": int(self._matrix.nbytes),
+        }
@@ -1,8 +1,8 @@
 import asyncio
-import base64
+import threading
 import mss
-import PIL.Image
-import io
+
+from frame_encoder import FrameEncoder
 
 class VisionService:
     """
@@ -13,25 +13,23 @@ class VisionService:
         self.settings = settings or {}
         self.video_mode = "screen" # screen | camera
         self._latest_image_payload = None
+        # Resize for performance and token reduction
+        self.encoder = FrameEncoder(max_size=(1280, 720), quality=70)
+        # mss handles are bound to the thread that opened them; keep one per worker thread
+        self._local = threading.local()
+
+    def _grab_and_encode(self):
+        sct = getattr(self._local, "sct", None)
+        if sct is None:
+            sct = self._local.sct = mss.mss()
+        monitor = sct.monitors[1] # Primary monitor
+        return self.encoder.encode_payload(sct.grab(monitor))
 
     async def capture_frame(self):
         """Captures the current screen and returns a base64 encoded JPG."""
         try:
-            with mss.mss() as sct:
-                monitor = sct.monitors[1] # Primary monitor
-                screenshot = await asyncio.to_thread(sct.grab, monitor)
-                
-                img = PIL.Image.frombytes("RGB", screenshot.size, screenshot.bgra, "raw", "BGRX")
-                
-                # Resize for performance and token reduction
-                img.thumbnail((1280, 720))
-                
-                buffer = io.BytesIO()
-                img.save(buffer, format="JPEG", quality=70)
-                b64_data = base64.b64encode(buffer.getvalue()).decode('utf-8')
-                
-                self._latest_image_payload = {"mime_type": "image/jpeg", "data": b64_data}
-                return self._latest_image_payload
+            self._latest_image_payload = await asyncio.to_thread(self._grab_and_encode)
+            return self._latest_image_payload
         except Exception as e:
             print(f"[VisionService] Error capturing frame: {e}")
             return None
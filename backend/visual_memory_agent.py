@@ -1,26 +1,79 @@
 import asyncio
+import re
 import sqlite3
 import time
-import base64
 import os
 from datetime import datetime
 from google import genai
 from google.genai import types
 
+from frame_archive import FrameArchive
+from local_ocr import LocalOCRTier
+from perceptual_hash import FrameDeduper, frame_signature_jpeg
+
+# Full-text index over visual_memory, kept in sync by triggers (external content: text isn't stored twice)
+FTS_SCHEMA = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS visual_memory_fts USING fts5(
+           window_title, content, content='visual_memory', content_rowid='rowid', tokenize='unicode61 remove_diacritics 2')""",
+    """CREATE TRIGGER IF NOT EXISTS visual_memory_ai AFTER INSERT ON visual_memory BEGIN
+           INSERT INTO visual_memory_fts(rowid, window_title, content) VALUES (new.rowid, new.window_title, new.content);
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS visual_memory_ad AFTER DELETE ON visual_memory BEGIN
+           INSERT INTO visual_memory_fts(visual_memory_fts, rowid, window_title, content) VALUES ('delete', old.rowid, old.window_title, old.content);
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS visual_memory_au AFTER UPDATE OF window_title, content ON visual_memory BEGIN
+           INSERT INTO visual_memory_fts(visual_memory_fts, rowid, window_title, content) VALUES ('delete', old.rowid, old.window_title, old.content);
+           INSERT INTO visual_memory_fts(rowid, window_title, content) VALUES (new.rowid, new.window_title, new.content);
+       END""",
+]
+
+
+def fts_query(text):
+    """
+    Turns free text into a safe FTS5 MATCH expression: every word must appear (prefix match),
+    so 'budget sprea' finds 'Budget spreadsheet.xlsx'. Returns None if there are no searchable words.
+    """
+    terms = re.findall(r"\w+", text.lower())
+    if not terms:
+        return None
+    return " ".join(f'"{t}"*' for t in terms)
+
 class VisualMemoryAgent:
     """
     Agent responsible for maintaining a 'Visual Memory' of the user's screen.
-    Periodically captures screenshots, performs OCR/Description via Gemini,
-    and stores them in a searchable SQLite database.
+    Periodically captures screenshots, extracts their text with local OCR (escalating to a
+    Gemini description when the text is too sparse), and stores them in a searchable SQLite database.
     """
-    def __init__(self, desktop_agent, db_path="visual_memory.db"):
+    def __init__(self, desktop_agent, db_path="visual_memory.db", buffer_dir=None, interval=30, retention_hours=24, client=None, dedupe_distance=4,
+                 segment_seconds=3600, archive_max_dimension=1280, ocr=None):
+        self.desktop_agent = desktop_agent
         self.desktop = desktop_agent
         self.db_path = db_path
+        self.buffer_dir = buffer_dir or os.path.join(os.path.dirname(os.path.abspath(db_path)), "visual_memory_frames")
+        self.interval = interval
+        self.retention_hours = retention_hours
+        self.client = client
         self.running = False
         self.capture_task = None
         self.history_buffer = [] # Stores recent frame metadata
         self.backoff_until = 0 # Timestamp to wait until for 429 errors
 
+        # Near-identical frames of the same window reuse the earlier frame's index instead of a new Gemini call
+        # (dedupe_distance: changed 64x64 grid cells still counted as the same screen)
+        self.deduper = FrameDeduper(max_distance=dedupe_distance)
+        self.frames_captured = 0
+        self.frames_indexed = 0
+        self.api_calls_saved = 0
+
+        # Indexing tiers: local OCR first, Gemini vision only for sparse frames or when a description is asked for
+        self.ocr = ocr or LocalOCRTier()
+        self.tier_stats = {tier: {"frames": 0, "total_ms": 0.0} for tier in ("local", "gemini", "unindexed")}
+
+        os.makedirs(self.buffer_dir, exist_ok=True)
+        self._init_db()
+        # Frames are appended to hourly segment files; retention drops whole segments
+        self.archive = FrameArchive(db_path, self.buffer_dir, segment_seconds=segment_seconds, max_dimension=archive_max_dimension)
+
     def _init_db(self):
         conn = sqlite3.connect(self.db_path)
         c = conn.cursor()
@@ -29,8 +82,11 @@ class VisualMemoryAgent:
         c.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='visual_memory'")
         if not c.fetchone():
              c.execute('''CREATE TABLE visual_memory
-                     (timestamp REAL, image_path TEXT, window_title TEXT, content TEXT)''')
+                     (timestamp REAL, image_path TEXT, window_title TEXT, content TEXT, signature BLOB, duplicate_of INTEGER,
+                      segment_id INTEGER, frame_offset INTEGER, frame_length INTEGER, index_tier TEXT)''')
              c.execute('''CREATE INDEX idx_timestamp ON visual_memory(timestamp)''')
+             # Retention deletes whole segments at a time
+             c.execute('''CREATE INDEX IF NOT EXISTS idx_segment ON visual_memory(segment_id)''')
         else:
             # Check for missing columns (Schema Migration)
             c.execute("PRAGMA table_info(visual_memory)")
@@ -44,12 +100,58 @@ class VisualMemoryAgent:
                 print("[VisualMemoryAgent] Migrating DB: Adding window_title column")
                 c.execute("ALTER TABLE visual_memory ADD COLUMN window_title TEXT")
 
+            if "duplicate_of" not in columns:
+                print("[VisualMemoryAgent] Migrating DB: Adding duplicate_of column")
+                c.execute("ALTER TABLE visual_memory ADD COLUMN duplicate_of INTEGER")
+
+            if "signature" not in columns:
+                # Replaces the 64-bit phash, which couldn't tell pages of text apart; old rows just aren't reused
+                print("[VisualMemoryAgent] Migrating DB: Adding signature column")
+                c.execute("ALTER TABLE visual_memory ADD COLUMN signature BLOB")
+
+            if "segment_id" not in columns:
+                # Rows from before the archive keep their per-file image_path until they expire
+                print("[VisualMemoryAgent] Migrating DB: Adding frame archive columns")
+                c.execute("ALTER TABLE visual_memory ADD COLUMN segment_id INTEGER")
+                c.execute("ALTER TABLE visual_memory ADD COLUMN frame_offset INTEGER")
+                c.execute("ALTER TABLE visual_memory ADD COLUMN frame_length INTEGER")
+            c.execute('''CREATE INDEX IF NOT EXISTS idx_segment ON visual_memory(segment_id)''')
+
+            if "index_tier" not in columns:
+                print("[VisualMemoryAgent] Migrating DB: Adding index_tier column")
+                c.execute("ALTER TABLE visual_memory ADD COLUMN index_tier TEXT")
+
+        c.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='visual_memory_fts'")
+        fts_exists = c.fetchone() is not None
+        for statement in FTS_SCHEMA:
+            c.execute(statement)
+        if not fts_exists:
+            c.execute("SELECT COUNT(*) FROM visual_memory")
+            if c.fetchone()[0]:
+                # Existing databases: index the rows captured before FTS was added
+                print("[VisualMemoryAgent] Migrating DB: Building full-text index")
+                c.execute("INSERT INTO visual_memory_fts(visual_memory_fts) VALUES ('rebuild')")
+
         conn.commit()
         conn.close()
 
+    def _load_recent_signatures(self):
+        """Seeds the deduper with the latest indexed (non-duplicate) frames so a restart doesn't re-index an unchanged screen."""
+        conn = sqlite3.connect(self.db_path)
+        c = conn.cursor()
+        c.execute("SELECT rowid, window_title, signature FROM visual_memory WHERE signature IS NOT NULL AND duplicate_of IS NULL "
+                  "ORDER BY timestamp DESC LIMIT ?", (self.deduper.per_title * self.deduper.max_titles,))
+        rows = c.fetchall()
+        conn.close()
+        for rowid, title, signature in reversed(rows):
+            self.deduper.add(title, signature, rowid)
+
     async def initialize(self, sio=None):
         self.running = True
         self.sio = sio # Socket.IO instance for alerts
+        if self.client is None:
+            self.client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
+        await asyncio.to_thread(self._load_recent_signatures)
         self.capture_task = asyncio.create_task(self._background_capture_loop())
         print(f"[VisualMemoryAgent] Initialized. Background loop running every {self.interval}s.")
 
@@ -58,17 +160,14 @@ class VisualMemoryAgent:
         await asyncio.sleep(10)
         while self.running:
             try:
-                if time.time() < self.backoff_until:
-                    await asyncio.sleep(10)
-                    continue
-
-                await self.record_current_screen()
+                # Rate-limited (backoff_until) frames are still captured and indexed by the local tier
+                is_new = await self.record_current_screen()
                 
-                # Active Visual Reasoning: Check for errors every few frames
-                if len(self.history_buffer) > 0:
+                # Active Visual Reasoning: Check for errors every few frames (a duplicate frame has nothing new to report)
+                if is_new and len(self.history_buffer) > 0:
                      await self._analyze_for_errors()
                 
-                await asyncio.sleep(30) # Increased to 30s to save free tier quota
+                await asyncio.sleep(self.interval) # 30s by default to save free tier quota
             except asyncio.CancelledError:
                 break
             except Exception as e:
@@ -101,36 +200,80 @@ class VisualMemoryAgent:
         except Exception as e:
             print(f"[VisualMemoryAgent] Error analysis failed: {e}")
 
-    async def record_current_screen(self):
-        """Captures screen, saves to buffer, and performs lightweight indexing."""
+    async def record_current_screen(self, describe=False):
+        """
+        Captures screen, appends it to the frame archive, and performs lightweight indexing.
+        describe=True asks Gemini for a semantic description even if local OCR found enough text.
+        Returns True if the frame was newly indexed, False if it was a near-duplicate or capture failed.
+        """
         try:
             timestamp = time.time()
             # 1. Capture Screenshot
-            screenshot = await self.desktop_agent.get_screenshot()
-            if not screenshot: return
+            screenshot = await self.desktop_agent.get_screenshot(format="jpeg", quality=70, max_dimension=1600, raw=True)
+            if not screenshot: return False
+            self.frames_captured += 1
 
             # 2. Get Window Info (Lightweight Indexing)
             window_info = await self.desktop_agent.get_active_window_info()
             window_title = window_info.get("title", "Unknown") if window_info else "Unknown"
 
-            # 3. Save Image to Disk
-            filename = f"frame_{int(timestamp)}.jpg"
-            filepath = os.path.join(self.buffer_dir, filename)
+            # Already JPEG bytes (raw=True), no base64 round-trip
+            img_data = screenshot["data"]
+
+            # 3. Frame signature: a near-identical frame of the same window reuses the earlier index
+            signature = await asyncio.to_thread(frame_signature_jpeg, img_data)
+            original_id = self.deduper.find(window_title, signature) if signature is not None else None
+            if original_id is not None and await asyncio.to_thread(self._insert_duplicate, timestamp, window_title, signature, original_id, img_data):
+                self.api_calls_saved += 1
+                return False
+
+            # 4. Append to the current archive segment (threaded: may re-encode and does file I/O)
+            segment_id, offset, length = await asyncio.to_thread(self.archive.append, timestamp, img_data)
+
+            # 5. Perform Visual Indexing (local OCR, then Gemini if needed)
+            content, tier = await self._index_frame(img_data, window_title, describe)
+            indexed = tier != "unindexed"
+
+            conn = sqlite3.connect(self.db_path)
+            c = conn.cursor()
+            c.execute("INSERT INTO visual_memory (timestamp, window_title, content, signature, segment_id, frame_offset, frame_length, index_tier) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                      (timestamp, window_title, content, signature, segment_id, offset, length, tier))
+            rowid = c.lastrowid
+            conn.commit()
+            conn.close()
+
+            # Only frames that were actually indexed may stand in for later duplicates
+            if indexed:
+                self.frames_indexed += 1
+                if signature is not None:
+                    self.deduper.add(window_title, signature, rowid)
             
-            # Decode and Save
-            # We need to save as efficient JPG
-            # The agent.get_screenshot return PNG b64. 
-            # Ideally we optimized this in desktop agent but we can convert here.
-            img_data = base64.b64decode(screenshot["data"])
+            # Maintain history_buffer
+            self.history_buffer.append({"ts": timestamp, "title": window_title, "content": content})
+            if len(self.history_buffer) > 10:
+                self.history_buffer.pop(0)
+
+            # 6. Drop expired segments
+            await asyncio.to_thread(self._cleanup)
+            return True
             
-            # Use threading for I/O
-            await asyncio.to_thread(self._save_image, filepath, img_data)
+        except Exception as e:
+            print(f"[VisualMemoryAgent] Capture error: {e}")
+            return False
+
+    async def _index_frame(self, img_data, window_title, describe=False):
+        """Returns (content, tier) where tier is 'local', 'gemini' or 'unindexed'."""
+        started = time.perf_counter()
+        text = await self.ocr.extract(img_data)
+        if self.ocr.is_sufficient(text) and not describe:
+            self._record_tier("local", started)
+            print(f"[VisualMemoryAgent] Indexed Frame (local OCR): {window_title} - {len(text)} chars")
+            return text, "local"
 
-            # 4. Perform Visual Indexing (Real implementation)
-            content = "Indexing failed"
+        if time.time() >= self.backoff_until:
+            started = time.perf_counter()
             try:
                 # Limit frequency of full OCR to save tokens/rate limits
-                # We can do full analysis every N frames or if window changes
                 analysis_prompt = """
                 Extract all visible text and describe the main activity on the screen.
                 Focus on:
@@ -141,9 +284,7 @@ class VisualMemoryAgent:
                 Return a concise summary for searching later.
                 """
                 
-                # Convert bytes to PIL for Gemini consumption or use raw bytes if supported
                 # client.models.generate_content supports bytes directly with mime_type
-                from google.genai import types
                 response = await asyncio.to_thread(
                     self.client.models.generate_content,
                     model="gemini-2.0-flash-exp",
@@ -154,7 +295,10 @@ class VisualMemoryAgent:
                 )
                 if response and response.text:
                     content = response.text.strip()
+                    self._record_tier("gemini", started)
                     print(f"[VisualMemoryAgent] Indexed Frame: {window_title} - {content[:50]}...")
+                    # Keep the local text too: exact strings the description may have summarized away
+                    return (f"{content}\n\n{text}" if text else content), "gemini"
             except Exception as e:
                 print(f"[VisualMemoryAgent] Indexing error: {e}")
                 if "RESOURCE_EXHAUSTED" in str(e).upper() or "429" in str(e):
@@ -162,76 +306,153 @@ class VisualMemoryAgent:
                     print("[VisualMemoryAgent] 429 Detected. Backing off for 60s...")
                     self.backoff_until = time.time() + 60
 
-            c.execute("INSERT INTO visual_memory (timestamp, image_path, window_title, content) VALUES (?, ?, ?, ?)",
-                      (timestamp, filepath, window_title, content))
-            conn.commit()
-            conn.close()
-            
-            # Maintain history_buffer
-            self.history_buffer.append({"ts": timestamp, "title": window_title, "content": content})
-            if len(self.history_buffer) > 10:
-                self.history_buffer.pop(0)
+        # Offline or rate-limited: sparse local text is still better than nothing
+        if text:
+            self._record_tier("local", started)
+            return text, "local"
+        self._record_tier("unindexed", started)
+        return "Indexing failed", "unindexed"
 
-            # 6. Cleanup Old Files
-            await self._cleanup()
-            
-        except Exception as e:
-            print(f"[VisualMemoryAgent] Capture error: {e}")
+    def _record_tier(self, tier, started):
+        stats = self.tier_stats[tier]
+        stats["frames"] += 1
+        stats["total_ms"] += (time.perf_counter() - started) * 1000
 
-    def _save_image(self, filepath, data):
-        with open(filepath, "wb") as f:
-            f.write(data)
+    def _insert_duplicate(self, timestamp, window_title, signature, original_id, img_data):
+        """
+        Records a duplicate frame with the original's content. False if the original is gone.
+        Within the original's segment the row also points at the original's bytes; in a later segment the
+        frame is archived again, so every row lives in the segment of its own timestamp and expires with it.
+        """
+        conn = sqlite3.connect(self.db_path)
+        c = conn.cursor()
+        c.execute("SELECT timestamp, content, segment_id, frame_offset, frame_length FROM visual_memory WHERE rowid = ?", (original_id,))
+        row = c.fetchone()
+        if row:
+            original_ts, content, segment_id, offset, length = row
+            if segment_id is None or self.archive.segment_start(original_ts) != self.archive.segment_start(timestamp):
+                segment_id, offset, length = self.archive.append(timestamp, img_data)
+            c.execute("INSERT INTO visual_memory (timestamp, window_title, content, signature, duplicate_of, segment_id, frame_offset, frame_length) "
+                      "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                      (timestamp, window_title, content, signature, original_id, segment_id, offset, length))
+            conn.commit()
+        conn.close()
+        return row is not None
+
+    def load_frame(self, frame_id):
+        """JPEG bytes of a frame (rowid, as listed by query_memory), or None if it has expired."""
+        conn = sqlite3.connect(self.db_path)
+        c = conn.cursor()
+        c.execute("SELECT image_path, segment_id, frame_offset, frame_length FROM visual_memory WHERE rowid = ?", (frame_id,))
+        row = c.fetchone()
+        conn.close()
+        if not row:
+            return None
+        image_path, segment_id, offset, length = row
+        if segment_id is not None:
+            return self.archive.read(segment_id, offset, length)
+        if image_path and os.path.exists(image_path):
+            with open(image_path, "rb") as f:
+                return f.read()
+        return None
 
-    async def _cleanup(self):
-        """Removes entries older than retention period."""
+    def _cleanup(self):
+        """Removes entries older than retention period: whole archive segments, plus any pre-archive frame files."""
         cutoff = time.time() - (self.retention_hours * 3600)
+        expired = self.archive.expired_segments(cutoff)
         conn = sqlite3.connect(self.db_path)
         c = conn.cursor()
-        
-        # Get files to delete
-        c.execute("SELECT image_path FROM visual_memory WHERE timestamp < ?", (cutoff,))
-        rows = c.fetchall()
-        
-        for row in rows:
+        if expired:
+            c.executemany("DELETE FROM visual_memory WHERE segment_id = ?", [(segment_id,) for segment_id, _ in expired])
+
+        # Legacy rows (one JPEG per frame); duplicates share the original's file, keep it while a newer row points at it
+        c.execute("SELECT DISTINCT image_path FROM visual_memory WHERE timestamp < ? AND segment_id IS NULL AND image_path IS NOT NULL "
+                  "AND image_path NOT IN (SELECT image_path FROM visual_memory WHERE timestamp >= ? AND image_path IS NOT NULL)", (cutoff, cutoff))
+        for (path,) in c.fetchall():
             try:
-                if os.path.exists(row[0]):
-                    os.remove(row[0])
-            except: pass
-            
-        c.execute("DELETE FROM visual_memory WHERE timestamp < ?", (cutoff,))
+                if os.path.exists(path):
+                    os.remove(path)
+            except OSError: pass
+        c.execute("DELETE FROM visual_memory WHERE timestamp < ? AND segment_id IS NULL", (cutoff,))
         conn.commit()
         conn.close()
+        self.archive.drop_segments(expired)
 
-    async def query_memory(self, query, time_range_hours=24):
+    def search(self, query, start_time=None, end_time=None, limit=10):
         """
-        Search for content in memory within a certain time window.
+        BM25-ranked full-text search (window title weighted over content) within [start_time, end_time].
+        Duplicate frames collapse into their original, reported at the latest time they were on screen.
+        Returns dicts with timestamp, frame_id (for load_frame), image_path (pre-archive rows only), window_title,
+        snippet (matches in [brackets]) and score.
         """
-        start_time = time.time() - (time_range_hours * 3600)
+        match = fts_query(query)
+        if match is None:
+            return []
         conn = sqlite3.connect(self.db_path)
         c = conn.cursor()
-        
-        # Simple LIKE search for now
-        # Search window titles OR content (if indexed)
-        c.execute("SELECT timestamp, image_path, window_title, content FROM visual_memory WHERE timestamp > ? AND (window_title LIKE ? OR content LIKE ?) ORDER BY timestamp DESC LIMIT 10",
-                  (start_time, f"%{query}%", f"%{query}%"))
-        results = c.fetchall()
+        # Per frame, snippet/title/image_path come from its best-ranked row (ROW_NUMBER), the timestamp from its
+        # latest one. The window functions also keep SQLite from flattening the FTS query (bm25/snippet need
+        # the MATCH context) without needing WITH ... AS MATERIALIZED (SQLite >= 3.35)
+        c.execute("""
+            SELECT last_seen, frame, image_path, window_title, snippet, score FROM (
+                SELECT frame, image_path, window_title, snippet, score,
+                       MAX(timestamp) OVER (PARTITION BY frame) AS last_seen,
+                       ROW_NUMBER() OVER (PARTITION BY frame ORDER BY score, timestamp DESC) AS rank
+                FROM (
+                    SELECT v.timestamp, v.image_path, v.window_title, COALESCE(v.duplicate_of, v.rowid) AS frame,
+                           snippet(visual_memory_fts, 1, '[', ']', '...', 16) AS snippet,
+                           bm25(visual_memory_fts, 2.0, 1.0) AS score
+                    FROM visual_memory_fts
+                    JOIN visual_memory v ON v.rowid = visual_memory_fts.rowid
+                    WHERE visual_memory_fts MATCH ? AND v.timestamp >= ? AND v.timestamp <= ?
+                )
+            )
+            WHERE rank = 1
+            ORDER BY score
+            LIMIT ?""",
+            (match, start_time if start_time is not None else 0, end_time if end_time is not None else time.time(), limit))
+        rows = c.fetchall()
         conn.close()
+        return [
+            {"timestamp": ts, "frame_id": frame, "image_path": img_path, "window_title": title, "snippet": snippet, "score": round(-score, 3)}
+            for ts, frame, img_path, title, snippet, score in rows
+        ]
+
+    async def query_memory(self, query, time_range_hours=24):
+        """
+        Search for content in memory within a certain time window.
+        """
+        start_time = time.time() - (time_range_hours * 3600)
+        results = await asyncio.to_thread(self.search, query, start_time)
         
         if not results:
-            return f"I couldn't find anything related to '{query}' in my visual memory (last {time_range_hours}h). Searched window titles."
+            return f"I couldn't find anything related to '{query}' in my visual memory (last {time_range_hours}h). Searched window titles and screen text."
         
         memos = []
-        for ts, img_path, title, content in results:
-            dt = datetime.fromtimestamp(ts).strftime('%I:%M:%S %p')
-            # If content is empty, maybe we should offer to analyze it?
-            # For now just list it.
-            snippet = content[:200] if content else "(Visual Frame)"
-            memos.append(f"[{dt}] Window: '{title}' - {snippet}\n   Path: {img_path}")
+        for r in results:
+            dt = datetime.fromtimestamp(r["timestamp"]).strftime('%I:%M:%S %p')
+            snippet = r["snippet"] or "(Visual Frame)"
+            memos.append(f"[{dt}] Window: '{r['window_title']}' - {snippet}\n   Frame: #{r['frame_id']}")
             
         return "\n".join(memos) + "\n\nTip: I can analyze specific frames if you ask."
 
+    def get_stats(self):
+        return {
+            "frames_captured": self.frames_captured,
+            "frames_indexed": self.frames_indexed,
+            "api_calls_saved": self.api_calls_saved,
+            "dedupe": self.deduper.get_stats(),
+            "archive": self.archive.get_stats(),
+            "ocr": self.ocr.get_stats(),
+            "tiers": {
+                tier: {"frames": st["frames"], "mean_ms": round(st["total_ms"] / st["frames"], 1) if st["frames"] else 0.0}
+                for tier, st in self.tier_stats.items()
+            },
+        }
+
     async def shutdown(self):
         self.running = False
         if self.capture_task:
             self.capture_task.cancel()
+        self.ocr.shutdown()
         print("[VisualMemoryAgent] Shutdown complete.")
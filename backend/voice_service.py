@@ -1,10 +1,11 @@
 import asyncio
 import os
 import time
-import struct
-import math
 import traceback
 import pyaudio
+from audio_analysis import AudioAnalyzer
+from audio_capture import MicrophoneCapture
+from audio_devices import AudioDeviceRegistry
 
 class VoiceService:
     """
@@ -26,12 +27,14 @@ class VoiceService:
         self.channels = 1
         self.rate = 16000
         self.chunk_size = 1024
+        self.capture = MicrophoneCapture(chunk_size=self.chunk_size)
         
         # VAD State
         self.vad_threshold = self.settings.get("vad_threshold", 100)
         self.silence_duration = 0.5
         self._is_speaking = False
         self._silence_start_time = None
+        self.audio_analyzer = AudioAnalyzer()
         
         # Device Config
         self.input_device_index = self.settings.get("input_device_index")
@@ -39,19 +42,17 @@ class VoiceService:
 
     async def start(self, out_queue=None):
         self.running = True
-        self.p = pyaudio.PyAudio()
-        
         device_index = self._resolve_device()
+        # The registry's shared instance, so device refreshes know a stream is open on it
+        self.p = AudioDeviceRegistry.get().acquire()
         
         try:
-            self.audio_stream = await asyncio.to_thread(
-                self.p.open,
+            self.audio_stream = await self.capture.start(
+                self.p,
                 format=self.format,
                 channels=self.channels,
                 rate=self.rate,
-                input=True,
                 input_device_index=device_index,
-                frames_per_buffer=self.chunk_size,
             )
         except Exception as e:
             print(f"[VoiceService] ERROR: Failed to open audio stream: {e}")
@@ -62,19 +63,16 @@ class VoiceService:
     async def _listen_loop(self, out_queue):
         while self.running:
             if self.paused:
+                self.capture.clear()
                 await asyncio.sleep(0.1)
                 continue
             
             try:
-                data = await asyncio.to_thread(self.audio_stream.read, self.chunk_size, exception_on_overflow=False)
+                data = await self.capture.read()
                 
                 # RMS Calculation
-                count = len(data) // 2
-                shorts = struct.unpack(f"<{count}h", data) if count > 0 else []
-                rms = 0
-                if count > 0:
-                    sum_squares = sum(s**2 for s in shorts)
-                    rms = int(math.sqrt(sum_squares / count))
+                levels = self.audio_analyzer.analyze(data)
+                rms = levels.rms
                 
                 if out_queue:
                     await out_queue.put({"data": data, "mime_type": "audio/pcm"})
@@ -99,17 +97,20 @@ class VoiceService:
                 await asyncio.sleep(0.1)
 
     def _resolve_device(self):
-        """Simple device resolver based on index or name."""
+        """Device resolver based on index or name (via the shared device registry)."""
         if self.input_device_index is not None:
             return self.input_device_index
+        if self.input_device_name:
+            return AudioDeviceRegistry.get().resolve_index(self.input_device_name, kind='input')
         return None # Default
 
     async def stop(self):
         self.running = False
-        if self.audio_stream:
-            self.audio_stream.close()
+        self.capture.close()
+        self.audio_stream = None
         if self.p:
-            self.p.terminate()
+            self.p = None
+            AudioDeviceRegistry.get().release()
 
     def set_paused(self, paused):
         self.paused = paused
@@ -0,0 +1,116 @@
+import time
+from collections import deque
+
+import numpy as np
+
+from audio_analysis import PCM16, pcm16_view
+
+
+class WakeWordStage:
+    """
+    Frame-aligned wake-word detection fed straight from the microphone capture thread.
+    Porcupine needs fixed-size frames (typically 512 samples) while the mic delivers 1024-sample
+    chunks at arbitrary alignment, so leftover samples are carried across chunks instead of dropped.
+    Whole frames inside a chunk are passed as zero-copy int16 views; only frames spanning a chunk
+    boundary are assembled in a preallocated buffer.
+    """
+    def __init__(self, speech_agent, is_armed=None, on_detect=None, default_frame_length=512, timing_window=512):
+        self.speech_agent = speech_agent
+        self.is_armed = is_armed or (lambda: True)
+        self.on_detect = on_detect
+        self.default_frame_length = default_frame_length
+
+        self._frame = None
+        self._fill = 0
+        self._was_armed = False
+        # After a detection, stay quiet until the owner has actually disarmed us (it does so on another thread)
+        self._awaiting_disarm = False
+
+        # Per-frame processing cost of idle listening
+        self.frames_processed = 0
+        self.detections = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self._recent_ns = deque(maxlen=timing_window)
+
+    @property
+    def frame_length(self):
+        porcupine = getattr(self.speech_agent, "porcupine", None)
+        return porcupine.frame_length if porcupine else self.default_frame_length
+
+    def reset(self):
+        """Drops carried-over samples (e.g. when re-arming after a wake session ends)."""
+        self._fill = 0
+
+    def feed(self, data):
+        """
+        Processes one capture chunk (bytes or int16 array). Runs on the capture thread.
+        Returns the detected keyword index, or -1.
+        """
+        armed = self.is_armed()
+        if self._awaiting_disarm:
+            if armed:
+                return -1
+            self._awaiting_disarm = False
+        if not armed or getattr(self.speech_agent, "porcupine", None) is None:
+            self._was_armed = False
+            return -1
+        if not self._was_armed:
+            self._was_armed = True
+            self.reset()
+
+        samples = pcm16_view(data)
+        frame_len = self.frame_length
+        if self._frame is None or len(self._frame) != frame_len:
+            self._frame = np.empty(frame_len, dtype=PCM16)
+            self._fill = 0
+
+        pos = 0
+        total = len(samples)
+        while pos < total:
+            if self._fill == 0 and total - pos >= frame_len:
+                # Whole frame available in this chunk: hand over a view, no copy
+                frame = samples[pos:pos + frame_len]
+                pos += frame_len
+            else:
+                take = min(frame_len - self._fill, total - pos)
+                self._frame[self._fill:self._fill + take] = samples[pos:pos + take]
+                self._fill += take
+                pos += take
+                if self._fill < frame_len:
+                    break
+                frame = self._frame
+                self._fill = 0
+
+            result = self._process(frame)
+            if result >= 0:
+                self.detections += 1
+                # Audio after the keyword belongs to the command, not to the next detection
+                self.reset()
+                self._was_armed = False
+                self._awaiting_disarm = True
+                if self.on_detect:
+                    self.on_detect(result)
+                return result
+        return -1
+
+    def _process(self, frame):
+        started = time.perf_counter_ns()
+        result = self.speech_agent.process_frame(frame)
+        elapsed = time.perf_counter_ns() - started
+        self.frames_processed += 1
+        self.total_ns += elapsed
+        self.max_ns = max(self.max_ns, elapsed)
+        self._recent_ns.append(elapsed)
+        return result
+
+    def get_stats(self):
+        # list() snapshots the deque in one step; iterating it while the capture thread appends would raise
+        recent = np.array(list(self._recent_ns), dtype=np.int64) if self._recent_ns else None
+        return {
+            "frames_processed": self.frames_processed,
+            "detections": self.detections,
+            "mean_us": round(self.total_ns / self.frames_processed / 1000, 1) if self.frames_processed else 0.0,
+            "p95_us": round(float(np.percentile(recent, 95)) / 1000, 1) if recent is not None else 0.0,
+            "max_us": round(self.max_ns / 1000, 1),
+        }
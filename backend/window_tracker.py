@@ -0,0 +1,293 @@
+import os
+import threading
+import time
+from dataclasses import dataclass, asdict
+from typing import Optional
+
+
+@dataclass
+class WindowInfo:
+    """Geometry of the focused window in virtual-desktop coordinates."""
+    title: str
+    left: int
+    top: int
+    right: int
+    bottom: int
+    process_id: Optional[int] = None
+
+    @property
+    def center(self):
+        return (self.left + self.right) // 2, (self.top + self.bottom) // 2
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class WindowBackend:
+    """Platform hook: returns the focused window, or None if unknown."""
+    def active_window(self) -> Optional[WindowInfo]:
+        return None
+
+
+class UIAWindowBackend(WindowBackend):
+    """Windows UI Automation via pywinauto (queries take tens of milliseconds)."""
+    def __init__(self):
+        from pywinauto import Desktop
+        self.desktop = Desktop(backend="uia")
+
+    def active_window(self):
+        window = self.desktop.window(active_only=True)
+        if not window.exists():
+            return None
+        rect = window.rectangle()
+        return WindowInfo(
+            title=window.window_text(),
+            left=rect.left, top=rect.top, right=rect.right, bottom=rect.bottom,
+            process_id=window.process_id(),
+        )
+
+
+class FakeWindowBackend(WindowBackend):
+    """Deterministic backend for tests; set `.window` to simulate focus changes."""
+    def __init__(self, window=None):
+        self.window = window
+        self.queries = 0
+
+    def active_window(self):
+        self.queries += 1
+        return self.window
+
+
+class FocusHook:
+    """Platform hook: calls `callback` (from any thread) when the foreground window changes."""
+    def start(self, callback) -> bool:
+        """Returns True if events will be delivered."""
+        return False
+
+    def stop(self):
+        pass
+
+
+class WinEventFocusHook(FocusHook):
+    """
+    SetWinEventHook for foreground changes and the end of window moves/minimizes (the window may now
+    sit on another monitor). Keyboard moves (Win+Shift+Arrow, snapping) only raise LOCATIONCHANGE,
+    which fires for every caret and child-control move too, so it is forwarded only for the current
+    foreground window itself. Out-of-context hooks are delivered to the thread that registered them,
+    so registration and the message loop live on a dedicated thread.
+    """
+    EVENT_SYSTEM_FOREGROUND = 0x0003
+    EVENT_OBJECT_LOCATIONCHANGE = 0x800B
+    EVENTS = (
+        EVENT_SYSTEM_FOREGROUND,
+        0x000B, # EVENT_SYSTEM_MOVESIZEEND
+        0x0017, # EVENT_SYSTEM_MINIMIZEEND
+        EVENT_OBJECT_LOCATIONCHANGE,
+    )
+
+    def __init__(self):
+        self._thread = None
+        self._thread_id = None
+        self._proc = None # keeps the ctypes callback alive while hooks exist
+
+    def start(self, callback):
+        ready = threading.Event()
+        result = {}
+        self._thread = threading.Thread(target=self._run, args=(callback, ready, result), name="FocusHook", daemon=True)
+        self._thread.start()
+        ready.wait(2.0)
+        return result.get("ok", False)
+
+    def _run(self, callback, ready, result):
+        import ctypes
+        from ctypes import wintypes
+        user32 = ctypes.windll.user32
+        kernel32 = ctypes.windll.kernel32
+        WINEVENTPROC = ctypes.WINFUNCTYPE(None, wintypes.HANDLE, wintypes.DWORD, wintypes.HWND,
+                                          wintypes.LONG, wintypes.LONG, wintypes.DWORD, wintypes.DWORD)
+        user32.SetWinEventHook.restype = wintypes.HANDLE
+        user32.SetWinEventHook.argtypes = [wintypes.DWORD, wintypes.DWORD, wintypes.HMODULE, WINEVENTPROC,
+                                           wintypes.DWORD, wintypes.DWORD, wintypes.DWORD]
+        user32.UnhookWinEvent.argtypes = [wintypes.HANDLE]
+        user32.GetForegroundWindow.restype = wintypes.HWND
+        foreground = [user32.GetForegroundWindow()]
+
+        def on_event(hook, event, hwnd, id_object, id_child, thread, time_ms):
+            if id_object != 0 or id_child != 0: # OBJID_WINDOW, CHILDID_SELF
+                return
+            if event == self.EVENT_SYSTEM_FOREGROUND:
+                foreground[0] = hwnd
+            elif event == self.EVENT_OBJECT_LOCATIONCHANGE and hwnd != foreground[0]:
+                return
+            callback()
+
+        self._proc = WINEVENTPROC(on_event)
+        self._thread_id = kernel32.GetCurrentThreadId()
+        # WINEVENT_OUTOFCONTEXT (0) | WINEVENT_SKIPOWNPROCESS (2)
+        hooks = [user32.SetWinEventHook(e, e, None, self._proc, 0, 0, 2) for e in self.EVENTS]
+        result["ok"] = all(hooks)
+        ready.set()
+        if not result["ok"]:
+            print("[WindowTracker] SetWinEventHook failed, focus changes detected by TTL only")
+        else:
+            msg = wintypes.MSG()
+            while user32.GetMessageW(ctypes.byref(msg), None, 0, 0) > 0:
+                user32.TranslateMessage(ctypes.byref(msg))
+                user32.DispatchMessageW(ctypes.byref(msg))
+        for hook in hooks:
+            if hook:
+                user32.UnhookWinEvent(hook)
+
+    def stop(self):
+        if self._thread_id is not None:
+            import ctypes
+            ctypes.windll.user32.PostThreadMessageW(self._thread_id, 0x0012, 0, 0) # WM_QUIT
+            self._thread_id = None
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+
+class FakeFocusHook(FocusHook):
+    """Test hook; fire() simulates a foreground change."""
+    def __init__(self):
+        self.callback = None
+
+    def start(self, callback):
+        self.callback = callback
+        return True
+
+    def stop(self):
+        self.callback = None
+
+    def fire(self):
+        if self.callback:
+            self.callback()
+
+
+def default_focus_hook():
+    if os.name == "nt":
+        return WinEventFocusHook()
+    return FocusHook()
+
+
+def default_window_backend():
+    if os.name == "nt":
+        try:
+            return UIAWindowBackend()
+        except Exception as e:
+            print(f"[WindowTracker] UIA unavailable, monitor selection falls back to primary: {e}")
+    return WindowBackend()
+
+
+class WindowFocusTracker:
+    """
+    Caches the focused window and the monitor it sits on.
+    Screen capture asks which monitor to grab on every frame; the backend is only queried after
+    notify_focus_changed(), which the focus hook (started on first lookup) calls when the
+    foreground window changes or moves. While the hook runs, `hooked_ttl` is just a safety net for missed events; without one,
+    `ttl` must outlast the slowest capture interval (4 s idle) or every frame re-queries.
+    """
+    def __init__(self, backend=None, ttl=5.0, hook=None, hooked_ttl=60.0, clock=time.monotonic):
+        self._backend = backend
+        self.ttl = ttl
+        self.hooked_ttl = hooked_ttl
+        self._hook = hook
+        self._hook_started = False
+        self.hooked = False
+        self._clock = clock
+        self._lock = threading.Lock()
+        # Separate from _lock: a hook may deliver its first event before start() returns
+        self._hook_lock = threading.Lock()
+        self._window = None
+        self._fetched_at = None
+        self._monitor_cache = None # (window rect, monitors key) -> index
+
+        self.lookups = 0
+        self.focus_events = 0
+        self.backend_queries = 0
+        self.query_ns = 0
+
+    @property
+    def backend(self):
+        # Created lazily: pywinauto initializes COM on import
+        if self._backend is None:
+            self._backend = default_window_backend()
+        return self._backend
+
+    def _ensure_hook(self):
+        with self._hook_lock:
+            if self._hook_started:
+                return
+            if self._hook is None:
+                self._hook = default_focus_hook()
+            try:
+                self.hooked = self._hook.start(self.notify_focus_changed)
+            except Exception as e:
+                print(f"[WindowTracker] Focus hook unavailable, using {self.ttl}s TTL: {e}")
+                self.hooked = False
+            # Set last so concurrent first lookups wait for start() instead of skipping past it
+            self._hook_started = True
+
+    def stop(self):
+        with self._hook_lock:
+            if self._hook is not None and self.hooked:
+                self._hook.stop()
+            self.hooked = False
+            self._hook_started = False
+
+    def notify_focus_changed(self):
+        """Invalidates the cache; called by the focus hook on foreground changes."""
+        with self._lock:
+            self.focus_events += 1
+            self._fetched_at = None
+
+    def active_window(self) -> Optional[WindowInfo]:
+        if not self._hook_started:
+            self._ensure_hook()
+        with self._lock:
+            self.lookups += 1
+            now = self._clock()
+            ttl = self.hooked_ttl if self.hooked else self.ttl
+            if self._fetched_at is not None and now - self._fetched_at < ttl:
+                return self._window
+            started = time.perf_counter_ns()
+            try:
+                self._window = self.backend.active_window()
+            except Exception:
+                self._window = None
+            self.query_ns += time.perf_counter_ns() - started
+            self.backend_queries += 1
+            self._fetched_at = now
+            return self._window
+
+    def monitor_index(self, monitors, default=1):
+        """
+        Index into an mss `monitors` list (0 = all monitors) of the monitor holding the focused
+        window's center. Falls back to `default` (the primary) if unknown.
+        """
+        window = self.active_window()
+        if window is None or len(monitors) <= 1:
+            return default if len(monitors) > default else 0
+        key = (window.left, window.top, window.right, window.bottom, len(monitors))
+        cached = self._monitor_cache
+        if cached and cached[0] == key:
+            return cached[1]
+        cx, cy = window.center
+        index = default
+        for i, m in enumerate(monitors[1:], start=1):
+            if m['left'] <= cx <= m['left'] + m['width'] and m['top'] <= cy <= m['top'] + m['height']:
+                index = i
+                break
+        self._monitor_cache = (key, index)
+        return index
+
+    def get_stats(self):
+        return {
+            "lookups": self.lookups,
+            "hooked": self.hooked,
+            "focus_events": self.focus_events,
+            "backend_queries": self.backend_queries,
+            "cache_hit_ratio": round(1 - self.backend_queries / self.lookups, 3) if self.lookups else 0.0,
+            "mean_query_ms": round(self.query_ns / self.backend_queries / 1e6, 2) if self.backend_queries else 0.0,
+        }
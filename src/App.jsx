@@ -515,6 +515,7 @@ function App() {
             setStatus('Connected');
             setSocketConnected(true);
             socket.emit('get_settings');
+            socket.emit('set_audio_visualization', { level: 'envelope', bins: 64 });
         });
         socket.on('disconnect', () => {
             setStatus('Disconnected');
@@ -538,7 +539,8 @@ function App() {
             setLlmProvider(data.provider);
         });
         socket.on('audio_data', (data) => {
-            setAiAudioData(data.data);
+            // Binary attachment: uint8 envelope bins (see set_audio_visualization)
+            setAiAudioData(Array.from(new Uint8Array(data.data)));
         });
         socket.on('tasks_update', (data) => {
             console.log("[Tasks] Received update:", data);
@@ -840,6 +842,9 @@ function App() {
 
 
 
+        // Let the backend re-enumerate PortAudio devices when hardware is plugged/unplugged
+        navigator.mediaDevices.ondevicechange = () => socket.emit('refresh_audio_devices');
+
         // Get All Media Devices (Microphones, Speakers, Webcams)
         navigator.mediaDevices.enumerateDevices().then(devs => {
             const audioInputs = devs.filter(d => d.kind === 'audioinput');
@@ -0,0 +1,34 @@
+"""
+Micro-benchmark: legacy struct.unpack RMS vs AudioAnalyzer on a 1024-sample mic chunk.
+Run with: python tests/bench_audio_analysis.py
+"""
+import os
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+from audio_analysis import AudioAnalyzer
+from test_audio_analysis import legacy_rms
+
+CHUNK_SIZE = 1024
+
+
+def main(iterations=2000):
+    rng = np.random.default_rng(0)
+    data = rng.integers(-8000, 8000, CHUNK_SIZE, dtype=np.int16).tobytes()
+    analyzer = AudioAnalyzer()
+
+    legacy = timeit.timeit(lambda: legacy_rms(data), number=iterations)
+    vectorized = timeit.timeit(lambda: analyzer.analyze(data), number=iterations)
+
+    print(f"Chunk: {CHUNK_SIZE} samples, {iterations} iterations")
+    print(f"  legacy struct/sum : {legacy / iterations * 1e6:8.1f} us/chunk")
+    print(f"  AudioAnalyzer     : {vectorized / iterations * 1e6:8.1f} us/chunk (rms+peak+zcr+floor)")
+    print(f"  speedup           : {legacy / vectorized:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Micro-benchmark: legacy per-chunk frombuffer/repeat/tobytes vs the preallocated OutputConverter.
+Run with: python tests/bench_audio_output.py
+"""
+import os
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+from audio_output import OutputConverter
+
+CHUNK_SIZE = 1024
+
+
+def legacy_expand(data, channels):
+    mono_data = np.frombuffer(data, dtype=np.int16)
+    multi_data = np.repeat(mono_data, channels)
+    return multi_data.tobytes()
+
+
+def main(iterations=2000):
+    rng = np.random.default_rng(0)
+    data = rng.integers(-8000, 8000, CHUNK_SIZE, dtype=np.int16).tobytes()
+
+    print(f"Chunk: {CHUNK_SIZE} samples @ 24 kHz, {iterations} iterations")
+    for channels in (2, 6):
+        converter = OutputConverter(24000, 24000, channels, max_chunk=CHUNK_SIZE)
+        legacy = timeit.timeit(lambda: legacy_expand(data, channels), number=iterations)
+        converted = timeit.timeit(lambda: converter.convert(data), number=iterations)
+        print(f"  {channels}ch @ 24 kHz  legacy repeat : {legacy / iterations * 1e6:8.1f} us/chunk")
+        print(f"  {channels}ch @ 24 kHz  converter     : {converted / iterations * 1e6:8.1f} us/chunk ({legacy / converted:.1f}x)")
+
+    # Native-rate paths have no legacy equivalent (PortAudio/host resampled); report their cost per chunk
+    for rate in (48000, 44100):
+        converter = OutputConverter(24000, rate, 2, max_chunk=CHUNK_SIZE)
+        converted = timeit.timeit(lambda: converter.convert(data), number=iterations)
+        chunk_ms = CHUNK_SIZE / 24000 * 1000
+        per_chunk = converted / iterations * 1e6
+        print(f"  2ch @ {rate / 1000:g} kHz resample : {per_chunk:8.1f} us/chunk ({per_chunk / 10 / chunk_ms:.2f}% of a {chunk_ms:.1f} ms chunk)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Micro-benchmark: legacy np.array -> cvtColor -> PIL -> thumbnail -> JPEG chain vs FrameEncoder.
+Run with: python tests/bench_frame_encoder.py
+"""
+import base64
+import io
+import os
+import sys
+import timeit
+
+import cv2
+import numpy as np
+import PIL.Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+from frame_encoder import FrameEncoder
+
+
+def legacy_get_frame(sct_img):
+    # The chain _get_frame used before FrameEncoder
+    img = PIL.Image.fromarray(cv2.cvtColor(np.array(sct_img), cv2.COLOR_BGRA2RGB))
+    img.thumbnail([1024, 1024])
+    image_io = io.BytesIO()
+    img.save(image_io, format="jpeg")
+    image_io.seek(0)
+    return {"mime_type": "image/jpeg", "data": base64.b64encode(image_io.read()).decode()}
+
+
+def legacy_vision_service(width, height, bgra):
+    # The chain VisionService.capture_frame used before FrameEncoder
+    img = PIL.Image.frombytes("RGB", (width, height), bgra, "raw", "BGRX")
+    img.thumbnail((1280, 720))
+    buffer = io.BytesIO()
+    img.save(buffer, format="JPEG", quality=70)
+    return {"mime_type": "image/jpeg", "data": base64.b64encode(buffer.getvalue()).decode()}
+
+
+def desktop(height, width):
+    rng = np.random.default_rng(0)
+    frame = np.full((height, width, 4), 235, dtype=np.uint8)
+    # Some "windows" with text-like noise so the JPEG encoder has real work to do
+    for i in range(6):
+        y, x = rng.integers(0, height // 2), rng.integers(0, width // 2)
+        frame[y:y + height // 3, x:x + width // 3, :3] = rng.integers(0, 255, (height // 3, width // 3, 3), dtype=np.uint8)
+    return frame
+
+
+def main(iterations=20):
+    for label, (width, height) in (("1080p", (1920, 1080)), ("4K", (3840, 2160))):
+        frame = desktop(height, width)
+        bgra = frame.tobytes()
+        live = FrameEncoder(max_size=(1024, 1024))
+        vision = FrameEncoder(max_size=(1280, 720), quality=70)
+
+        legacy_live = timeit.timeit(lambda: legacy_get_frame(frame), number=iterations) / iterations
+        new_live = timeit.timeit(lambda: live.encode_payload(frame), number=iterations) / iterations
+        legacy_vis = timeit.timeit(lambda: legacy_vision_service(width, height, bgra), number=iterations) / iterations
+        new_vis = timeit.timeit(lambda: vision.encode_payload(frame), number=iterations) / iterations
+
+        print(f"{label} ({width}x{height}), {iterations} iterations")
+        print(f"  _get_frame     legacy : {legacy_live * 1e3:7.1f} ms   FrameEncoder : {new_live * 1e3:6.1f} ms ({legacy_live / new_live:.1f}x)")
+        print(f"  capture_frame  legacy : {legacy_vis * 1e3:7.1f} ms   FrameEncoder : {new_vis * 1e3:6.1f} ms ({legacy_vis / new_vis:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Micro-benchmark: the per-row cosine loop SemanticSearchAgent.search used vs VectorIndex.search.
+Run with: python tests/bench_vector_index.py [--dim 768] [--sizes 10000,100000,1000000]
+The legacy loop is timed on at most --loop-limit rows and extrapolated linearly beyond that
+(it is O(n) Python iterations; running it on 1M rows only confirms the line).
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+from vector_index import VectorIndex
+
+
+def legacy_search(query_vec, rows, top_k=5):
+    # The loop search() ran over every fetched (path, embedding BLOB) row
+    results = []
+    for path, embedding_blob in rows:
+        doc_vec = np.frombuffer(embedding_blob, dtype=np.float32)
+        dot_product = np.dot(query_vec, doc_vec)
+        norm_q = np.linalg.norm(query_vec)
+        norm_d = np.linalg.norm(doc_vec)
+        if norm_q > 0 and norm_d > 0:
+            results.append({"path": path, "score": float(dot_product / (norm_q * norm_d))})
+    results.sort(key=lambda x: x["score"], reverse=True)
+    return results[:top_k]
+
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--loop-limit", type=int, default=100000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    query = rng.normal(size=args.dim).astype(np.float32)
+    print(f"dim={args.dim}, top_k=5")
+    for n in (int(s) for s in args.sizes.split(",")):
+        matrix = rng.standard_normal((n, args.dim), dtype=np.float32)
+        keys = [f"file_{i}.py" for i in range(n)]
+
+        index = VectorIndex()
+        started = time.perf_counter()
+        index.bulk_load(keys, matrix)
+        load_s = time.perf_counter() - started
+        new_s = best_of(lambda: index.search(query, 5), 5)
+
+        sample = min(n, args.loop_limit)
+        rows = [(keys[i], matrix[i].tobytes()) for i in range(sample)]
+        loop_s = best_of(lambda: legacy_search(query, rows), 1) * n / sample
+        del rows, matrix
+
+        note = "" if sample == n else f" (extrapolated from {sample})"
+        print(f"{n:>9} vectors: legacy loop {loop_s * 1000:10.1f} ms{note} | "
+              f"VectorIndex {new_s * 1000:7.2f} ms ({loop_s / new_s:6.0f}x) | one-time load {load_s * 1000:.0f} ms")
+        del index
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Tests for the vectorized audio level analysis.
+"""
+import math
+import struct
+
+import numpy as np
+import pytest
+
+from audio_analysis import AudioAnalyzer, pcm16_view
+
+
+def legacy_rms(data):
+    """The struct.unpack implementation previously inlined in listen_audio."""
+    count = len(data) // 2
+    shorts = struct.unpack(f"<{count}h", data) if count > 0 else []
+    if count == 0:
+        return 0
+    return int(math.sqrt(sum(s**2 for s in shorts) / count))
+
+
+def tone(amplitude=8000, freq=440, rate=16000, n=1024):
+    t = np.arange(n) / rate
+    return (amplitude * np.sin(2 * np.pi * freq * t)).astype("<i2").tobytes()
+
+
+class TestAudioAnalyzer:
+    """Test level measurements against the legacy implementation."""
+
+    def test_rms_matches_legacy(self):
+        rng = np.random.default_rng(0)
+        data = rng.integers(-32768, 32767, 1024, dtype=np.int16).tobytes()
+        assert AudioAnalyzer().analyze(data).rms == legacy_rms(data)
+
+    def test_tone_levels(self):
+        levels = AudioAnalyzer().analyze(tone())
+        assert levels.rms == legacy_rms(tone())
+        assert 7900 <= levels.peak <= 8000
+        # 440 Hz at 16 kHz crosses zero ~55 times per 1024 samples
+        assert levels.zero_crossing_rate == pytest.approx(2 * 440 / 16000, rel=0.1)
+
+    def test_peak_handles_int16_min(self):
+        data = np.array([0, -32768, 5], dtype="<i2").tobytes()
+        assert AudioAnalyzer().analyze(data).peak == 32768
+
+    def test_silence_and_empty(self):
+        analyzer = AudioAnalyzer()
+        assert analyzer.analyze(bytes(2048)).rms == 0
+        empty = analyzer.analyze(b"")
+        assert empty.rms == 0 and empty.peak == 0
+
+    def test_odd_length_buffer_ignores_partial_sample(self):
+        assert len(pcm16_view(b"\x01\x00\x02")) == 1
+
+    def test_view_is_zero_copy(self):
+        data = bytearray(tone())
+        view = pcm16_view(data)
+        assert np.shares_memory(view, np.frombuffer(data, dtype=np.uint8))
+
+    def test_noise_floor_ignores_short_bursts(self):
+        analyzer = AudioAnalyzer()
+        quiet = tone(amplitude=100)
+        for _ in range(20):
+            analyzer.analyze(quiet)
+        floor = analyzer.noise_floor
+        analyzer.analyze(tone(amplitude=10000))
+        assert analyzer.noise_floor < floor * 2
+        analyzer.reset()
+        assert analyzer.noise_floor is None
+
+
+class TestVisualizationBins:
+    """Test envelope and spectrum downsampling."""
+
+    def test_envelope_scale(self):
+        from audio_analysis import envelope_bins
+        bins = envelope_bins(tone(amplitude=32767, n=2048), bins=16)
+        assert bins.dtype == np.uint8 and len(bins) == 16
+        assert bins.min() >= 250
+
+    def test_spectrum_peak_at_tone(self):
+        from audio_analysis import spectrum_bins
+        bins = spectrum_bins(tone(freq=4000, n=1024), bins=16)
+        # 4 kHz of an 8 kHz Nyquist lands in the middle band
+        assert int(np.argmax(bins)) == 8
@@ -0,0 +1,51 @@
+"""
+Tests for callback-driven microphone capture.
+"""
+import asyncio
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from audio_capture import MicrophoneCapture, PA_CONTINUE, PA_INPUT_OVERFLOW
+
+
+async def started_capture(max_frames=32):
+    capture = MicrophoneCapture(chunk_size=4, max_frames=max_frames)
+    p = MagicMock()
+    await capture.start(p, format=8, channels=1, rate=16000)
+    assert p.open.call_args.kwargs["stream_callback"] == capture._on_audio
+    return capture
+
+
+@pytest.mark.asyncio
+async def test_frames_handed_off_from_audio_thread():
+    capture = await started_capture()
+
+    def audio_thread():
+        for i in range(10):
+            assert capture._on_audio(bytes([i] * 8), 4, {}, 0) == (None, PA_CONTINUE)
+
+    thread = threading.Thread(target=audio_thread)
+    thread.start()
+    received = [await asyncio.wait_for(capture.read(), timeout=1) for _ in range(10)]
+    thread.join()
+
+    assert received == [bytes([i] * 8) for i in range(10)]
+    assert capture.get_stats()["frames_captured"] == 10
+
+
+@pytest.mark.asyncio
+async def test_bounded_ring_counts_drops_and_overflows():
+    capture = await started_capture(max_frames=2)
+    capture._on_audio(b"a", 1, {}, 0)
+    capture._on_audio(b"b", 1, {}, PA_INPUT_OVERFLOW)
+    capture._on_audio(b"c", 1, {}, 0)
+
+    stats = capture.get_stats()
+    assert stats["dropped_frames"] == 1
+    assert stats["overflows"] == 1
+    assert await capture.read() == b"b"
+
+    capture.clear()
+    assert capture.get_stats()["queued_frames"] == 0
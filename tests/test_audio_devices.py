@@ -0,0 +1,103 @@
+"""
+Tests for the cached audio device registry.
+"""
+from unittest.mock import MagicMock
+
+import pytest
+
+from audio_devices import AudioDeviceRegistry
+
+DEVICES = [
+    {"index": 0, "name": "Microsoft Sound Mapper - Input", "hostApi": 0, "maxInputChannels": 2, "maxOutputChannels": 0, "defaultSampleRate": 44100.0},
+    {"index": 1, "name": "Microphone (Realtek(R) Audio)", "hostApi": 0, "maxInputChannels": 2, "maxOutputChannels": 0, "defaultSampleRate": 44100.0},
+    {"index": 2, "name": "Speakers (Realtek(R) Audio)", "hostApi": 0, "maxInputChannels": 0, "maxOutputChannels": 2, "defaultSampleRate": 48000.0},
+    {"index": 3, "name": "Headset Earphone (HyperX Cloud", "hostApi": 0, "maxInputChannels": 0, "maxOutputChannels": 8, "defaultSampleRate": 48000.0},
+    {"index": 4, "name": "Speakers (Realtek(R) Audio)", "hostApi": 1, "maxInputChannels": 0, "maxOutputChannels": 2, "defaultSampleRate": 48000.0},
+]
+
+
+def fake_pyaudio(devices):
+    p = MagicMock()
+    p.get_device_count.return_value = len(devices)
+    p.get_device_info_by_index.side_effect = lambda i: devices[i]
+    p.get_default_input_device_info.return_value = devices[1]
+    p.get_default_output_device_info.return_value = devices[2]
+    return p
+
+
+@pytest.fixture
+def registry():
+    devices = list(DEVICES)
+    factory = MagicMock(side_effect=lambda: fake_pyaudio(devices))
+    reg = AudioDeviceRegistry(pyaudio_factory=factory, miss_refresh_interval=0)
+    reg.devices_source = devices
+    reg.factory = factory
+    return reg
+
+
+class TestAudioDeviceRegistry:
+    """Test enumeration caching and name matching."""
+
+    def test_enumerates_once(self, registry):
+        registry.find("Speakers", kind="output")
+        registry.find("Microphone", kind="input")
+        registry.default_device("output")
+        assert registry.factory.call_count == 1
+
+    def test_exact_and_browser_label_matching(self, registry):
+        assert registry.find("Speakers (Realtek(R) Audio)", "output").index == 2
+        assert registry.find("Default - Microphone (Realtek(R) Audio)", "input").index == 1
+
+    def test_truncated_name_matches_by_substring(self, registry):
+        assert registry.find("Headset Earphone (HyperX Cloud Alpha S)", "output").index == 3
+
+    def test_fuzzy_match(self, registry):
+        assert registry.find("Speakers (Realtec Audio)", "output").index == 2
+
+    def test_kind_is_respected(self, registry):
+        assert registry.find("Speakers (Realtek(R) Audio)", "input") is None
+
+    def test_hotplug_refresh(self, registry):
+        registry.devices("input")
+        registry.devices_source.append({"index": 5, "name": "USB Mic", "hostApi": 0, "maxInputChannels": 1, "maxOutputChannels": 0, "defaultSampleRate": 16000.0})
+        # A miss re-enumerates and picks up the new device
+        assert registry.find("USB Mic", "input").index == 5
+        assert registry.factory.call_count == 2
+        registry.notify_hotplug()
+        registry.devices()
+        assert registry.factory.call_count == 3
+
+    def test_list_devices_filters_host_api(self, registry):
+        assert registry.list_devices("output") == [(2, "Speakers (Realtek(R) Audio)"), (3, "Headset Earphone (HyperX Cloud")]
+        assert len(registry.list_devices("output", host_api=None)) == 3
+
+
+class TestSharedPyAudio:
+    """Test the registry-owned PyAudio and refreshes while streams are open on it."""
+
+    USB_MIC = {"index": 5, "name": "USB Mic", "hostApi": 0, "maxInputChannels": 1, "maxOutputChannels": 0, "defaultSampleRate": 16000.0}
+
+    def test_acquire_shares_one_instance(self, registry):
+        p = registry.acquire()
+        assert registry.acquire() is p
+        registry.release()
+        p.terminate.assert_not_called()
+        registry.release()
+        p.terminate.assert_called_once()
+        registry.release() # unbalanced release is ignored
+
+    def test_refresh_while_held_is_reported_incomplete(self, registry):
+        registry.acquire()
+        registry.devices()
+        assert registry.last_refresh_complete
+        # The open instance keeps the device count it read when it was initialized
+        registry.devices_source.append(self.USB_MIC)
+        registry.notify_hotplug()
+        assert registry.find("USB Mic", "input") is None
+        assert not registry.last_refresh_complete
+        assert registry.factory.call_count == 1
+
+        # The holder reopens: the last release lets the next lookup enumerate from a fresh instance
+        registry.release()
+        assert registry.find("USB Mic", "input").index == 5
+        assert registry.last_refresh_complete
@@ -0,0 +1,60 @@
+"""
+Tests for the AudioEngine output-conversion stage.
+"""
+import numpy as np
+import pytest
+
+from audio_output import OutputConverter, PolyphaseResampler
+
+
+def tone(freq, rate, seconds=1.0, amplitude=8000):
+    t = np.arange(int(rate * seconds)) / rate
+    return (amplitude * np.sin(2 * np.pi * freq * t)).astype(np.int16)
+
+
+class TestPolyphaseResampler:
+    """Test rational resampling of the 24 kHz model stream."""
+
+    @pytest.mark.parametrize("out_rate", [48000, 44100, 16000])
+    def test_length_and_pitch_preserved(self, out_rate):
+        resampler = PolyphaseResampler(24000, out_rate)
+        y = resampler.process(tone(1000, 24000))
+        assert len(y) == out_rate
+        spectrum = np.abs(np.fft.rfft(y))
+        assert np.argmax(spectrum) * out_rate / len(y) == pytest.approx(1000, abs=2)
+
+    def test_chunked_output_matches_one_shot(self):
+        x = tone(440, 24000, seconds=0.5)
+        whole = PolyphaseResampler(24000, 44100).process(x).copy()
+        streaming = PolyphaseResampler(24000, 44100)
+        parts = [streaming.process(x[i:i + 1000]).copy() for i in range(0, len(x), 1000)]
+        np.testing.assert_allclose(np.concatenate(parts), whole, atol=1e-2)
+
+    def test_grows_for_oversized_chunks(self):
+        resampler = PolyphaseResampler(24000, 48000, max_chunk=256)
+        assert len(resampler.process(np.zeros(1024, dtype=np.int16))) == 2048
+
+
+class TestOutputConverter:
+    """Test channel expansion into the preallocated interleave buffer."""
+
+    def test_passthrough_returns_input(self):
+        data = tone(440, 24000, 0.01).tobytes()
+        converter = OutputConverter(24000, 24000, 1)
+        assert converter.passthrough
+        assert converter.convert(data) is data
+
+    @pytest.mark.parametrize("channels", [2, 6])
+    def test_expansion_matches_repeat(self, channels):
+        samples = tone(440, 24000, 0.05)
+        converter = OutputConverter(24000, 24000, channels, max_chunk=1024)
+        out = converter.convert(samples[:1024].tobytes())
+        assert out == np.repeat(samples[:1024], channels).tobytes()
+
+    def test_resampled_stereo_is_interleaved_and_clipped(self):
+        samples = np.full(1024, 32767, dtype=np.int16)
+        converter = OutputConverter(24000, 48000, 2)
+        out = np.frombuffer(converter.convert(samples.tobytes()), dtype=np.int16).reshape(-1, 2)
+        assert len(out) == 2048
+        assert np.array_equal(out[:, 0], out[:, 1])
+        assert out.max() <= 32767
@@ -0,0 +1,90 @@
+"""
+Tests for the shared-memory playback ring used by AudioEngine.
+"""
+import multiprocessing
+
+import pytest
+
+from audio_ring import AudioRingBuffer
+
+
+@pytest.fixture
+def ring():
+    r = AudioRingBuffer(capacity_bytes=64)
+    yield r
+    r.close()
+
+
+def _consume(ring, result_queue):
+    ring.wait(timeout=5)
+    result_queue.put(ring.read(1024))
+    ring.close()
+
+
+class TestAudioRingBuffer:
+    """Test the SPSC ring semantics."""
+
+    def test_write_then_read(self, ring):
+        assert ring.write(b"\x01\x00\x02\x00") == 4
+        assert ring.fill_level() == 4
+        assert ring.wait(timeout=0)
+        assert ring.read(100) == b"\x01\x00\x02\x00"
+        assert ring.read(100) == b""
+
+    def test_wraparound(self, ring):
+        ring.write(bytes(range(48)))
+        assert ring.read(48) == bytes(range(48))
+        payload = bytes(range(100, 140))
+        assert ring.write(payload) == 40
+        assert ring.read(100) == payload
+
+    def test_overrun_drops_and_counts(self, ring):
+        assert ring.write(bytes(80)) == 64
+        assert ring.get_stats()["overruns"] == 1
+        assert ring.write(b"\x00\x00") == 0
+
+    def test_reset_skips_stale_audio_only(self, ring):
+        ring.write(b"old!")
+        ring.reset()
+        ring.write(b"new!")
+        assert ring.consume_reset()
+        assert not ring.consume_reset()
+        assert ring.read(100) == b"new!"
+
+    def test_reset_latency_recorded_when_applied(self, ring):
+        assert ring.last_reset_latency_ms() is None
+        ring.reset()
+        assert ring.consume_reset()
+        assert ring.last_reset_latency_ms() is None
+        ring.mark_reset_applied()
+        assert ring.last_reset_latency_ms() >= 0
+
+    def test_stop_flag(self, ring):
+        assert not ring.stop_requested
+        ring.stop()
+        assert ring.wait(timeout=0)
+        assert ring.stop_requested
+
+    def test_stats(self, ring):
+        ring.write(bytes(48))
+        ring.record_underrun()
+        stats = ring.get_stats()
+        assert stats["fill_bytes"] == 48
+        assert stats["underruns"] == 1
+        assert stats["buffered_ms"] == pytest.approx(1.0)
+
+    def test_cross_process_read(self, ring):
+        results = multiprocessing.Queue()
+        proc = multiprocessing.Process(target=_consume, args=(ring, results))
+        proc.start()
+        ring.write(b"\x10\x00\x20\x00")
+        assert results.get(timeout=10) == b"\x10\x00\x20\x00"
+        proc.join(timeout=10)
+        assert ring.fill_level() == 0
+
+
+    def test_close_is_idempotent(self):
+        ring = AudioRingBuffer(capacity_bytes=64)
+        ring.close()
+        ring.close()
+        assert ring.closed
@@ -0,0 +1,160 @@
+"""
+Tests for the AudioEngine lifecycle supervisor.
+"""
+import time
+
+from audio_ring import AudioRingBuffer
+from audio_supervisor import AudioEngineSupervisor
+
+
+class FakeProcess:
+    """Stands in for the AudioEngine process."""
+    _next_pid = 1000
+
+    def __init__(self):
+        self.alive = False
+        FakeProcess._next_pid += 1
+        self.pid = FakeProcess._next_pid
+
+    def start(self):
+        self.alive = True
+
+    def is_alive(self):
+        return self.alive
+
+    def join(self, timeout=None):
+        pass
+
+    def terminate(self):
+        self.alive = False
+
+
+class FakeEngineFactory:
+    def __init__(self):
+        self.created = []
+
+    def __call__(self, output_device_index=None, device_info=None):
+        process, ring = FakeProcess(), AudioRingBuffer(capacity_bytes=64)
+        self.created.append((process, ring))
+        return process, ring
+
+
+def make_supervisor(**kwargs):
+    factory = FakeEngineFactory()
+    return AudioEngineSupervisor(engine_factory=factory, **kwargs), factory
+
+
+class TestAudioEngineSupervisor:
+    """Test when the engine is reused and when it is recreated."""
+
+    def test_reused_across_reconnects(self):
+        sup, factory = make_supervisor()
+        first = sup.ensure(3)
+        first[1].beat()
+        assert sup.ensure(3) == first
+        assert sup.ensure(3) == first
+        assert len(factory.created) == 1
+        sup.stop()
+
+    def test_device_change_recreates(self):
+        sup, factory = make_supervisor()
+        sup.ensure(3)
+        sup.ensure(5)
+        assert len(factory.created) == 2
+        assert sup.restarts == 1
+        assert "device changed" in sup.last_restart_reason
+        assert not factory.created[0][0].is_alive()
+        sup.stop()
+
+    def test_dead_process_recreates(self):
+        sup, factory = make_supervisor()
+        process, _ = sup.ensure()
+        process.alive = False
+        assert not sup.is_healthy()
+        sup.ensure()
+        assert len(factory.created) == 2
+        assert sup.last_restart_reason == "engine process died"
+        sup.stop()
+
+    def test_stale_heartbeat_is_unhealthy(self):
+        sup, _ = make_supervisor(heartbeat_timeout=0.05)
+        _, ring = sup.ensure()
+        ring.beat()
+        assert sup.is_healthy()
+        time.sleep(0.1)
+        assert not sup.is_healthy()
+        assert sup.get_stats()["heartbeat_age_ms"] >= 50
+        sup.stop()
+
+    def test_startup_grace_before_first_beat(self):
+        sup, _ = make_supervisor(startup_timeout=0.05)
+        sup.ensure()
+        assert sup.is_healthy()
+        time.sleep(0.1)
+        assert not sup.is_healthy()
+        sup.stop()
+
+    def test_stop_sends_stop_and_clears(self):
+        sup, factory = make_supervisor()
+        _, ring = sup.ensure()
+        sup.stop()
+        assert sup.process is None and sup.ring is None
+        assert not factory.created[0][0].is_alive()
+
+
+class TestRestartBackoff:
+    """Test that a crashing engine is restarted with backoff and eventually given up on."""
+
+    def crash(self, sup):
+        sup.process.alive = False
+
+    def test_backoff_between_crash_restarts(self):
+        sup, factory = make_supervisor(restart_backoff=0.05, max_backoff=1.0)
+        sup.ensure()
+        self.crash(sup)
+        sup.ensure()                        # first crash: restart right away
+        assert len(factory.created) == 2
+        self.crash(sup)
+        assert sup.state == "backoff"
+        sup.ensure()                        # still inside the 0.05 s backoff
+        assert len(factory.created) == 2
+        time.sleep(0.06)
+        assert sup.state == "unhealthy"
+        sup.ensure()
+        assert len(factory.created) == 3
+        self.crash(sup)
+        time.sleep(0.06)                    # backoff doubled to 0.1 s
+        sup.ensure()
+        assert len(factory.created) == 3
+        assert sup.get_stats()["consecutive_failures"] == 2
+        sup.stop()
+
+    def test_gives_up_after_max_restarts_and_reports(self):
+        failures = []
+        sup, factory = make_supervisor(restart_backoff=0.0, max_restarts=3, on_failed=failures.append)
+        sup.ensure(3)
+        for _ in range(10):
+            if sup.process is not None:
+                self.crash(sup)
+            sup.ensure(3)
+        assert len(factory.created) == 4    # initial start + 3 restarts
+        assert sup.state == "failed" and sup.ensure(3) == (None, None)
+        assert len(failures) == 1 and "not restarting" in failures[0]
+        assert not factory.created[-1][0].is_alive()
+
+        # A different device gets a fresh attempt
+        process, ring = sup.ensure(5)
+        assert process is not None and sup.state == "starting"
+        assert sup.consecutive_failures == 0
+        sup.stop()
+
+    def test_stable_engine_resets_failure_count(self):
+        sup, factory = make_supervisor(restart_backoff=0.0, max_restarts=1, stable_after=0.05)
+        sup.ensure()
+        for _ in range(3):
+            sup.ring.beat()
+            time.sleep(0.06)                # ran long enough to count as stable
+            self.crash(sup)
+            sup.ensure()
+        assert len(factory.created) == 4 and sup.state != "failed"
+        sup.stop()
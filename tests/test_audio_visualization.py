@@ -0,0 +1,69 @@
+"""
+Tests for the coalesced binary audio visualization stream.
+"""
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import numpy as np
+import pytest
+
+from audio_visualization import AudioVisualizationStream
+
+
+def pcm_chunk(amplitude=16000, n=480):
+    return (amplitude * np.sin(np.linspace(0, 20 * np.pi, n))).astype("<i2").tobytes()
+
+
+@pytest.fixture
+def sio():
+    mock = MagicMock()
+    mock.emit = AsyncMock()
+    return mock
+
+
+@pytest.mark.asyncio
+async def test_chunks_are_coalesced_into_one_binary_frame(sio):
+    stream = AudioVisualizationStream(sio, fps=30)
+    stream.subscribe("a", "pcm")
+    for _ in range(5):
+        stream.push(pcm_chunk())
+    await asyncio.sleep(0.01)
+    stream.stop()
+
+    assert sio.emit.await_count == 1
+    event, payload = sio.emit.await_args.args
+    assert event == "audio_data"
+    assert isinstance(payload["data"], bytes)
+    assert len(payload["data"]) == 5 * len(pcm_chunk())
+
+
+@pytest.mark.asyncio
+async def test_payload_computed_once_per_level(sio):
+    stream = AudioVisualizationStream(sio)
+    stream.subscribe("a")
+    stream.subscribe("b")
+    stream.subscribe("c", "fft", 32)
+    stream.subscribe("d", "off")
+    stream.push(pcm_chunk())
+    await asyncio.sleep(0.01)
+    stream.stop()
+
+    sent = {call.kwargs["room"]: call.args[1] for call in sio.emit.await_args_list}
+    assert set(sent) == {"a", "b", "c"}
+    assert sent["a"] is sent["b"]
+    assert len(sent["a"]["data"]) == 64 and max(sent["a"]["data"]) > 100
+    assert len(sent["c"]["data"]) == 32
+
+
+@pytest.mark.asyncio
+async def test_no_work_without_subscribers(sio):
+    stream = AudioVisualizationStream(sio)
+    stream.push(pcm_chunk())
+    assert stream._task is None
+    assert stream.get_stats()["chunks_coalesced"] == 0
+
+
+def test_unknown_level_rejected(sio):
+    stream = AudioVisualizationStream(sio)
+    with pytest.raises(ValueError):
+        stream.subscribe("a", "waveform")
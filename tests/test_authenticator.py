@@ -8,6 +8,7 @@ import numpy as np
 # Try to import the authenticator, skip all tests if dependencies missing
 try:
     from authenticator import FaceAuthenticator
+    from face_tracking import ReferenceMatrix
     HAS_AUTH = True
 except ImportError as e:
     HAS_AUTH = False
@@ -104,7 +105,11 @@ class TestLandmarkExtraction:
 
 
 class TestLandmarkComparison:
-    """Test face landmark comparison."""
+    """Test face landmark comparison against the enrolled references."""
+
+    def enroll(self, auth, landmarks):
+        auth.references = ReferenceMatrix()
+        auth.references.add(landmarks, label="reference.jpg")
     
     def test_compare_identical_landmarks(self):
         """Test comparing identical landmarks."""
@@ -112,8 +117,9 @@ class TestLandmarkComparison:
         
         # Create mock landmarks (468 points * 3 coords = 1404 values)
         landmarks = np.random.rand(1404).astype(np.float32)
+        self.enroll(auth, landmarks)
         
-        result = auth._compare_landmarks(landmarks, landmarks)
+        result = auth._match_references(landmarks)
         assert result == True
         print("Identical landmarks comparison: True (correct)")
     
@@ -123,8 +129,9 @@ class TestLandmarkComparison:
         
         landmarks1 = np.random.rand(1404).astype(np.float32)
         landmarks2 = np.random.rand(1404).astype(np.float32)
+        self.enroll(auth, landmarks1)
         
-        result = auth._compare_landmarks(landmarks1, landmarks2)
+        result = auth._match_references(landmarks2)
         # Random vectors should likely be different
         print(f"Random landmarks comparison: {result}")
     
@@ -134,15 +141,24 @@ class TestLandmarkComparison:
         
         landmarks1 = np.ones(1404, dtype=np.float32)
         landmarks2 = np.ones(1404, dtype=np.float32) * 0.99  # Very similar
+        self.enroll(auth, landmarks1)
         
         # Should pass with high threshold
-        result_high = auth._compare_landmarks(landmarks1, landmarks2, threshold=0.5)
+        auth.match_threshold = 0.5
+        result_high = auth._match_references(landmarks2)
         print(f"High threshold (0.5) result: {result_high}")
         
         # May fail with low threshold
-        result_low = auth._compare_landmarks(landmarks1, landmarks2, threshold=0.001)
+        auth.match_threshold = 0.001
+        result_low = auth._match_references(landmarks2)
         print(f"Low threshold (0.001) result: {result_low}")
 
+    def test_no_references_never_match(self):
+        """Test that nothing matches before a reference is enrolled."""
+        auth = FaceAuthenticator()
+        auth.references = ReferenceMatrix()
+        assert auth._match_references(np.ones(1404, dtype=np.float32)) == False
+
 
 class TestReferenceImage:
     """Test reference image handling."""
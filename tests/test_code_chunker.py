@@ -0,0 +1,175 @@
+"""
+Tests for syntax-aware chunking and chunk-level semantic search.
+"""
+import asyncio
+import hashlib
+import os
+import re
+import sqlite3
+
+import numpy as np
+import pytest
+
+from code_chunker import chunk_text
+
+try:
+    from semantic_search_agent import SemanticSearchAgent
+    HAS_AGENT = True
+except ImportError as e:
+    HAS_AGENT = False
+    IMPORT_ERROR = str(e)
+
+
+def python_module(n_functions, body_lines=3):
+    lines = ["import os", ""]
+    for i in range(n_functions):
+        lines.append(f"def func_{i}(x):")
+        lines.extend(f"    x = x + {j}  # step {j} of func_{i}" for j in range(body_lines))
+        lines.append("    return x")
+        lines.append("")
+    return "\n".join(lines) + "\n"
+
+
+class FakeModels:
+    """Bag-of-words hashing embeddings: texts sharing words are close."""
+    def embed_content(self, model, contents, config=None):
+        embeddings = []
+        for text in contents:
+            vec = np.zeros(256, dtype=np.float32)
+            for word in re.findall(r"\w+", text.lower()):
+                vec[int(hashlib.md5(word.encode()).hexdigest(), 16) % 256] += 1
+            embeddings.append(type("Embedding", (), {"values": vec.tolist()})())
+        return type("Response", (), {"embeddings": embeddings})()
+
+
+class FakeClient:
+    def __init__(self):
+        self.models = FakeModels()
+
+
+def covered_lines(chunks):
+    return {line for c in chunks for line in range(c.start_line, c.end_line + 1)}
+
+
+class TestChunkText:
+    """Test boundaries, size limits and reported ranges."""
+
+    def test_python_splits_at_functions(self):
+        text = python_module(40)
+        chunks = chunk_text(".py", text, max_chars=400)
+        assert len(chunks) > 1
+        for chunk in chunks[1:]:
+            assert chunk.text.startswith("def func_")
+        assert covered_lines(chunks) == set(range(1, len(text.splitlines()) + 1))
+
+    def test_ranges_match_text(self):
+        text = "# héllo\n" + python_module(10)
+        data = text.encode("utf-8")
+        lines = text.splitlines(keepends=True)
+        for chunk in chunk_text(".py", text, max_chars=200):
+            assert data[chunk.start_byte:chunk.end_byte].decode("utf-8") == chunk.text
+            assert "".join(lines[chunk.start_line - 1:chunk.end_line]) == chunk.text
+
+    def test_crlf_and_form_feed_keep_lines_and_bytes(self):
+        text = ("# \x0c page break \u2028 separator\n" + python_module(10)).replace("\n", "\r\n")
+        data = text.encode("utf-8")
+        lines = data.split(b"\n")
+        chunks = chunk_text(".py", text, max_chars=200)
+        assert len(chunks) > 1
+        for chunk in chunks:
+            assert data[chunk.start_byte:chunk.end_byte].decode("utf-8") == chunk.text
+            assert chunk.text.startswith(lines[chunk.start_line - 1].decode("utf-8"))
+        assert chunks[-1].end_line == text.count("\n")
+
+    def test_large_class_split_at_methods(self):
+        methods = "".join(f"    @property\n    def m{i}(self):\n        return {i} * {'x' * 40!r}\n\n" for i in range(30))
+        text = f"class Big:\n{methods}"
+        chunks = chunk_text(".py", text, max_chars=500)
+        assert len(chunks) > 1
+        assert all(c.text.lstrip().startswith(("class Big", "@property")) for c in chunks)
+
+    def test_oversized_section_uses_overlapping_windows(self):
+        text = "def huge():\n" + "".join(f"    value_{i} = {i}\n" for i in range(400))
+        chunks = chunk_text(".py", text, max_chars=1000, overlap_lines=3)
+        assert all(len(c.text) <= 1000 for c in chunks)
+        for a, b in zip(chunks, chunks[1:]):
+            assert b.start_line == a.end_line - 2
+        assert covered_lines(chunks) == set(range(1, 402))
+
+    def test_small_file_is_one_chunk(self):
+        [chunk] = chunk_text(".py", "def a():\n    pass\n\ndef b():\n    pass\n")
+        assert (chunk.start_line, chunk.end_line) == (1, 5)
+
+    def test_js_and_markdown_boundaries(self):
+        js = "".join(f"export function f{i}() {{\n  return {'1' * 80};\n}}\n" for i in range(10))
+        assert all(c.text.startswith("export function") for c in chunk_text(".js", js, max_chars=200))
+        md = "".join(f"## Section {i}\n{'text ' * 30}\n\n" for i in range(6))
+        assert all(c.text.startswith("## Section") for c in chunk_text(".md", md, max_chars=200))
+
+    def test_syntax_error_falls_back_to_regex(self):
+        text = "def ok():\n    return 1\n" * 20 + "def broken(:\n"
+        chunks = chunk_text(".py", text, max_chars=100)
+        assert len(chunks) > 1 and chunks[-1].text.startswith("def")
+
+    def test_empty(self):
+        assert chunk_text(".py", "  \n\n") == []
+
+
+@pytest.mark.skipif(not HAS_AGENT, reason=f"Semantic search agent unavailable: {IMPORT_ERROR if not HAS_AGENT else ''}")
+class TestChunkedSearch:
+    """Test that index_project stores chunks and search returns their line spans."""
+
+    @pytest.fixture
+    def client(self):
+        return FakeClient()
+
+    def test_search_returns_line_span_in_large_file(self, tmp_path, client):
+        project = tmp_path / "proj"
+        project.mkdir()
+        filler = "".join(f"def filler_{i}():\n    return 'mesh extrude sketch {i}'\n\n" for i in range(1200))
+        target = "def check_login(user):\n    return password_token_session(user)\n"
+        (project / "big.py").write_text(filler + target)
+        assert (project / "big.py").stat().st_size > 50000 # skipped entirely before chunking
+        agent = SemanticSearchAgent(api_key=None, db_path=str(tmp_path / "ss.db"), client=client, max_chunk_chars=600)
+
+        progress = asyncio.run(agent.index_project("proj", str(project)))
+        assert progress["written"] > 10
+        [hit] = asyncio.run(agent.search("proj", "check_login password_token_session(user)", top_k=1))
+        target_line = filler.count("\n") + 1
+        assert hit["name"] == "big.py"
+        assert hit["start_line"] <= target_line <= hit["end_line"]
+
+    def test_crlf_file_offsets_match_disk(self, tmp_path, client):
+        project = tmp_path / "proj"
+        project.mkdir()
+        data = python_module(20).replace("\n", "\r\n").encode("utf-8")
+        (project / "a.py").write_bytes(data)
+        agent = SemanticSearchAgent(api_key=None, db_path=str(tmp_path / "ss.db"), client=client, max_chunk_chars=300)
+        asyncio.run(agent.index_project("proj", str(project)))
+
+        conn = sqlite3.connect(agent.db_path)
+        rows = conn.execute("SELECT start_byte, end_byte, content FROM chunks ORDER BY start_byte").fetchall()
+        conn.close()
+        assert len(rows) > 1 and rows[-1][1] == len(data)
+        for start, end, content in rows:
+            assert data[start:end].decode("utf-8") == content
+
+    def test_edit_replaces_chunks(self, tmp_path, client):
+        project = tmp_path / "proj"
+        project.mkdir()
+        (project / "a.py").write_text(python_module(20))
+        agent = SemanticSearchAgent(api_key=None, db_path=str(tmp_path / "ss.db"), client=client, max_chunk_chars=300)
+
+        async def scenario():
+            await agent.index_project("proj", str(project))
+            await agent.search("proj", "func_1")
+            (project / "a.py").write_text("def only():\n    return 1\n")
+            os.utime(project / "a.py", (0, 10 ** 10))
+            await agent.index_project("proj", str(project))
+            return await agent.search("proj", "only", top_k=5)
+
+        results = asyncio.run(scenario())
+        assert len(results) == 1 and (results[0]["start_line"], results[0]["end_line"]) == (1, 2)
+        conn = sqlite3.connect(agent.db_path)
+        assert conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0] == 1
+        conn.close()
@@ -0,0 +1,66 @@
+"""
+Tests for DesktopAgent screenshot options.
+"""
+import base64
+from unittest.mock import MagicMock
+
+import cv2
+import numpy as np
+import pytest
+
+# Try to import the agent, skip all tests if dependencies missing
+try:
+    import desktop_agent
+    HAS_DESKTOP = True
+except ImportError as e:
+    HAS_DESKTOP = False
+    IMPORT_ERROR = str(e)
+
+pytestmark = pytest.mark.skipif(not HAS_DESKTOP, reason=f"Desktop dependencies not installed: {IMPORT_ERROR if not HAS_DESKTOP else ''}")
+
+
+@pytest.fixture
+def agent(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(desktop_agent, "Desktop", MagicMock())
+    monkeypatch.setattr(desktop_agent.mss, "mss", MagicMock())
+    a = desktop_agent.DesktopAgent()
+    a.sct.monitors = [None, {"left": 0, "top": 0, "width": 1920, "height": 1080}]
+    a.sct.grab.side_effect = lambda monitor: np.full((monitor["height"], monitor["width"], 4), 200, dtype=np.uint8)
+    return a
+
+
+def decode(data):
+    return cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_UNCHANGED)
+
+
+class TestGetScreenshot:
+    """Test format, sizing, raw output and debug writes."""
+
+    @pytest.mark.asyncio
+    async def test_default_is_full_size_png_base64_without_debug_file(self, agent, tmp_path):
+        shot = await agent.get_screenshot()
+        assert shot["mime_type"] == "image/png"
+        assert decode(base64.b64decode(shot["data"])).shape == (1080, 1920, 3)
+        assert not list(tmp_path.iterdir())
+
+    @pytest.mark.asyncio
+    async def test_jpeg_raw_with_max_dimension(self, agent):
+        shot = await agent.get_screenshot(format="jpeg", quality=60, max_dimension=960, raw=True)
+        assert shot["mime_type"] == "image/jpeg"
+        assert isinstance(shot["data"], bytes)
+        assert decode(shot["data"]).shape == (540, 960, 3)
+
+    @pytest.mark.asyncio
+    async def test_region(self, agent):
+        shot = await agent.get_screenshot(region={"left": 10, "top": 10, "width": 200, "height": 100}, raw=True)
+        assert decode(shot["data"]).shape == (100, 200, 3)
+
+    @pytest.mark.asyncio
+    async def test_debug_write_is_opt_in(self, agent, tmp_path):
+        await agent.get_screenshot(format="webp", debug=True)
+        assert (tmp_path / "debug_screenshot.webp").exists()
+
+    @pytest.mark.asyncio
+    async def test_unknown_format_returns_none(self, agent):
+        assert await agent.get_screenshot(format="bmp") is None
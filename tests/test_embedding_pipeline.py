@@ -0,0 +1,265 @@
+"""
+Tests for the batched, concurrent embedding pipeline used by SemanticSearchAgent.index_project
+and its content-addressed embedding cache.
+"""
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+import pytest
+
+try:
+    from embedding_cache import EmbeddingCache, content_hash
+    from embedding_pipeline import EmbeddingBatcher, IndexingPipeline
+    from semantic_search_agent import SemanticSearchAgent
+    HAS_PIPELINE = True
+except ImportError as e:
+    HAS_PIPELINE = False
+    IMPORT_ERROR = str(e)
+
+pytestmark = pytest.mark.skipif(not HAS_PIPELINE, reason=f"google-genai not installed: {IMPORT_ERROR if not HAS_PIPELINE else ''}")
+
+
+def length_embedding(text):
+    """Cheap 3-d vector that only tells texts of different lengths apart."""
+    return [float(len(text)), 1.0, 0.5]
+
+
+class FakeModels:
+    """
+    embed_content stand-in. Records each request's batch size and the peak number of concurrent
+    requests; can sleep `delay` per request and fail the first `fail_first` requests.
+    """
+    def __init__(self, fail_first=0, delay=0.0):
+        self.fail_first = fail_first
+        self.delay = delay
+        self.batches = []
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def embed_content(self, model, contents, config=None):
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            call = len(self.batches)
+            self.batches.append(len(contents))
+        try:
+            time.sleep(self.delay)
+            if call < self.fail_first:
+                raise RuntimeError("429 RESOURCE_EXHAUSTED")
+            embeddings = [type("Embedding", (), {"values": length_embedding(t)})() for t in contents]
+            return type("Response", (), {"embeddings": embeddings})()
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+class FakeClient:
+    def __init__(self, **kwargs):
+        self.models = FakeModels(**kwargs)
+
+
+@pytest.fixture
+def client():
+    return FakeClient()
+
+
+async def items(n):
+    for i in range(n):
+        yield {"text": f"text {i}", "key": i}
+
+
+class TestEmbeddingBatcher:
+    """Test batching, concurrency and retry."""
+
+    def test_batches_and_concurrency_limit(self):
+        client = FakeClient(delay=0.02)
+        batcher = EmbeddingBatcher(client, batch_size=10, max_concurrency=3)
+        vectors = asyncio.run(batcher.embed([f"t{i}" for i in range(95)]))
+        assert len(vectors) == 95 and vectors[0][0] == 2.0
+        assert client.models.batches.count(10) == 9 and 5 in client.models.batches
+        assert client.models.peak == 3
+
+    def test_retry_with_backoff(self):
+        client = FakeClient(fail_first=2)
+        batcher = EmbeddingBatcher(client, batch_size=10, max_retries=3, base_delay=0.001)
+        vectors = asyncio.run(batcher.embed(["a", "b"]))
+        assert all(v is not None for v in vectors)
+        assert batcher.get_stats()["retries"] == 2
+
+    def test_gives_up_after_max_retries(self):
+        client = FakeClient(fail_first=100)
+        batcher = EmbeddingBatcher(client, batch_size=10, max_retries=1, base_delay=0.001)
+        assert asyncio.run(batcher.embed(["a", "b"])) == [None, None]
+        assert batcher.get_stats()["failures"] == 1
+
+
+class TestIndexingPipeline:
+    """Test the producer -> batcher -> writer stages."""
+
+    def test_writes_in_transactions_with_progress(self):
+        transactions = []
+        progress = []
+
+        async def write(rows):
+            transactions.append([item["key"] for item, _ in rows])
+
+        pipeline = IndexingPipeline(EmbeddingBatcher(FakeClient(), batch_size=8), items(50), write,
+                                    commit_every=20, on_progress=progress.append)
+        result = asyncio.run(pipeline.run())
+        assert sorted(k for t in transactions for k in t) == list(range(50))
+        assert [len(t) for t in transactions] == [20, 20, 10]
+        assert result["written"] == 50 and result["done"]
+        assert len(progress) == 4 and progress[-1]["done"] and not progress[0]["done"]
+        assert set(result["throughput_per_s"]) == {"produce", "embed", "write", "overall"}
+
+    def test_failed_batches_are_not_written(self):
+        written = []
+
+        async def write(rows):
+            written.extend(rows)
+
+        batcher = EmbeddingBatcher(FakeClient(fail_first=100), batch_size=5, max_retries=0)
+        result = asyncio.run(IndexingPipeline(batcher, items(12), write).run())
+        assert written == [] and result["failed"] == 12
+
+
+    def test_failing_writer_stops_the_other_stages(self):
+        async def write(rows):
+            raise RuntimeError("disk full")
+
+        async def main():
+            pipeline = IndexingPipeline(EmbeddingBatcher(FakeClient(), batch_size=2), items(100), write,
+                                        commit_every=1, queue_size=2)
+            before = asyncio.all_tasks()
+            with pytest.raises(RuntimeError, match="disk full"):
+                await pipeline.run()
+            return asyncio.all_tasks() - before
+
+        assert asyncio.run(asyncio.wait_for(main(), 5)) == set()
+
+
+class TestIndexProject:
+    """Test index_project end to end against a fake client."""
+
+    def test_cold_index_then_single_edit(self, tmp_path, client):
+        project = tmp_path / "proj"
+        project.mkdir()
+        for i in range(30):
+            (project / f"m{i}.py").write_text(f"def f{i}(): return {i}\n")
+        agent = SemanticSearchAgent(api_key=None, db_path=str(tmp_path / "ss.db"), client=client, batch_size=8)
+        events = []
+
+        async def on_progress(progress):
+            events.append(progress)
+
+        cold = asyncio.run(agent.index_project("proj", str(project), on_progress=on_progress))
+        assert cold["written"] == 30
+        assert len(client.models.batches) == 4 # ceil(30 / 8) requests, not 30
+        assert events[-1]["project"] == "proj" and events[-1]["done"]
+
+        time.sleep(0.01)
+        (project / "m3.py").write_text("def f3(): return 'edited'\n")
+        warm = asyncio.run(agent.index_project("proj", str(project)))
+        assert warm["written"] == 1 and len(client.models.batches) == 5
+
+        conn = sqlite3.connect(agent.db_path)
+        assert conn.execute("SELECT COUNT(*) FROM file_embeddings").fetchone()[0] == 30
+        conn.close()
+
+
+class TestEmbeddingCache:
+    """Test that unchanged text is served from the content-addressed cache."""
+
+    def make_project(self, root, name, files):
+        project = root / name
+        project.mkdir()
+        for filename, text in files.items():
+            (project / filename).write_text(text)
+        return project
+
+    def test_batcher_dedupes_and_caches(self, tmp_path, client):
+        cache = EmbeddingCache(str(tmp_path / "cache.db"))
+        batcher = EmbeddingBatcher(client, batch_size=10, cache=cache)
+        first = asyncio.run(batcher.embed(["same", "same", "other"]))
+        assert client.models.batches == [2]
+        second = asyncio.run(batcher.embed(["other", "same", "new"]))
+        assert client.models.batches == [2, 1]
+        assert list(second[0]) == list(first[2]) and list(second[1]) == list(first[0])
+        assert cache.get_stats()["hits"] == 2 and cache.get_stats()["misses"] == 4
+
+    def test_touch_and_copy_cost_no_requests(self, tmp_path, client):
+        files = {f"m{i}.py": f"def f{i}(): return {i}\n" for i in range(10)}
+        project = self.make_project(tmp_path, "proj", files)
+        agent = SemanticSearchAgent(api_key=None, db_path=str(tmp_path / "ss.db"), client=client)
+        asyncio.run(agent.index_project("proj", str(project)))
+        calls = len(client.models.batches)
+
+        # Branch switch: every mtime moves, no bytes change
+        for path in project.iterdir():
+            os.utime(path, (0, path.stat().st_mtime + 10))
+        again = asyncio.run(agent.index_project("proj", str(project)))
+        assert again["written"] == 10 and len(client.models.batches) == calls
+
+        # Same vendored files in another project
+        vendored = self.make_project(tmp_path, "other", files)
+        asyncio.run(agent.index_project("other", str(vendored)))
+        assert len(client.models.batches) == calls
+        assert agent.cache.get_stats()["hits"] == 20
+
+    def test_shared_with_interactions_and_seeded_from_chunks(self, tmp_path, client):
+        db_path = str(tmp_path / "ss.db")
+        agent = SemanticSearchAgent(api_key=None, db_path=db_path, client=client)
+        asyncio.run(agent.log_interaction("open the door", "control", "opened"))
+        asyncio.run(agent.log_interaction("open the door", "control", "opened"))
+        assert len(client.models.batches) == 1
+
+        project = self.make_project(tmp_path, "proj", {"a.py": "def a(): pass\n"})
+        asyncio.run(agent.index_project("proj", str(project)))
+        # A database indexed before the cache existed is seeded from its chunk hashes
+        conn = sqlite3.connect(db_path)
+        conn.execute("DROP TABLE embedding_cache")
+        conn.commit()
+        conn.close()
+        reopened = SemanticSearchAgent(api_key=None, db_path=db_path, client=client)
+        embedder = reopened.embedder
+        assert embedder.cache.get_many(embedder.model, embedder.task_type, [content_hash("def a(): pass\n")])[0] is not None
+
+    def test_task_type_is_part_of_the_key(self, tmp_path, client):
+        cache = EmbeddingCache(str(tmp_path / "cache.db"))
+        asyncio.run(EmbeddingBatcher(client, cache=cache).embed(["text"]))
+        asyncio.run(EmbeddingBatcher(client, task_type="SEMANTIC_SIMILARITY", cache=cache).embed(["text"]))
+        assert client.models.batches == [1, 1]
+
+    def test_least_recently_used_rows_are_evicted(self, tmp_path):
+        cache = EmbeddingCache(str(tmp_path / "cache.db"), max_rows=3)
+        for name in "abc":
+            cache.put_many("m", "t", [(name, [1.0])])
+            time.sleep(0.01)
+        cache.get_many("m", "t", ["a"])
+        cache.put_many("m", "t", [("d", [1.0])])
+        assert [v is not None for v in cache.get_many("m", "t", ["a", "b", "c", "d"])] == [True, False, True, True]
+        assert cache.get_stats()["evicted"] == 1
+
+    def test_migrates_rows_without_task_type(self, tmp_path):
+        db_path = str(tmp_path / "cache.db")
+        conn = sqlite3.connect(db_path)
+        conn.execute("CREATE TABLE embedding_cache (model TEXT, hash TEXT, embedding BLOB, PRIMARY KEY (model, hash)) WITHOUT ROWID")
+        conn.execute("INSERT INTO embedding_cache VALUES ('m', 'h', ?)", (np.ones(4, dtype=np.float32).tobytes(),))
+        conn.commit()
+        conn.close()
+        cache = EmbeddingCache(db_path)
+        assert list(cache.get_many("m", EmbeddingCache.LEGACY_TASK_TYPE, ["h"])[0]) == [1.0] * 4
+
+    def test_queries_are_not_persisted(self, tmp_path, client):
+        agent = SemanticSearchAgent(api_key=None, db_path=str(tmp_path / "ss.db"), client=client)
+        asyncio.run(agent.search("proj", "where is the login code"))
+        asyncio.run(agent.search("proj", "where is the login code"))
+        assert client.models.batches == [1]
+        conn = sqlite3.connect(agent.db_path)
+        assert conn.execute("SELECT COUNT(*) FROM embedding_cache").fetchone()[0] == 0
+        conn.close()
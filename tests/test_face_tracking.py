@@ -0,0 +1,115 @@
+"""
+Tests for the face authentication tracking and matching helpers.
+"""
+import time
+
+import numpy as np
+import pytest
+
+from face_tracking import FaceROITracker, PreviewThrottle, ReferenceMatrix, UnlockMetrics
+
+
+def face_landmarks(cx=0.5, cy=0.5, size=0.2, n=468, seed=0):
+    """Fake (x, y, z) landmarks spread over a square face normalized to the image."""
+    rng = np.random.default_rng(seed)
+    coords = np.empty((n, 3), dtype=np.float32)
+    coords[:, 0] = cx + (rng.random(n) - 0.5) * size
+    coords[:, 1] = cy + (rng.random(n) - 0.5) * size
+    coords[:, 2] = (rng.random(n) - 0.5) * 0.05
+    return coords.ravel()
+
+
+class TestReferenceMatrix:
+    """Test vectorized multi-reference matching."""
+
+    def test_best_of_several_references(self):
+        refs = ReferenceMatrix()
+        for i in range(3):
+            refs.add(face_landmarks(seed=i), label=f"ref{i}")
+        live = face_landmarks(seed=2) * 1.01
+        similarity, label = refs.best_match(live)
+        assert label == "ref2"
+        assert similarity == pytest.approx(1.0, abs=1e-5)
+
+    def test_matches_loop_of_cosine_similarities(self):
+        refs = ReferenceMatrix()
+        vectors = [np.random.default_rng(i).random(1404).astype(np.float32) for i in range(5)]
+        for v in vectors:
+            refs.add(v)
+        live = np.random.default_rng(9).random(1404).astype(np.float32)
+        expected = [np.dot(v, live) / (np.linalg.norm(v) * np.linalg.norm(live)) for v in vectors]
+        np.testing.assert_allclose(refs.similarities(live), expected, rtol=1e-5)
+
+    def test_empty_and_degenerate(self):
+        refs = ReferenceMatrix()
+        assert refs.best_match(face_landmarks()) == (0.0, None)
+        assert not refs.add(np.zeros(1404))
+        refs.add(face_landmarks())
+        assert refs.best_match(None) == (0.0, None)
+        with pytest.raises(ValueError):
+            refs.add(np.ones(10))
+
+
+class TestFaceROITracker:
+    """Test downscaled search, ROI crops and coordinate mapping."""
+
+    def test_search_frame_is_downscaled(self):
+        tracker = FaceROITracker(detect_width=320)
+        image, region = tracker.prepare(np.zeros((720, 1280, 3), dtype=np.uint8))
+        assert image.shape[:2] == (180, 320)
+        assert region == (0, 0, 1280, 720)
+
+    def test_detection_opens_roi_and_maps_back(self):
+        tracker = FaceROITracker(roi_size=256, margin=0.3)
+        frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+        _, region = tracker.prepare(frame)
+        landmarks = face_landmarks(cx=0.25, cy=0.5, size=0.1)
+        mapped = tracker.update(landmarks, region, frame.shape)
+        np.testing.assert_allclose(mapped, landmarks, atol=1e-6)
+        assert tracker.roi is not None
+
+        # The crop around the face is what the landmarker sees next
+        image, roi = tracker.prepare(frame)
+        assert roi == tracker.roi and max(image.shape[:2]) <= 256
+        x0, y0, x1, y1 = roi
+        assert x0 <= 0.2 * 1280 and x1 >= 0.3 * 1280
+
+        # Landmarks normalized to the crop come back in full-frame coordinates
+        in_crop = np.array([0.5, 0.5, 0.1], dtype=np.float32)
+        mapped = tracker.update(np.tile(in_crop, 3), roi, frame.shape).reshape(-1, 3)[0]
+        assert mapped[0] == pytest.approx((x0 + 0.5 * (x1 - x0)) / 1280)
+        assert mapped[1] == pytest.approx((y0 + 0.5 * (y1 - y0)) / 720)
+        assert mapped[2] == pytest.approx(0.1 * (x1 - x0) / 1280)
+        assert tracker.get_stats()["roi_detections"] == 1
+
+    def test_lost_face_falls_back_to_full_frame(self):
+        tracker = FaceROITracker()
+        frame = np.zeros((480, 640, 3), dtype=np.uint8)
+        tracker.update(face_landmarks(), (0, 0, 640, 480), frame.shape)
+        _, roi = tracker.prepare(frame)
+        assert tracker.update(None, roi, frame.shape) is None
+        assert tracker.prepare(frame)[1] == (0, 0, 640, 480)
+        assert tracker.get_stats()["roi_losses"] == 1
+
+
+class TestPreviewAndMetrics:
+    """Test preview throttling and unlock metrics."""
+
+    def test_preview_throttle(self):
+        throttle = PreviewThrottle(fps=10)
+        sent = [throttle.ready(now=t / 100) for t in range(100)] # 1s of 100 fps camera
+        assert sum(sent) == 10
+        assert throttle.skipped == 90
+
+    def test_unlock_metrics(self):
+        metrics = UnlockMetrics()
+        metrics.start()
+        metrics.frame(False)
+        time.sleep(0.01)
+        metrics.frame(True)
+        metrics.unlock()
+        metrics.finish()
+        stats = metrics.to_dict()
+        assert stats["frames"] == 2
+        assert stats["time_to_unlock_ms"] >= stats["time_to_first_face_ms"] >= 10
+        assert stats["cpu_percent"] is not None
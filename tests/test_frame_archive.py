@@ -0,0 +1,158 @@
+"""
+Tests for the segmented visual memory frame archive.
+"""
+import asyncio
+import os
+import sqlite3
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+from frame_archive import RECORD_HEADER, FrameArchive
+from local_ocr import LocalOCRTier, OCRBackend
+
+try:
+    from visual_memory_agent import VisualMemoryAgent
+    HAS_AGENT = True
+except ImportError as e:
+    HAS_AGENT = False
+    IMPORT_ERROR = str(e)
+
+
+def jpeg(width=640, height=400, seed=0):
+    frame = np.random.default_rng(seed).integers(0, 255, (height, width, 3), dtype=np.uint8)
+    return cv2.imencode(".jpg", frame)[1].tobytes()
+
+
+def make_archive(tmp_path, **kwargs):
+    return FrameArchive(str(tmp_path / "vm.db"), str(tmp_path / "frames"), **kwargs)
+
+
+class TestFrameArchive:
+    """Test appends, segment rollover, downscaling and whole-segment expiry."""
+
+    def test_append_and_read_roundtrip(self, tmp_path):
+        archive = make_archive(tmp_path)
+        data = [jpeg(seed=i) for i in range(3)]
+        locators = [archive.append(1000.0 + i, d) for i, d in enumerate(data)]
+        assert [archive.read(*loc) for loc in locators] == data
+        assert len(os.listdir(tmp_path / "frames")) == 1
+
+    def test_segment_file_is_self_describing(self, tmp_path):
+        archive = make_archive(tmp_path)
+        data = jpeg()
+        archive.append(1000.0, data)
+        raw = open(os.path.join(tmp_path / "frames", os.listdir(tmp_path / "frames")[0]), "rb").read()
+        timestamp, length = RECORD_HEADER.unpack_from(raw)
+        assert (timestamp, length) == (1000.0, len(data))
+        assert raw[RECORD_HEADER.size:] == data
+
+    def test_new_segment_per_window(self, tmp_path):
+        archive = make_archive(tmp_path, segment_seconds=60)
+        ids = {archive.append(t, jpeg())[0] for t in (0.0, 30.0, 61.0, 150.0)}
+        assert len(ids) == 3
+        assert archive.get_stats()["segments"] == 3
+
+    def test_large_frames_are_downscaled(self, tmp_path):
+        archive = make_archive(tmp_path, max_dimension=320)
+        locator = archive.append(0.0, jpeg(1600, 1000))
+        stored = cv2.imdecode(np.frombuffer(archive.read(*locator), np.uint8), cv2.IMREAD_COLOR)
+        assert stored.shape[:2] == (200, 320)
+        small = jpeg(200, 100)
+        assert archive.read(*archive.append(1.0, small)) == small
+
+    def test_expiry_drops_whole_segments(self, tmp_path):
+        archive = make_archive(tmp_path, segment_seconds=60)
+        old = archive.append(0.0, jpeg())
+        archive.append(59.0, jpeg())
+        current = archive.append(100.0, jpeg())
+        expired = archive.expired_segments(cutoff=90.0)
+        assert [segment_id for segment_id, _ in expired] == [old[0]]
+        assert archive.drop_segments(expired) == 1
+        assert archive.read(*old) is None
+        assert archive.read(*current) is not None
+        assert len(os.listdir(tmp_path / "frames")) == 1
+
+
+class FakeDesktop:
+    def __init__(self, frames=()):
+        self.frames = list(frames)
+
+    async def get_screenshot(self, **kwargs):
+        return {"mime_type": "image/jpeg", "data": self.frames.pop(0)}
+
+    async def get_active_window_info(self):
+        return {"title": "Editor"}
+
+
+class FakeModels:
+    def generate_content(self, model, contents):
+        return type("Response", (), {"text": "an editor with some code"})()
+
+
+class FakeClient:
+    def __init__(self):
+        self.models = FakeModels()
+
+
+@pytest.fixture
+def client():
+    return FakeClient()
+
+
+@pytest.mark.skipif(not HAS_AGENT, reason=f"Visual memory agent unavailable: {IMPORT_ERROR if not HAS_AGENT else ''}")
+class TestVisualMemoryArchive:
+    """Test that the agent stores frames in the archive and expires them by segment."""
+
+    def test_frames_are_archived_and_loadable(self, tmp_path, client):
+        data = jpeg()
+        agent = VisualMemoryAgent(FakeDesktop([data, data]), db_path=str(tmp_path / "vm.db"), client=client,
+                                  ocr=LocalOCRTier(OCRBackend()))
+        asyncio.run(agent.record_current_screen())
+        asyncio.run(agent.record_current_screen())
+        [result] = agent.search("editor")
+        assert agent.load_frame(result["frame_id"]) == data
+        # The duplicate in the same segment points at the original's bytes
+        assert agent.get_stats()["archive"]["frames"] == 1
+
+    def test_cleanup_removes_expired_segments_and_rows(self, tmp_path, client):
+        agent = VisualMemoryAgent(FakeDesktop(), db_path=str(tmp_path / "vm.db"), client=client, retention_hours=1)
+        now = time.time()
+        for ts in (now - 3 * 3600, now - 60):
+            segment_id, offset, length = agent.archive.append(ts, jpeg())
+            conn = sqlite3.connect(agent.db_path)
+            conn.execute("INSERT INTO visual_memory (timestamp, window_title, content, segment_id, frame_offset, frame_length) VALUES (?, 'Editor', 'code', ?, ?, ?)",
+                         (ts, segment_id, offset, length))
+            conn.commit()
+            conn.close()
+        agent._cleanup()
+        conn = sqlite3.connect(agent.db_path)
+        remaining = [row[0] for row in conn.execute("SELECT timestamp FROM visual_memory")]
+        conn.close()
+        assert remaining == [pytest.approx(now - 60)]
+        assert agent.get_stats()["archive"]["segments"] == 1
+        assert agent.search("code") and len(agent.search("code")) == 1
+
+    def test_segment_deletes_use_an_index(self, tmp_path, client):
+        def plan(db_path):
+            conn = sqlite3.connect(db_path)
+            rows = conn.execute("EXPLAIN QUERY PLAN DELETE FROM visual_memory WHERE segment_id = ?", (1,)).fetchall()
+            conn.close()
+            return " ".join(row[-1] for row in rows)
+
+        fresh = str(tmp_path / "fresh.db")
+        VisualMemoryAgent(FakeDesktop(), db_path=fresh, client=client, ocr=LocalOCRTier(OCRBackend()))
+        assert "idx_segment" in plan(fresh)
+
+        # Database from before the index: archive columns present, no index on segment_id
+        migrated = str(tmp_path / "migrated.db")
+        conn = sqlite3.connect(migrated)
+        conn.execute("""CREATE TABLE visual_memory (timestamp REAL, image_path TEXT, window_title TEXT, content TEXT,
+                        phash INTEGER, duplicate_of INTEGER, segment_id INTEGER, frame_offset INTEGER,
+                        frame_length INTEGER, index_tier TEXT)""")
+        conn.commit()
+        conn.close()
+        VisualMemoryAgent(FakeDesktop(), db_path=migrated, client=client, ocr=LocalOCRTier(OCRBackend()))
+        assert "idx_segment" in plan(migrated)
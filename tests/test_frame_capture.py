@@ -0,0 +1,139 @@
+"""
+Tests for the background capture worker.
+"""
+import asyncio
+import threading
+import time
+
+import numpy as np
+
+from frame_capture import BackgroundFrameCapture
+from frame_encoder import FrameEncoder
+from frame_gate import FrameChangeGate
+
+
+class Screen:
+    """Frame source whose content changes only when told to."""
+
+    def __init__(self):
+        self.value = 0
+        self.grabs = 0
+
+    def __call__(self):
+        self.grabs += 1
+        return np.full((90, 160, 3), self.value, dtype=np.uint8)
+
+
+def make_capture(screen, **kwargs):
+    return BackgroundFrameCapture(screen, FrameChangeGate(), FrameEncoder(max_size=(64, 64)), **kwargs)
+
+
+class TestBackgroundFrameCapture:
+    """Test publishing, rate adaptation and the age metric."""
+
+    def test_only_changed_frames_are_published(self):
+        screen = Screen()
+        capture = make_capture(screen)
+        assert capture.capture_once()
+        assert not capture.capture_once()
+        screen.value = 255
+        assert capture.capture_once()
+        seq, _, payload = capture.latest()
+        assert seq == 2
+        assert payload["mime_type"] == "image/jpeg"
+
+    def test_backs_off_when_idle_and_speeds_up_when_active(self):
+        active = threading.Event()
+        capture = make_capture(Screen(), is_active=active.is_set, idle_interval=2.0)
+        capture.capture_once()
+        assert capture.interval == capture.changing_interval
+        for _ in range(20):
+            capture.capture_once()
+        assert capture.interval == 2.0
+        active.set()
+        capture.capture_once()
+        assert capture.interval == capture.active_interval
+
+    def test_wake_switches_to_fast_rate(self):
+        capture = make_capture(Screen(), idle_interval=2.0)
+        capture.interval = 2.0
+        capture.wake()
+        assert capture.interval == capture.active_interval
+
+    def test_thread_publishes_and_pauses(self):
+        screen = Screen()
+        paused = threading.Event()
+        published = threading.Event()
+        capture = make_capture(screen, is_paused=paused.is_set, on_frame=lambda seq: published.set(), changing_interval=0.01)
+        capture.start()
+        try:
+            assert published.wait(1.0)
+            paused.set()
+            time.sleep(0.05)
+            grabs = screen.grabs
+            time.sleep(0.1)
+            assert screen.grabs == grabs
+        finally:
+            capture.stop()
+        assert capture._thread is None
+
+    def test_record_use_reports_frame_age(self):
+        capture = make_capture(Screen())
+        assert capture.record_use() is None
+        capture.capture_once()
+        time.sleep(0.02)
+        assert capture.record_use() >= 0.02
+        stats = capture.get_stats()
+        assert stats["frame_age_p50_ms"] >= 20
+        assert stats["frames_published"] == 1
+
+    def test_unchanged_capture_keeps_frame_current(self):
+        capture = make_capture(Screen())
+        capture.capture_once()
+        time.sleep(0.05)
+        assert not capture.capture_once() # same screen: nothing published, but the frame is confirmed
+        assert capture.record_use() < 0.05
+
+    async def test_forward_sends_at_most_once_per_interval(self):
+        screen = Screen()
+        new_frame = asyncio.Event()
+        capture = make_capture(screen, on_frame=lambda seq: new_frame.set())
+        sent = []
+
+        async def send(payload):
+            sent.append(payload)
+
+        forwarder = asyncio.create_task(capture.forward(new_frame, send, min_interval=0.1))
+        started = time.monotonic()
+        while time.monotonic() - started < 0.35:
+            screen.value = (screen.value + 64) % 256 # a new frame every 10 ms
+            capture.capture_once()
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.12)
+        forwarder.cancel()
+        # ~30 frames published, one sent per 100 ms, the last one being the newest
+        assert capture.get_stats()["frames_published"] > 20
+        assert 3 <= len(sent) <= 5
+        assert sent[-1] is capture.latest()[2]
+        assert capture.get_stats()["frames_sent"] == len(sent)
+
+    def test_on_stop_runs_on_capture_thread(self):
+        # Thread-bound handles (mss, camera) must be closed by the thread that opened them
+        local = threading.local()
+        opened, closed = [], []
+
+        def grab():
+            if getattr(local, "handle", None) is None:
+                local.handle = threading.get_ident()
+                opened.append(local.handle)
+            return np.zeros((90, 160, 3), dtype=np.uint8)
+
+        def release():
+            closed.append((threading.get_ident(), getattr(local, "handle", None)))
+
+        capture = make_capture(grab, on_stop=release, changing_interval=0.01)
+        capture.start()
+        time.sleep(0.05)
+        capture.stop()
+        assert len(opened) == 1
+        assert closed == [(opened[0], opened[0])]
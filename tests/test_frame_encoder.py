@@ -0,0 +1,67 @@
+"""
+Tests for the shared screen/camera FrameEncoder.
+"""
+import base64
+
+import cv2
+import numpy as np
+import pytest
+
+from frame_encoder import FrameEncoder
+
+
+def screen(height=1080, width=1920):
+    frame = np.zeros((height, width, 4), dtype=np.uint8)
+    frame[..., 0] = np.linspace(0, 255, width, dtype=np.uint8)
+    frame[..., 1] = np.linspace(0, 255, height, dtype=np.uint8)[:, None]
+    frame[..., 2] = 128
+    return frame  # alpha left at 0, as some capture backends do
+
+
+class TestFrameEncoder:
+    """Test sizing, formats and buffer reuse."""
+
+    def test_downscales_keeping_aspect(self):
+        encoder = FrameEncoder(max_size=(1024, 1024))
+        decoded = cv2.imdecode(np.frombuffer(encoder.encode(screen()), np.uint8), cv2.IMREAD_UNCHANGED)
+        assert decoded.shape == (576, 1024, 3)
+
+    def test_never_upscales(self):
+        encoder = FrameEncoder(max_size=(1024, 1024))
+        assert encoder.target_size(640, 480) == (640, 480)
+
+    def test_png_drops_alpha(self):
+        encoder = FrameEncoder(max_size=(320, 320), format="png")
+        decoded = cv2.imdecode(np.frombuffer(encoder.encode(screen()), np.uint8), cv2.IMREAD_UNCHANGED)
+        assert decoded.shape[2] == 3
+        assert decoded[..., 2].mean() == pytest.approx(128, abs=1)
+
+    def test_quality_affects_size(self):
+        frame = np.random.default_rng(0).integers(0, 255, (480, 640, 3), dtype=np.uint8)
+        encoder = FrameEncoder()
+        assert len(encoder.encode(frame, quality=30)) < len(encoder.encode(frame, quality=95))
+
+    def test_buffers_are_reused(self):
+        encoder = FrameEncoder(max_size=(640, 640))
+        encoder.encode(screen())
+        buffers = dict(encoder._buffers)
+        encoder.encode(screen())
+        assert buffers and all(encoder._buffers[key] is buf for key, buf in buffers.items())
+
+    def test_multi_stage_downscale(self):
+        encoder = FrameEncoder(max_size=(400, 400))
+        decoded = cv2.imdecode(np.frombuffer(encoder.encode(screen(2160, 3840)), np.uint8), cv2.IMREAD_UNCHANGED)
+        assert decoded.shape == (225, 400, 3)
+        assert ("half", 2) in encoder._buffers
+
+    def test_payload(self):
+        encoder = FrameEncoder(max_size=(256, 256))
+        payload = encoder.encode_payload(screen(), format="webp")
+        assert payload["mime_type"] == "image/webp"
+        assert base64.b64decode(payload["data"])[:4] == b"RIFF"
+        assert encoder.format == "jpeg"
+        assert encoder.get_stats()["frames_encoded"] == 1
+
+    def test_unknown_format(self):
+        with pytest.raises(ValueError):
+            FrameEncoder(format="bmp")
@@ -0,0 +1,88 @@
+"""
+Tests for the video frame change-detection gate.
+"""
+import time
+
+import cv2
+import numpy as np
+
+from frame_gate import FrameChangeGate
+
+
+def desktop(height=360, width=640, channels=4):
+    rng = np.random.default_rng(0)
+    frame = np.full((height, width, channels), 40, dtype=np.uint8)
+    frame[40:200, 60:400] = rng.integers(0, 255, (160, 340, channels), dtype=np.uint8)
+    return frame
+
+
+class TestFrameChangeGate:
+    """Test which frames pass and how they are counted."""
+
+    def test_first_frame_always_sent(self):
+        gate = FrameChangeGate()
+        assert gate.should_send(desktop())
+
+    def test_identical_and_noisy_frames_suppressed(self):
+        gate = FrameChangeGate()
+        frame = desktop()
+        gate.should_send(frame)
+        noisy = np.clip(frame.astype(np.int16) + np.random.default_rng(1).integers(-3, 4, frame.shape), 0, 255).astype(np.uint8)
+        assert not gate.should_send(frame)
+        assert not gate.should_send(noisy)
+        assert gate.get_stats()["frames_suppressed"] == 2
+
+    def test_local_change_passes(self):
+        gate = FrameChangeGate()
+        frame = desktop()
+        gate.should_send(frame)
+        changed = frame.copy()
+        changed[250:330, 450:620] = 255  # a new window in one corner
+        assert gate.should_send(changed)
+        assert gate.last_change > gate.threshold
+
+    def test_reference_is_last_sent_frame(self):
+        gate = FrameChangeGate(threshold=0.05)
+        frame = desktop()
+        gate.should_send(frame)
+        # Grow a bright region a little at a time; each step alone is below the threshold
+        sent = False
+        for width in range(20, 400, 20):
+            step = frame.copy()
+            step[300:340, :width] = 255
+            sent = sent or gate.should_send(step)
+        assert sent
+
+    def test_keyframe_interval(self):
+        gate = FrameChangeGate(keyframe_interval=0.05)
+        frame = desktop()
+        gate.should_send(frame)
+        assert not gate.should_send(frame)
+        time.sleep(0.06)
+        assert gate.should_send(frame)
+
+    def test_reset_sends_next_frame(self):
+        gate = FrameChangeGate()
+        frame = desktop()
+        gate.should_send(frame)
+        gate.reset()
+        assert gate.should_send(frame)
+
+    def test_jpeg_signature(self):
+        gate = FrameChangeGate()
+        ok, jpeg = cv2.imencode(".jpg", desktop(channels=3))
+        assert ok
+        signature = gate.signature_from_jpeg(jpeg.tobytes())
+        assert signature.shape == (gate.grid, gate.grid)
+        assert gate.should_send(signature=signature)
+        assert not gate.should_send(signature=gate.signature_from_jpeg(jpeg.tobytes()))
+        assert gate.signature_from_jpeg(b"not a jpeg") is None
+
+    def test_stats(self):
+        gate = FrameChangeGate()
+        frame = desktop()
+        for _ in range(4):
+            gate.should_send(frame)
+        stats = gate.get_stats()
+        assert stats["frames_sent"] == 1
+        assert stats["suppressed_ratio"] == 0.75
@@ -0,0 +1,69 @@
+"""
+Tests for the per-turn voice latency tracer.
+"""
+import time
+
+from latency_tracer import LatencyTracer
+
+
+def run_turn(tracer, gap=0.001):
+    tracer.begin_turn()
+    for point in ("first_transcript", "first_model_audio", "first_playback"):
+        time.sleep(gap)
+        tracer.mark(point)
+    return tracer.end_turn()
+
+
+class TestLatencyTracer:
+    """Test turn boundaries and percentile reporting."""
+
+    def test_segments_are_ordered(self):
+        tracer = LatencyTracer()
+        trace = run_turn(tracer)
+        segments = trace.segments_ms()
+        assert 0 < segments["first_transcript"] < segments["first_model_audio"] < segments["end_to_end"]
+        assert segments["local_playback"] > 0
+        assert segments["tool_dispatch"] is None
+
+    def test_only_first_occurrence_counts(self):
+        tracer = LatencyTracer()
+        tracer.begin_turn()
+        tracer.mark("first_model_audio")
+        first = tracer.current.first_model_audio
+        tracer.mark("first_model_audio")
+        assert tracer.current.first_model_audio == first
+
+    def test_backdated_speech_end(self):
+        tracer = LatencyTracer()
+        tracer.begin_turn(ago=0.5)
+        tracer.mark("first_model_audio")
+        assert tracer.end_turn().segments_ms()["first_model_audio"] >= 500
+
+    def test_tool_only_turn_stays_open(self):
+        tracer = LatencyTracer()
+        tracer.begin_turn()
+        tracer.tool_started()
+        tracer.tool_finished()
+        assert tracer.end_turn() is None
+        tracer.mark("first_model_audio")
+        trace = tracer.end_turn()
+        assert trace.tool_calls == 1
+        assert trace.segments_ms()["tool_dispatch"] is not None
+
+    def test_late_playback_does_not_open_turn(self):
+        tracer = LatencyTracer()
+        run_turn(tracer)
+        tracer.mark("first_playback")
+        assert tracer.current is None
+
+    def test_ring_is_bounded_and_percentiles_reported(self):
+        tracer = LatencyTracer(capacity=5)
+        for _ in range(8):
+            run_turn(tracer, gap=0)
+        stats = tracer.get_stats()
+        assert stats["turns"] == 8
+        assert stats["segments_ms"]["end_to_end"]["count"] == 5
+        e2e = stats["segments_ms"]["end_to_end"]
+        assert e2e["p50"] <= e2e["p95"] <= e2e["p99"]
+        assert stats["segments_ms"]["tool_dispatch"]["count"] == 0
+        assert stats["last_turn"]["segments_ms"]["end_to_end"] is not None
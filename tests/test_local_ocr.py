@@ -0,0 +1,147 @@
+"""
+Tests for the local OCR indexing tier and its Gemini escalation.
+"""
+import asyncio
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+from local_ocr import LocalOCRTier, OCRBackend, word_count
+
+try:
+    from visual_memory_agent import VisualMemoryAgent
+    HAS_AGENT = True
+except ImportError as e:
+    HAS_AGENT = False
+    IMPORT_ERROR = str(e)
+
+DENSE = "def record_current_screen self describe False captures screen appends frame archive performs lightweight indexing returns"
+SPARSE = "OK ~ |"
+
+
+def jpeg(seed=0):
+    frame = np.random.default_rng(seed).integers(0, 255, (200, 320, 3), dtype=np.uint8)
+    return cv2.imencode(".jpg", frame)[1].tobytes()
+
+
+class FakeOCRBackend(OCRBackend):
+    available = True
+
+    def __init__(self, text):
+        self.text = text
+
+    def extract(self, jpeg_bytes):
+        return self.text
+
+
+class FailingOCRBackend(OCRBackend):
+    available = True
+
+    def extract(self, jpeg_bytes):
+        raise RuntimeError("tesseract crashed")
+
+
+class FakeDesktop:
+    def __init__(self, count):
+        self.frames = [jpeg(i) for i in range(count)]
+
+    async def get_screenshot(self, **kwargs):
+        return {"mime_type": "image/jpeg", "data": self.frames.pop(0)}
+
+    async def get_active_window_info(self):
+        return {"title": "Editor"}
+
+
+class FakeModels:
+    def __init__(self):
+        self.calls = 0
+        self.fail = False
+
+    def generate_content(self, model, contents):
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError("429 RESOURCE_EXHAUSTED")
+        return type("Response", (), {"text": "a code editor"})()
+
+
+class FakeClient:
+    def __init__(self):
+        self.models = FakeModels()
+
+
+class TestLocalOCRTier:
+    """Test extraction, sufficiency and tier metrics."""
+
+    def test_word_count_ignores_noise(self):
+        assert word_count(SPARSE) == 1
+        assert word_count("file_name.py 42 x") == 4
+
+    def test_dense_text_is_a_hit(self):
+        tier = LocalOCRTier(FakeOCRBackend(DENSE), use_process=False)
+        text = asyncio.run(tier.extract(jpeg()))
+        assert text == DENSE and tier.is_sufficient(text)
+        assert tier.get_stats()["hit_rate"] == 1.0
+
+    def test_unavailable_backend_returns_empty(self):
+        tier = LocalOCRTier(OCRBackend(), use_process=False)
+        assert asyncio.run(tier.extract(jpeg())) == ""
+        assert tier.get_stats()["frames"] == 0
+
+    def test_failure_is_counted(self):
+        tier = LocalOCRTier(FailingOCRBackend(), use_process=False)
+        assert asyncio.run(tier.extract(jpeg())) == ""
+        assert tier.get_stats()["errors"] == 1
+
+    def test_runs_in_worker_process(self):
+        tier = LocalOCRTier(FakeOCRBackend(DENSE))
+        try:
+            assert asyncio.run(tier.extract(jpeg())) == DENSE
+        finally:
+            tier.shutdown()
+
+
+@pytest.mark.skipif(not HAS_AGENT, reason=f"Visual memory agent unavailable: {IMPORT_ERROR if not HAS_AGENT else ''}")
+class TestTieredIndexing:
+    """Test when frames are escalated to Gemini and what is stored."""
+
+    @pytest.fixture
+    def client(self):
+        return FakeClient()
+
+    def make_agent(self, tmp_path, client, text, frames=1):
+        return VisualMemoryAgent(FakeDesktop(frames), db_path=str(tmp_path / "vm.db"), client=client,
+                                 ocr=LocalOCRTier(FakeOCRBackend(text), use_process=False))
+
+    def test_dense_frame_stays_local(self, tmp_path, client):
+        agent = self.make_agent(tmp_path, client, DENSE)
+        asyncio.run(agent.record_current_screen())
+        assert client.models.calls == 0
+        assert agent.get_stats()["tiers"]["local"]["frames"] == 1
+        assert agent.search("lightweight indexing")
+
+    def test_sparse_frame_escalates(self, tmp_path, client):
+        agent = self.make_agent(tmp_path, client, SPARSE)
+        asyncio.run(agent.record_current_screen())
+        assert client.models.calls == 1
+        assert agent.get_stats()["tiers"]["gemini"]["frames"] == 1
+        assert agent.search("code editor")
+
+    def test_describe_forces_escalation(self, tmp_path, client):
+        agent = self.make_agent(tmp_path, client, DENSE)
+        asyncio.run(agent.record_current_screen(describe=True))
+        assert client.models.calls == 1
+        # Local text is kept alongside the description
+        assert agent.search("lightweight") and agent.search("editor")
+
+    def test_rate_limited_falls_back_to_local_text(self, tmp_path, client):
+        client.models.fail = True
+        agent = self.make_agent(tmp_path, client, SPARSE, frames=2)
+        asyncio.run(agent.record_current_screen())
+        assert agent.backoff_until > time.time()
+        asyncio.run(agent.record_current_screen())
+        # The second frame is not sent while backing off
+        assert client.models.calls == 1
+        assert agent.get_stats()["tiers"]["local"]["frames"] == 2
+        assert len(agent.search("ok")) == 2
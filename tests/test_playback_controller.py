@@ -0,0 +1,82 @@
+"""
+Tests for generation-tagged playback and barge-in bookkeeping.
+"""
+import asyncio
+
+import pytest
+
+from audio_ring import AudioRingBuffer
+from playback_controller import PlaybackController
+
+
+@pytest.fixture
+def ring():
+    r = AudioRingBuffer(capacity_bytes=4096)
+    yield r
+    r.close()
+
+
+class TestPlaybackController:
+    """Test stale-chunk invalidation and the speaking timer."""
+
+    def test_interrupt_invalidates_tagged_chunks(self):
+        pc = PlaybackController()
+        generation, _ = pc.tag(b"\x00\x00")
+        assert pc.is_current(generation)
+        pc.interrupt()
+        assert not pc.is_current(generation)
+        assert pc.is_current(pc.tag(b"")[0])
+
+    @pytest.mark.asyncio
+    async def test_speaking_ends_after_hangover(self):
+        pc = PlaybackController(hangover=0.05)
+        assert pc.on_chunk_played(2)
+        assert not pc.on_chunk_played(2)
+        assert pc.is_speaking
+        await asyncio.sleep(0.1)
+        assert not pc.is_speaking
+        assert pc.speech_start_time is None
+
+    @pytest.mark.asyncio
+    async def test_speaking_lasts_for_buffered_audio(self):
+        # 0.15 s of audio handed over at once outlives the 0.05 s hangover
+        pc = PlaybackController(hangover=0.05, bytes_per_second=1000)
+        pc.on_chunk_played(150)
+        await asyncio.sleep(0.1)
+        assert pc.is_speaking
+        await asyncio.sleep(0.1)
+        assert not pc.is_speaking
+
+    @pytest.mark.asyncio
+    async def test_single_timer_for_many_chunks(self):
+        pc = PlaybackController(hangover=0.05)
+        pc.on_chunk_played(2)
+        timer = pc._timer
+        for _ in range(100):
+            pc.on_chunk_played(2)
+        assert pc._timer is timer
+
+    @pytest.mark.asyncio
+    async def test_interrupt_resets_ring_and_records_barge_in(self, ring):
+        pc = PlaybackController()
+        pc.audio_ring = ring
+        ring.write(b"\x01\x00" * 100)
+        pc.on_chunk_played(200)
+        pc.note_user_speech_onset()
+        pc.interrupt()
+
+        assert not pc.is_speaking
+        assert ring.consume_reset()
+        ring.mark_reset_applied()
+        await asyncio.sleep(0.3)
+
+        stats = pc.get_stats()
+        assert stats["interruptions"] == 1
+        assert stats["last_barge_in"]["silence_ms"] is not None
+        assert stats["avg_barge_in_ms"] is not None
+
+    def test_interrupt_while_silent_is_not_a_barge_in(self):
+        pc = PlaybackController()
+        pc.note_user_speech_onset()
+        pc.interrupt()
+        assert pc.get_stats()["interruptions"] == 0
@@ -0,0 +1,156 @@
+"""
+Tests for background incremental re-indexing (ProjectIndexer) and the tree scan it relies on.
+"""
+import asyncio
+import os
+import sqlite3
+
+import pytest
+
+try:
+    from project_indexer import ProjectIndexer
+    from semantic_search_agent import SemanticSearchAgent, scan_tree
+    HAS_INDEXER = True
+except ImportError as e:
+    HAS_INDEXER = False
+    IMPORT_ERROR = str(e)
+
+pytestmark = pytest.mark.skipif(not HAS_INDEXER, reason=f"Semantic search agent unavailable: {IMPORT_ERROR if not HAS_INDEXER else ''}")
+
+
+class FakeModels:
+    def __init__(self):
+        self.texts = []
+
+    def embed_content(self, model, contents, config=None):
+        self.texts.extend(contents)
+        embeddings = [type("Embedding", (), {"values": [float(len(t)), 1.0, 0.5]})() for t in contents]
+        return type("Response", (), {"embeddings": embeddings})()
+
+
+class FakeClient:
+    def __init__(self):
+        self.models = FakeModels()
+
+
+def indexed_paths(agent):
+    conn = sqlite3.connect(agent.db_path)
+    paths = {os.path.basename(row[0]) for row in conn.execute("SELECT DISTINCT path FROM chunks")}
+    conn.close()
+    return paths
+
+
+async def wait_for(condition, timeout=5.0):
+    for _ in range(int(timeout / 0.02)):
+        if condition():
+            return
+        await asyncio.sleep(0.02)
+    raise AssertionError("condition not met")
+
+
+@pytest.fixture
+def project(tmp_path):
+    root = tmp_path / "proj"
+    root.mkdir()
+    (root / "a.py").write_text("def a(): return 1\n")
+    (root / "b.md").write_text("# Notes\n")
+    (root / "node_modules").mkdir()
+    (root / "node_modules" / "dep.js").write_text("module.exports = 1\n")
+    (root / ".git").mkdir()
+    (root / ".git" / "config.txt").write_text("x\n")
+    return root
+
+
+@pytest.fixture
+def agent(tmp_path):
+    return SemanticSearchAgent(api_key=None, db_path=str(tmp_path / "ss.db"), client=FakeClient())
+
+
+def test_scan_tree_prunes_ignored_dirs(project):
+    files = scan_tree(project)
+    assert sorted(os.path.basename(p) for p in files) == ["a.py", "b.md"]
+
+
+def test_index_project_removes_deleted_files(project, agent):
+    asyncio.run(agent.index_project("proj", str(project)))
+    assert indexed_paths(agent) == {"a.py", "b.md"}
+    (project / "b.md").unlink()
+    asyncio.run(agent.index_project("proj", str(project)))
+    assert indexed_paths(agent) == {"a.py"}
+
+
+def test_events_are_debounced_into_one_batch(project, agent):
+    indexer = ProjectIndexer(agent, debounce_s=0.1, use_watchdog=False, poll_interval=3600)
+
+    async def scenario():
+        await indexer.watch("proj", str(project))
+        await wait_for(lambda: indexer.full_scans == 1 and indexed_paths(agent) == {"a.py", "b.md"})
+        embedded = len(agent.client.models.texts)
+
+        # A burst of saves to the same file plus a new file and a deletion
+        for i in range(5):
+            (project / "a.py").write_text(f"def a(): return {i + 10}\n")
+            indexer.notify(project / "a.py")
+            await asyncio.sleep(0.01)
+        (project / "c.ts").write_text("export function c() {}\n")
+        indexer.notify(project / "c.ts")
+        (project / "b.md").unlink()
+        indexer.notify(project / "b.md")
+        indexer.notify(project / "node_modules" / "dep.js") # ignored
+
+        await wait_for(lambda: indexer.batches == 1 and not indexer.get_stats()["pending"])
+        await wait_for(lambda: indexed_paths(agent) == {"a.py", "c.ts"})
+        await indexer.stop()
+        return embedded
+
+    embedded = asyncio.run(scenario())
+    assert agent.client.models.texts[embedded:] == ["def a(): return 14\n", "export function c() {}\n"]
+    stats = indexer.get_stats()
+    assert stats["full_scans"] == 1 and stats["files_indexed"] == 2 and stats["files_removed"] == 1
+    assert stats["mode"] == "stopped"
+
+
+def test_polling_diffs_mtime_snapshot(project, agent):
+    indexer = ProjectIndexer(agent, debounce_s=0.0, use_watchdog=False, poll_interval=0.1)
+
+    async def scenario():
+        await indexer.watch("proj", str(project))
+        await wait_for(lambda: indexer.full_scans == 1 and indexed_paths(agent) == {"a.py", "b.md"})
+        (project / "new.py").write_text("def new(): pass\n")
+        (project / "a.py").unlink()
+        await wait_for(lambda: indexed_paths(agent) == {"b.md", "new.py"})
+        assert indexer.mode == "polling"
+        await indexer.stop()
+
+    asyncio.run(scenario())
+    assert indexer.full_scans == 1 and indexer.gaps == 0
+
+
+def test_rescan_after_gap(project, agent):
+    indexer = ProjectIndexer(agent, debounce_s=0.05, use_watchdog=False, poll_interval=3600)
+
+    async def scenario():
+        await indexer.watch("proj", str(project))
+        await wait_for(lambda: indexer.full_scans == 1)
+        # Files changed while no events were delivered (e.g. a moved directory)
+        (project / "missed.py").write_text("def missed(): pass\n")
+        indexer.notify_rescan()
+        await wait_for(lambda: "missed.py" in indexed_paths(agent))
+        await indexer.stop()
+
+    asyncio.run(scenario())
+    assert indexer.full_scans == 2 and indexer.gaps == 1
+
+
+def test_watch_same_project_is_noop(project, agent):
+    indexer = ProjectIndexer(agent, use_watchdog=False, poll_interval=3600)
+
+    async def scenario():
+        await indexer.watch("proj", str(project))
+        task = indexer._task
+        await indexer.watch("proj", str(project))
+        assert indexer._task is task
+        await wait_for(lambda: indexer.full_scans == 1)
+        await indexer.stop()
+
+    asyncio.run(scenario())
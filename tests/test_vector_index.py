@@ -0,0 +1,171 @@
+"""
+Tests for the in-memory vector index and its use by SemanticSearchAgent.
+"""
+import asyncio
+import hashlib
+import re
+import sqlite3
+import threading
+
+import numpy as np
+import pytest
+
+from vector_index import VectorIndex
+
+try:
+    from semantic_search_agent import SemanticSearchAgent
+    HAS_AGENT = True
+except ImportError as e:
+    HAS_AGENT = False
+    IMPORT_ERROR = str(e)
+
+
+def brute_force(vectors, query, top_k):
+    scores = {k: float(np.dot(v, query) / (np.linalg.norm(v) * np.linalg.norm(query))) for k, v in vectors.items()}
+    return sorted(scores.items(), key=lambda kv: kv[1], reverse=True)[:top_k]
+
+
+class TestVectorIndex:
+    """Test ranking, incremental updates and growth."""
+
+    def test_matches_brute_force(self):
+        rng = np.random.default_rng(0)
+        vectors = {f"f{i}": rng.normal(size=64).astype(np.float32) for i in range(500)}
+        index = VectorIndex()
+        for key, vector in vectors.items():
+            index.upsert(key, vector)
+        query = rng.normal(size=64)
+        got = index.search(query, top_k=7)
+        want = brute_force(vectors, query, 7)
+        assert [k for k, _ in got] == [k for k, _ in want]
+        np.testing.assert_allclose([s for _, s in got], [s for _, s in want], rtol=1e-5)
+
+    def test_upsert_replaces_and_remove_compacts(self):
+        index = VectorIndex(capacity=2)
+        index.upsert("a", [1, 0, 0])
+        index.upsert("b", [0, 1, 0])
+        index.upsert("c", [0, 0, 1]) # grows past capacity
+        index.upsert("a", [0, 0.9, 0.1])
+        assert index.search([0, 1, 0], top_k=1)[0][0] == "b"
+        assert index.remove("b") and not index.remove("b")
+        assert index.search([0, 1, 0], top_k=1)[0][0] == "a"
+        assert len(index) == 2 and "b" not in index
+        assert [k for k, _ in index.search([0, 0, 1], top_k=5)] == ["c", "a"]
+
+    def test_bulk_load_skips_zero_rows(self):
+        index = VectorIndex()
+        assert index.bulk_load(["x", "y", "z"], np.array([[1, 0], [0, 0], [0, 3]], dtype=np.float32)) == 2
+        assert [k for k, _ in index.search([0, 1], top_k=3)] == ["z", "x"]
+
+    def test_dimension_mismatch(self):
+        index = VectorIndex()
+        index.upsert("a", [1, 2, 3])
+        with pytest.raises(ValueError):
+            index.upsert("b", [1, 2])
+        assert index.search([1, 2], top_k=3) == []
+
+    def test_empty(self):
+        assert VectorIndex().search([1, 0], top_k=3) == []
+
+
+class FakeModels:
+    """Bag-of-words hashing embeddings: texts sharing words are close."""
+    def embed_content(self, model, contents, config=None):
+        embeddings = []
+        for text in contents:
+            vec = np.zeros(64, dtype=np.float32)
+            for word in re.findall(r"\w+", text.lower()):
+                vec[int(hashlib.md5(word.encode()).hexdigest(), 16) % 64] += 1
+            embeddings.append(type("Embedding", (), {"values": vec.tolist()})())
+        return type("Response", (), {"embeddings": embeddings})()
+
+
+class FakeClient:
+    def __init__(self):
+        self.models = FakeModels()
+
+
+@pytest.mark.skipif(not HAS_AGENT, reason=f"Semantic search agent unavailable: {IMPORT_ERROR if not HAS_AGENT else ''}")
+class TestSemanticSearchIndex:
+    """Test that the agent searches the in-memory index and keeps it current."""
+
+    @pytest.fixture
+    def agent(self, tmp_path):
+        return SemanticSearchAgent(api_key=None, db_path=str(tmp_path / "ss.db"), client=FakeClient())
+
+    def write(self, root, name, text):
+        path = root / name
+        path.write_text(text)
+        return path
+
+    def test_search_ranks_files(self, tmp_path, agent):
+        project = tmp_path / "proj"
+        project.mkdir()
+        self.write(project, "auth.py", "login password token session")
+        self.write(project, "cad.py", "mesh extrude sketch solid")
+        asyncio.run(agent.index_project("proj", str(project)))
+        results = asyncio.run(agent.search("proj", "password login"))
+        assert results[0]["name"] == "auth.py"
+        assert results[0]["score"] > results[1]["score"]
+
+    def test_index_loaded_once_and_updated_incrementally(self, tmp_path, agent):
+        project = tmp_path / "proj"
+        project.mkdir()
+        self.write(project, "a.py", "alpha beta")
+
+        async def scenario():
+            await agent.index_project("proj", str(project))
+            await agent.search("proj", "alpha")
+            index = agent._indexes["proj"]
+            self.write(project, "b.py", "gamma delta")
+            await agent.index_project("proj", str(project))
+            assert agent._indexes["proj"] is index and len(index) == 2
+            return await agent.search("proj", "gamma delta")
+
+        results = asyncio.run(scenario())
+        assert results[0]["name"] == "b.py"
+
+    def test_writes_during_first_load_reach_the_index(self, tmp_path, agent):
+        project = tmp_path / "proj"
+        project.mkdir()
+        old = self.write(project, "a.py", "alpha beta")
+        loaded, resume = threading.Event(), threading.Event()
+        load_index = agent._load_index
+
+        def slow_load(*args):
+            index = load_index(*args)
+            loaded.set()
+            resume.wait(5)
+            return index
+
+        agent._load_index = slow_load
+
+        async def scenario():
+            await agent.index_project("proj", str(project))
+            search = asyncio.create_task(agent.search("proj", "alpha"))
+            await asyncio.to_thread(loaded.wait, 5)
+            # The snapshot is taken; a.py goes away and b.py arrives before it is registered
+            old.unlink()
+            self.write(project, "b.py", "gamma delta")
+            await agent.index_project("proj", str(project))
+            resume.set()
+            await search
+            return await agent.search("proj", "gamma delta")
+
+        results = asyncio.run(scenario())
+        assert len(agent._indexes["proj"]) == 1
+        assert [r["name"] for r in results] == ["b.py"]
+
+    def test_search_interactions(self, tmp_path, agent):
+
+        async def scenario():
+            await agent.log_interaction("make a box", "generate_cad", "box created")
+            await agent.search_interactions("anything") # loads the index
+            await agent.log_interaction("turn on the lights", "control_light", "lights on")
+            return await agent.search_interactions("lights on please", top_k=1)
+
+        [result] = asyncio.run(scenario())
+        assert result["tool"] == "control_light"
+        conn = sqlite3.connect(agent.db_path)
+        assert conn.execute("SELECT COUNT(*) FROM interaction_history").fetchone()[0] == 2
+        conn.close()
@@ -0,0 +1,196 @@
+"""
+Tests for frame-signature deduplication in the visual memory agent.
+"""
+import asyncio
+import sqlite3
+import string
+
+import cv2
+import numpy as np
+import pytest
+
+from local_ocr import LocalOCRTier, OCRBackend
+from perceptual_hash import FrameDeduper, frame_signature, frame_signature_jpeg, signature_distance
+
+try:
+    from visual_memory_agent import VisualMemoryAgent
+    HAS_AGENT = True
+except ImportError as e:
+    HAS_AGENT = False
+    IMPORT_ERROR = str(e)
+
+
+def screen(seed=0, height=400, width=640):
+    rng = np.random.default_rng(seed)
+    frame = np.full((height, width, 3), 230, dtype=np.uint8)
+    for _ in range(12):
+        x, y = rng.integers(0, width - 120), rng.integers(0, height - 60)
+        frame[y:y + 60, x:x + 120] = rng.integers(0, 255, 3, dtype=np.uint8)
+    return frame
+
+
+def text_page(seed=0, height=1000, width=1600, edited_line=None, caret=False):
+    """An editor-like window: fixed title bar and gutter, dense random text that depends on `seed`."""
+    rng = np.random.default_rng(seed)
+    alphabet = np.array(list(string.ascii_lowercase + "     "))
+    frame = np.full((height, width, 3), 255, dtype=np.uint8)
+    frame[:40] = 60
+    frame[40:, :60] = 235
+    for i, y in enumerate(range(70, height - 10, 22)):
+        line_rng = np.random.default_rng(10_000 + i) if i == edited_line else rng
+        line = "".join(line_rng.choice(alphabet, line_rng.integers(60, 120)))
+        cv2.putText(frame, line, (80, y), cv2.FONT_HERSHEY_SIMPLEX, 0.55, (20, 20, 20), 1, cv2.LINE_AA)
+    if caret:
+        frame[300:318, 700:702] = 0
+    return frame
+
+
+def jpeg(frame, quality=70):
+    return cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, quality])[1].tobytes()
+
+
+def jpeg_signature(frame):
+    return frame_signature_jpeg(jpeg(frame))
+
+
+class TestFrameSignature:
+    """Test signature stability, text sensitivity and the per-title dedupe window."""
+
+    def test_signature_survives_jpeg_and_noise(self):
+        frame = screen()
+        noisy = np.clip(frame.astype(np.int16) + np.random.default_rng(1).integers(-4, 5, frame.shape), 0, 255).astype(np.uint8)
+        assert signature_distance(jpeg_signature(frame), jpeg_signature(noisy)) <= FrameDeduper().max_distance
+
+    def test_different_screens_are_far_apart(self):
+        assert signature_distance(frame_signature(screen(0)), frame_signature(screen(1))) > FrameDeduper().max_distance
+
+    def test_different_text_pages_in_same_layout_are_not_duplicates(self):
+        # Regression: a 64-bit dhash put these within 3 bits, so scrolling/editing reused stale text
+        deduper = FrameDeduper()
+        deduper.add("Editor", jpeg_signature(text_page(0)), 1)
+        assert deduper.find("Editor", jpeg_signature(text_page(1))) is None
+        assert deduper.find("Editor", jpeg_signature(text_page(0, edited_line=10))) is None
+        assert deduper.find("Editor", jpeg_signature(text_page(0, caret=True))) == 1
+
+    def test_signature_is_a_fixed_size_blob(self):
+        assert len(frame_signature(screen())) == len(frame_signature(text_page())) == 64 * 64
+        assert signature_distance(b"\x00" * 16, b"\x00" * 4) == 16
+
+    def test_duplicates_only_within_same_title(self):
+        deduper = FrameDeduper()
+        signature = frame_signature(screen())
+        deduper.add("Editor", signature, 1)
+        assert deduper.find("Editor", signature) == 1
+        assert deduper.find("Browser", signature) is None
+        assert deduper.find("Editor", frame_signature(screen(5))) is None
+        assert deduper.get_stats()["duplicates"] == 1
+
+    def test_title_capacity(self):
+        deduper = FrameDeduper(max_titles=2)
+        signatures = [bytes([i * 50]) * 16 for i in range(3)]
+        for i, title in enumerate(["a", "b", "c"]):
+            deduper.add(title, signatures[i], i)
+        assert deduper.find("a", signatures[0]) is None
+        assert deduper.find("c", signatures[2]) == 2
+
+
+class FakeDesktop:
+    def __init__(self, frames):
+        self.frames = list(frames)
+        self.title = "Editor"
+
+    async def get_screenshot(self, **kwargs):
+        return {"mime_type": "image/jpeg", "data": jpeg(self.frames.pop(0))}
+
+    async def get_active_window_info(self):
+        return {"title": self.title}
+
+
+class FakeModels:
+    def __init__(self):
+        self.calls = 0
+
+    def generate_content(self, model, contents):
+        self.calls += 1
+        return type("Response", (), {"text": f"summary {self.calls}"})()
+
+
+class FakeClient:
+    def __init__(self):
+        self.models = FakeModels()
+
+
+@pytest.mark.skipif(not HAS_AGENT, reason=f"Visual memory agent unavailable: {IMPORT_ERROR if not HAS_AGENT else ''}")
+class TestVisualMemoryDedupe:
+    """Test that unchanged screens skip the Gemini call but still leave a searchable row."""
+
+    @pytest.fixture
+    def client(self):
+        return FakeClient()
+
+    def make_agent(self, tmp_path, client, frames):
+        return VisualMemoryAgent(FakeDesktop(frames), db_path=str(tmp_path / "vm.db"), client=client,
+                                 ocr=LocalOCRTier(OCRBackend()))
+
+    def rows(self, agent):
+        conn = sqlite3.connect(agent.db_path)
+        rows = conn.execute("SELECT rowid, image_path, content, duplicate_of FROM visual_memory ORDER BY rowid").fetchall()
+        conn.close()
+        return rows
+
+    def test_unchanged_screen_skips_api_call(self, tmp_path, client):
+        agent = self.make_agent(tmp_path, client, [screen(), screen(), screen(3)])
+
+        assert asyncio.run(agent.record_current_screen()) is True
+        assert asyncio.run(agent.record_current_screen()) is False
+        assert asyncio.run(agent.record_current_screen()) is True
+
+        assert client.models.calls == 2
+        assert agent.get_stats()["api_calls_saved"] == 1
+        first, dup, third = self.rows(agent)
+        assert dup[1:3] == first[1:3] and dup[3] == first[0]
+        assert third[3] is None
+        assert len(list(tmp_path.joinpath("visual_memory_frames").iterdir())) >= 1
+
+    def test_new_text_in_same_window_is_indexed(self, tmp_path, client):
+        agent = self.make_agent(tmp_path, client, [text_page(0), text_page(1), text_page(1, caret=True)])
+        assert asyncio.run(agent.record_current_screen()) is True
+        assert asyncio.run(agent.record_current_screen()) is True
+        assert asyncio.run(agent.record_current_screen()) is False
+        assert client.models.calls == 2
+
+    def test_same_pixels_in_other_window_are_indexed(self, tmp_path, client):
+        agent = self.make_agent(tmp_path, client, [screen(), screen()])
+        asyncio.run(agent.record_current_screen())
+        agent.desktop_agent.title = "Browser"
+        asyncio.run(agent.record_current_screen())
+        assert client.models.calls == 2
+
+    def test_failed_index_is_not_reused(self, tmp_path, client):
+        agent = self.make_agent(tmp_path, client, [screen(), screen()])
+        client.models.generate_content = lambda model, contents: (_ for _ in ()).throw(RuntimeError("boom"))
+        asyncio.run(agent.record_current_screen())
+        assert asyncio.run(agent.record_current_screen()) is True
+        assert agent.api_calls_saved == 0
+
+    def test_signatures_reloaded_after_restart(self, tmp_path):
+        agent = self.make_agent(tmp_path, FakeClient(), [screen()])
+        asyncio.run(agent.record_current_screen())
+
+        client = FakeClient()
+        restarted = self.make_agent(tmp_path, client, [screen()])
+        restarted._load_recent_signatures()
+        assert asyncio.run(restarted.record_current_screen()) is False
+        assert client.models.calls == 0
+
+    def test_migration_adds_signature_columns(self, tmp_path, client):
+        db = tmp_path / "old.db"
+        conn = sqlite3.connect(db)
+        conn.execute("CREATE TABLE visual_memory (timestamp REAL, image_path TEXT, window_title TEXT, content TEXT)")
+        conn.commit()
+        conn.close()
+        VisualMemoryAgent(FakeDesktop([]), db_path=str(db), client=client)
+        conn = sqlite3.connect(db)
+        columns = [info[1] for info in conn.execute("PRAGMA table_info(visual_memory)")]
+        conn.close()
+        assert "signature" in columns and "duplicate_of" in columns
@@ -0,0 +1,124 @@
+"""
+Tests for the visual memory full-text index.
+"""
+import asyncio
+import sqlite3
+import time
+
+import pytest
+
+try:
+    from visual_memory_agent import VisualMemoryAgent, fts_query
+    HAS_AGENT = True
+except ImportError as e:
+    HAS_AGENT = False
+    IMPORT_ERROR = str(e)
+
+pytestmark = pytest.mark.skipif(not HAS_AGENT, reason=f"Visual memory agent unavailable: {IMPORT_ERROR if not HAS_AGENT else ''}")
+
+
+def make_agent(tmp_path, name="vm.db"):
+    return VisualMemoryAgent(None, db_path=str(tmp_path / name), client=object())
+
+
+def insert(agent, rows):
+    conn = sqlite3.connect(agent.db_path)
+    conn.executemany("INSERT INTO visual_memory (timestamp, image_path, window_title, content, duplicate_of) VALUES (?, ?, ?, ?, ?)", rows)
+    conn.commit()
+    conn.close()
+
+
+class TestFtsQuery:
+    """Test free-text to MATCH conversion."""
+
+    def test_terms_are_quoted_prefixes(self):
+        assert fts_query("Budget sprea") == '"budget"* "sprea"*'
+
+    def test_fts_syntax_is_neutralised(self):
+        assert fts_query('title:"x" OR (y') == '"title"* "x"* "or"* "y"*'
+        assert fts_query("*** --") is None
+
+
+class TestVisualMemorySearch:
+    """Test ranking, filters, snippets and index maintenance."""
+
+    def test_title_match_outranks_content_match(self, tmp_path):
+        agent = make_agent(tmp_path)
+        now = time.time()
+        insert(agent, [
+            (now - 60, "a.jpg", "Terminal", "ran the budget script", None),
+            (now - 30, "b.jpg", "Budget 2025.xlsx - Excel", "quarterly numbers", None),
+            (now - 10, "c.jpg", "Spotify", "playing music", None),
+        ])
+        results = agent.search("budget")
+        assert [r["image_path"] for r in results] == ["b.jpg", "a.jpg"]
+        assert "[budget]" in results[1]["snippet"]
+
+    def test_time_range_filter(self, tmp_path):
+        agent = make_agent(tmp_path)
+        now = time.time()
+        insert(agent, [(now - 3 * 3600, "old.jpg", "Docs", "python asyncio docs", None),
+                       (now - 60, "new.jpg", "Docs", "python typing docs", None)])
+        assert [r["image_path"] for r in agent.search("python", start_time=now - 3600)] == ["new.jpg"]
+        assert [r["image_path"] for r in agent.search("python", end_time=now - 3600)] == ["old.jpg"]
+
+    def test_duplicates_collapse_to_latest_sighting(self, tmp_path):
+        agent = make_agent(tmp_path)
+        now = time.time()
+        insert(agent, [(now - 100, "a.jpg", "Editor", "rex.py open", None)])
+        insert(agent, [(now - 50, "a.jpg", "Editor", "rex.py open", 1), (now - 10, "a.jpg", "Editor", "rex.py open", 1)])
+        results = agent.search("rex")
+        assert len(results) == 1
+        assert results[0]["timestamp"] == pytest.approx(now - 10)
+
+    def test_collapsed_frame_reports_its_best_ranked_row(self, tmp_path):
+        agent = make_agent(tmp_path)
+        now = time.time()
+        insert(agent, [(now - 100, "a.jpg", "Notes", "meeting agenda", None)])
+        insert(agent, [(now - 50, "a.jpg", "Budget review - Notes", "budget meeting agenda", 1),
+                       (now - 10, "a.jpg", "Notes", "meeting agenda budget later", 1)])
+        [result] = agent.search("budget")
+        # Title and snippet belong together (the title match ranks best); the time is the latest sighting
+        assert result["window_title"] == "Budget review - Notes"
+        assert result["snippet"] == "[budget] meeting agenda"
+        assert result["timestamp"] == pytest.approx(now - 10)
+
+    def test_index_follows_deletes_and_updates(self, tmp_path):
+        agent = make_agent(tmp_path)
+        insert(agent, [(time.time() - 5, "a.jpg", "Editor", "draft", None)])
+        conn = sqlite3.connect(agent.db_path)
+        conn.execute("UPDATE visual_memory SET content = 'final'")
+        conn.commit()
+        assert agent.search("draft") == [] and len(agent.search("final")) == 1
+        conn.execute("DELETE FROM visual_memory")
+        conn.commit()
+        conn.close()
+        assert agent.search("final") == []
+
+    def test_migration_indexes_existing_rows(self, tmp_path):
+        db = tmp_path / "old.db"
+        conn = sqlite3.connect(db)
+        conn.execute("CREATE TABLE visual_memory (timestamp REAL, image_path TEXT, window_title TEXT, content TEXT)")
+        conn.execute("INSERT INTO visual_memory VALUES (?, 'x.jpg', 'Browser', 'github pull request')", (time.time() - 5,))
+        conn.commit()
+        conn.close()
+        agent = make_agent(tmp_path, "old.db")
+        assert [r["image_path"] for r in agent.search("pull")] == ["x.jpg"]
+
+    def test_query_memory_formats_results(self, tmp_path):
+        agent = make_agent(tmp_path)
+        insert(agent, [(time.time() - 5, "a.jpg", "Browser", "weather forecast", None)])
+        assert "Window: 'Browser'" in asyncio.run(agent.query_memory("weather"))
+        assert "couldn't find" in asyncio.run(agent.query_memory("nothing-here"))
+
+    def test_search_over_days_of_history_is_fast(self, tmp_path):
+        agent = make_agent(tmp_path)
+        now = time.time()
+        # One frame every 30s for a week
+        insert(agent, [(now - i * 30, f"{i}.jpg", f"Window {i % 50}", f"screen text {i} lorem ipsum dolor", None)
+                       for i in range(20160)])
+        insert(agent, [(now - 3600, "needle.jpg", "Invoice", "invoice number 4471", None)])
+        started = time.perf_counter()
+        results = agent.search("invoice 4471", start_time=now - 7 * 86400)
+        assert time.perf_counter() - started < 0.1
+        assert results[0]["image_path"] == "needle.jpg"
@@ -0,0 +1,85 @@
+"""
+Tests for the frame-aligned wake-word stage.
+"""
+from unittest.mock import MagicMock
+
+import numpy as np
+
+from wake_word import WakeWordStage
+
+
+class RecordingAgent:
+    """Stands in for SpeechAgent; records every frame it is given."""
+
+    def __init__(self, frame_length=512, detect_at=None):
+        self.porcupine = MagicMock(frame_length=frame_length)
+        self.frames = []
+        self.detect_at = detect_at
+
+    def process_frame(self, frame):
+        assert isinstance(frame, np.ndarray) and frame.dtype == np.int16
+        assert frame.flags["C_CONTIGUOUS"]
+        self.frames.append(frame.copy())
+        return 0 if len(self.frames) == self.detect_at else -1
+
+
+def chunks(total, size):
+    samples = np.arange(total, dtype="<i2")
+    return samples, [samples[i:i + size].tobytes() for i in range(0, total, size)]
+
+
+class TestWakeWordStage:
+    """Test sample-accurate framing across chunk boundaries."""
+
+    def test_leftover_samples_carried_across_chunks(self):
+        agent = RecordingAgent(frame_length=512)
+        stage = WakeWordStage(agent)
+        samples, parts = chunks(3000, 700)
+        for part in parts:
+            stage.feed(part)
+
+        assert len(agent.frames) == 3000 // 512
+        np.testing.assert_array_equal(np.concatenate(agent.frames), samples[:len(agent.frames) * 512])
+
+    def test_aligned_frames_are_views(self):
+        agent = RecordingAgent(frame_length=512)
+        seen = []
+        agent.process_frame = lambda frame: seen.append(frame) or -1
+        stage = WakeWordStage(agent)
+        data = bytearray(np.zeros(1024, dtype="<i2").tobytes())
+        stage.feed(data)
+        assert len(seen) == 2
+        assert all(np.shares_memory(f, np.frombuffer(data, dtype=np.uint8)) for f in seen)
+
+    def test_detection_and_rearm(self):
+        armed = {"value": True}
+        detected = []
+        agent = RecordingAgent(frame_length=512, detect_at=2)
+        stage = WakeWordStage(agent, is_armed=lambda: armed["value"], on_detect=detected.append)
+
+        assert stage.feed(np.zeros(1024, dtype="<i2")) == 0
+        assert detected == [0]
+        # Owner has not disarmed yet: no further processing
+        stage.feed(np.zeros(1024, dtype="<i2"))
+        assert len(agent.frames) == 2
+
+        armed["value"] = False
+        stage.feed(np.zeros(1024, dtype="<i2"))
+        armed["value"] = True
+        stage.feed(np.zeros(300, dtype="<i2"))
+        assert len(agent.frames) == 2
+        assert stage.get_stats()["detections"] == 1
+
+    def test_disabled_without_porcupine(self):
+        agent = RecordingAgent()
+        agent.porcupine = None
+        stage = WakeWordStage(agent)
+        assert stage.feed(np.zeros(1024, dtype="<i2")) == -1
+        assert stage.get_stats()["frames_processed"] == 0
+
+    def test_timing_recorded(self):
+        stage = WakeWordStage(RecordingAgent(frame_length=256))
+        stage.feed(np.zeros(1024, dtype="<i2"))
+        stats = stage.get_stats()
+        assert stats["frames_processed"] == 4
+        assert stats["max_us"] >= stats["mean_us"] > 0
@@ -0,0 +1,146 @@
+"""
+Tests for the cached focused-window / monitor tracker.
+"""
+import threading
+import time
+
+from frame_capture import BackgroundFrameCapture
+from window_tracker import FakeFocusHook, FakeWindowBackend, FocusHook, WindowBackend, WindowFocusTracker, WindowInfo
+
+MONITORS = [
+    {"left": 0, "top": 0, "width": 3840, "height": 1080},   # all monitors
+    {"left": 0, "top": 0, "width": 1920, "height": 1080},   # primary
+    {"left": 1920, "top": 0, "width": 1920, "height": 1080},
+]
+
+
+def window(left, top=100, width=800, height=600):
+    return WindowInfo(title="Editor", left=left, top=top, right=left + width, bottom=top + height)
+
+
+class TestWindowFocusTracker:
+    """Test caching and monitor selection."""
+
+    def test_backend_queried_once_within_ttl(self):
+        backend = FakeWindowBackend(window(100))
+        tracker = WindowFocusTracker(backend=backend, ttl=10)
+        for _ in range(30):
+            assert tracker.monitor_index(MONITORS) == 1
+        assert backend.queries == 1
+        assert tracker.get_stats()["cache_hit_ratio"] > 0.9
+
+    def test_ttl_expiry_picks_up_focus_change(self):
+        backend = FakeWindowBackend(window(100))
+        tracker = WindowFocusTracker(backend=backend, ttl=0.05, hook=FocusHook())
+        assert tracker.monitor_index(MONITORS) == 1
+        backend.window = window(2500)
+        assert tracker.monitor_index(MONITORS) == 1  # still cached
+        time.sleep(0.06)
+        assert tracker.monitor_index(MONITORS) == 2
+
+    def test_notify_focus_changed_invalidates(self):
+        backend = FakeWindowBackend(window(100))
+        tracker = WindowFocusTracker(backend=backend, ttl=10)
+        tracker.monitor_index(MONITORS)
+        backend.window = window(2500)
+        tracker.notify_focus_changed()
+        assert tracker.monitor_index(MONITORS) == 2
+
+    def test_unknown_window_defaults_to_primary(self):
+        tracker = WindowFocusTracker(backend=WindowBackend())
+        assert tracker.monitor_index(MONITORS) == 1
+        assert tracker.monitor_index(MONITORS[:1]) == 0
+
+    def test_backend_errors_are_treated_as_unknown(self):
+        class Broken(WindowBackend):
+            def active_window(self):
+                raise RuntimeError("COM error")
+        tracker = WindowFocusTracker(backend=Broken())
+        assert tracker.active_window() is None
+        assert tracker.monitor_index(MONITORS) == 1
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def capture_intervals():
+    capture = BackgroundFrameCapture(grab=None, gate=None, encoder=None)
+    return capture.active_interval, capture.changing_interval, capture.idle_interval
+
+
+class TestCaptureTickRate:
+    """Count backend queries over a minute of frames at the capture thread's real intervals."""
+
+    def run_minute(self, tracker, tick, clock, focus_changes=()):
+        frames = int(60 / tick)
+        for frame in range(frames):
+            if frame in focus_changes:
+                tracker.notify_focus_changed()
+            tracker.monitor_index(MONITORS)
+            clock.now += tick
+        return frames
+
+    def test_ttl_outlasts_every_capture_interval(self):
+        for tick in capture_intervals():
+            clock = FakeClock()
+            backend = FakeWindowBackend(window(100))
+            tracker = WindowFocusTracker(backend=backend, hook=FocusHook(), clock=clock)
+            assert tracker.ttl > tick
+            frames = self.run_minute(tracker, tick, clock)
+            assert backend.queries <= 60 / tracker.ttl + 1 < frames
+
+    def test_hook_drives_invalidation(self):
+        for tick in capture_intervals():
+            clock = FakeClock()
+            backend = FakeWindowBackend(window(100))
+            hook = FakeFocusHook()
+            tracker = WindowFocusTracker(backend=backend, hook=hook, clock=clock)
+            self.run_minute(tracker, tick, clock, focus_changes={3, 7})
+            # First lookup plus one per focus change; the 60 s safety TTL never expires in between
+            assert backend.queries == 3 and tracker.get_stats()["hooked"]
+
+    def test_hook_events_from_another_thread(self):
+        backend = FakeWindowBackend(window(100))
+        hook = FakeFocusHook()
+        tracker = WindowFocusTracker(backend=backend, hook=hook)
+        assert tracker.monitor_index(MONITORS) == 1
+        backend.window = window(2500)
+        assert tracker.monitor_index(MONITORS) == 1  # no event yet
+        thread = threading.Thread(target=hook.fire)
+        thread.start()
+        thread.join()
+        assert tracker.monitor_index(MONITORS) == 2
+        assert tracker.get_stats()["focus_events"] == 1
+        tracker.stop()
+        assert hook.callback is None
+
+    def test_concurrent_first_lookups_start_one_hook(self):
+        class SlowHook(FakeFocusHook):
+            starts = 0
+
+            def start(self, callback):
+                SlowHook.starts += 1
+                time.sleep(0.05)
+                return super().start(callback)
+
+        tracker = WindowFocusTracker(backend=FakeWindowBackend(window(100)), hook=SlowHook())
+        barrier = threading.Barrier(4)
+        hooked_after_lookup = []
+
+        def lookup():
+            barrier.wait()
+            tracker.active_window()
+            hooked_after_lookup.append(tracker.hooked)
+
+        threads = [threading.Thread(target=lookup) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # No caller gets past the first lookup before the hook is running
+        assert SlowHook.starts == 1 and hooked_after_lookup == [True] * 4